@@ -18,9 +18,9 @@ def draw_horizontal_stripes(surface, x1, x2, y1, y2):
     sdl2.ext.fill(surface, BLACK)
 
     # Create a 2D view that allows us to directly access each individual pixel
-    # of the surface. The PixelView class is quite slow, since it uses an non-
-    # optimised read-write access to each individual pixel and offset. It
-    # works on every platform, though.
+    # of the surface. The PixelView class does not need any additional
+    # modules and works on every platform. For processing large amounts of
+    # pixels at once, pixels2d() and pixels3d() are faster, though.
     pixelview = sdl2.ext.PixelView(surface)
 
     # Loop over the area bounds, considering each fourth line and every column
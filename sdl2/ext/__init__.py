@@ -11,12 +11,16 @@ from .resources import *
 from .events import *
 from .ebs import *
 
+from .batch import *
 from .common import *
 from .draw import *
 from .font import *
 from .gui import *
 from .image import *
+from .pack import *
 from .pixelaccess import *
+from .preload import *
+from .quantize import *
 from .sprite import *
 from .surface import *
 from .window import *
@@ -1,6 +1,7 @@
 """
 Conversion routines for sequences.
 """
+import sys
 import ctypes
 
 __all__ = ["CTypesView", "to_ctypes", "to_list", "to_tuple", "create_array",
@@ -21,11 +22,92 @@ def to_list(dataseq):
     return list(dataseq)
 
 
+# Kinds of the struct format characters used by buffer objects.
+_FORMATKINDS = {}
+for _kind, _chars in (("i", "bhilqn"), ("u", "BHILQN"), ("f", "efd"),
+                      ("b", "?")):
+    for _char in _chars:
+        _FORMATKINDS[_char] = _kind
+_NATIVEORDER = "<" if sys.byteorder == "little" else ">"
+
+# Item kinds and sizes of the ctypes types, see _item_types().
+_itemtypes = {}
+
+
+def _format_kind(fmt):
+    """Gets the kind of a single-item struct format or None, if the format
+    does not describe a single native-endian item."""
+    if fmt and fmt[0] in "@=<>!":
+        order = fmt[0].replace("!", ">")
+        if order in "<>" and order != _NATIVEORDER:
+            return None
+        fmt = fmt[1:]
+    return _FORMATKINDS.get(fmt)
+
+
+def _item_types(dtype):
+    """Gets the (kind, size) tuples of the buffer items, which can be
+    reinterpreted as the passed ctypes type without conversion.
+
+    Structures consisting of fields of the same simple type, such as
+    SDL_Rect or SDL_Point, accept buffers of that simple type.
+    """
+    itemtypes = _itemtypes.get(dtype)
+    if itemtypes is not None:
+        return itemtypes
+    itemtypes = []
+    if isinstance(getattr(dtype, "_type_", None), str):
+        kind = _format_kind(dtype._type_)
+        if kind is not None:
+            itemtypes.append((kind, ctypes.sizeof(dtype)))
+    elif issubclass(dtype, ctypes.Structure):
+        ftypes = set(field[1] for field in dtype._fields_)
+        if len(ftypes) == 1:
+            ftype = ftypes.pop()
+            fsize = ctypes.sizeof(ftype)
+            if fsize * len(dtype._fields_) == ctypes.sizeof(dtype):
+                itemtypes.extend(_item_types(ftype))
+    _itemtypes[dtype] = itemtypes
+    return itemtypes
+
+
+def _from_buffer(dataseq, dtype, count, checktype=True):
+    """Wraps the buffer of dataseq as ctypes array of count dtype items
+    without copying it.
+
+    Returns None, if dataseq does not provide a C-contiguous buffer of the
+    matching size or, if checktype is True, item type.
+    """
+    try:
+        mview = memoryview(dataseq)
+    except TypeError:
+        return None
+    arraytype = dtype * count
+    # Python 2.7's memoryview neither knows nbytes nor c_contiguous.
+    if getattr(mview, "nbytes", -1) != ctypes.sizeof(arraytype) or \
+            not getattr(mview, "c_contiguous", False):
+        return None
+    if checktype:
+        kind = _format_kind(mview.format)
+        if (kind, mview.itemsize) not in _item_types(dtype) and \
+                mview.format != memoryview(arraytype()).format:
+            return None
+    if mview.readonly:
+        return arraytype.from_buffer_copy(mview)
+    return arraytype.from_buffer(mview)
+
+
 def to_ctypes(dataseq, dtype, mcount=0):
     """Converts an arbitrary sequence to a ctypes array of the specified
     type and returns the ctypes array and amount of items as two-value
     tuple.
 
+    If the passed sequence is a CTypesView or provides a C-contiguous
+    buffer, whose items match the passed type, such as an array.array,
+    bytearray or numpy array, the ctypes array shares the memory of the
+    sequence instead of copying it. Read-only buffers are copied at once.
+    On Python 2.x, the sequence is always copied.
+
     Raises a TypeError, if one or more elements in the passed sequence
     do not match the passed type.
     """
@@ -34,6 +116,9 @@ def to_ctypes(dataseq, dtype, mcount=0):
     else:
         count = len(dataseq)
     if isinstance(dataseq, CTypesView):
+        valset = _from_buffer(dataseq.view, dtype, count, False)
+        if valset is not None:
+            return valset, count
         itemsize = ctypes.sizeof(dtype)
         if itemsize == 1:
             dataseq = dataseq.to_bytes()
@@ -45,6 +130,10 @@ def to_ctypes(dataseq, dtype, mcount=0):
             dataseq = dataseq.to_uint64()
         else:
             raise TypeError("unsupported data type for the passed CTypesView")
+    else:
+        valset = _from_buffer(dataseq, dtype, count)
+        if valset is not None:
+            return valset, count
     valset = (count * dtype)(*dataseq)
     return valset, count
 
@@ -91,15 +180,33 @@ class CTypesView(object):
         """Creates the view on the specified object."""
         self._isshared = not docopy
         bsize = 0
-        if objsize is None:
-            bsize = len(self._obj) * itemsize
-        else:
+        mview = None
+        if not docopy:
+            try:
+                mview = memoryview(self._obj)
+            except TypeError:
+                pass
+        if objsize is not None:
             bsize = objsize * itemsize
+        elif mview is not None and mview.itemsize == itemsize and \
+                hasattr(mview, "nbytes"):
+            # Multi-dimensional buffers, such as numpy arrays, report the
+            # length of their first dimension only.
+            bsize = mview.nbytes
+        else:
+            bsize = len(self._obj) * itemsize
 
         if docopy:
             self._obj = create_array(self._obj, itemsize)
         try:
             self._view = (ctypes.c_ubyte * bsize).from_buffer(self._obj)
+        except (TypeError, ValueError):
+            if mview is None:
+                raise
+            # Read-only or non-contiguous buffers can't be shared.
+            self._isshared = False
+            self._obj = bytearray(mview.tobytes()[:bsize])
+            self._view = (ctypes.c_ubyte * bsize).from_buffer(self._obj)
         except AttributeError:
             # pypy ctypes arrays do not feature a from_buffer() method.
             self._isshared = False
@@ -168,18 +275,29 @@ class CTypesView(object):
         return self._obj
 
 
+def _slice_length(start, stop, step):
+    """Gets the amount of items of a slice with normalized indices."""
+    if step > 0:
+        return max(0, (stop - start + step - 1) // step)
+    return max(0, (start - stop - step - 1) // -step)
+
+
 class MemoryView(object):
     """Simple n-dimensional access to buffers.
 
     The MemoryView provides a read-write access to arbitrary data
     objects, which can be indexed.
 
-    NOTE: The MemoryView is a pure Python-based implementation and makes
-    heavy use of recursion for multi-dimensional access. If you aim for
-    speed on accessing a n-dimensional object, you want to consider
-    using a specialised library such as numpy. If you need n-dimensional
-    access support, where such a library is not supported, or if you
-    need to provide access to objects, which do not fulfill the
+    Indexing a MemoryView with a slice or an index of a dimension other
+    than the last one creates a new MemoryView, which accesses the same
+    data object. Multiple dimensions can be indexed at once using tuples,
+    e.g. view[1, 2:4].
+
+    NOTE: The MemoryView is a pure Python-based implementation. If you
+    aim for speed on accessing a n-dimensional object, you want to
+    consider using a specialised library such as numpy. If you need
+    n-dimensional access support, where such a library is not supported,
+    or if you need to provide access to objects, which do not fulfill the
     requirements of that particular libray, MemoryView can act as solid
     fallback solution.
     """
@@ -197,12 +315,20 @@ class MemoryView(object):
         """
         self._source = source
         self._itemsize = itemsize
-        self._strides = strides
+        self._strides = tuple(strides)
         self._srcsize = srcsize or len(source)
         self._offset = 0
 
-        self._getfunc = getfunc or self._getbytes
-        self._setfunc = setfunc or self._setbytes
+        # The default access functions are looked up on the class, since
+        # bound methods stored on the instance would create a reference
+        # cycle, which delays the cleanup of subclasses like PixelView.
+        if getfunc is not None:
+            self._getfunc = getfunc
+        if setfunc is not None:
+            self._setfunc = setfunc
+        # Bulk assignments of buffers are only possible on the source
+        # itself, not via specialised access functions.
+        self._bulkset = setfunc is None
 
         tsum = 1
         for v in strides:
@@ -212,6 +338,12 @@ class MemoryView(object):
         #if itemsize > strides[-1]:
         #    raise ValueError("itemsize exceeds the accessible stride length")
 
+        # The byte advance for each dimension, e.g. the size of a row.
+        advances = [itemsize]
+        for v in reversed(self._strides[1:]):
+            advances.insert(0, advances[0] * v)
+        self._advances = tuple(advances)
+
     def _getbytes(self, start, end):
         """Gets the bytes within the range of start:end."""
         return self._source[start:end]
@@ -222,67 +354,151 @@ class MemoryView(object):
         """
         self._source[start:end] = value
 
+    _getfunc = _getbytes
+    _setfunc = _setbytes
+
+    def _create_view(self, offset, strides, advances):
+        """Creates a MemoryView on the same source with the passed offset,
+        dimensions and byte advances.
+        """
+        view = MemoryView.__new__(MemoryView)
+        view.__dict__.update(self.__dict__)
+        view._offset = offset
+        view._strides = strides
+        view._advances = advances
+        return view
+
+    def _index(self, index):
+        """Resolves the passed index or tuple of indices to an item offset
+        or a MemoryView.
+
+        Returns an (offset, view) tuple with view being None, if the index
+        refers to a single item.
+        """
+        if type(index) is not tuple:
+            index = (index,)
+        if len(index) > len(self._strides):
+            raise IndexError("too many indices")
+        offset = self._offset
+        strides = ()
+        advances = ()
+        for length, advance, sub in zip(self._strides, self._advances,
+                                        index):
+            if type(sub) is slice:
+                start, stop, step = sub.indices(length)
+                strides += (_slice_length(start, stop, step),)
+                advances += (advance * step,)
+                offset += start * advance
+                continue
+            pos = sub + length if sub < 0 else sub
+            if pos < 0 or pos >= length:
+                raise IndexError("index '%d'is out of bounds for '%d'" %
+                                 (sub, length))
+            offset += pos * advance
+        strides += self._strides[len(index):]
+        if not strides:
+            return offset, None
+        advances += self._advances[len(index):]
+        return offset, self._create_view(offset, strides, advances)
+
+    def _is_contiguous(self):
+        """Checks, if the items of the MemoryView are adjacent."""
+        advance = self._itemsize
+        for length, vadvance in zip(reversed(self._strides),
+                                    reversed(self._advances)):
+            if length > 1 and vadvance != advance:
+                return False
+            advance *= length
+        return True
+
+    def _assign(self, value):
+        """Assigns the passed value to all items of the MemoryView."""
+        data = None
+        if self._bulkset:
+            try:
+                data = memoryview(value).tobytes()
+            except TypeError:
+                pass
+        if data is not None:
+            nbytes = self._itemsize
+            for length in self._strides:
+                nbytes *= length
+            if len(data) != nbytes:
+                raise ValueError("value does not match the view strides")
+            self._assign_bytes(data)
+            return
+        if len(value) != len(self):
+            raise ValueError("value does not match the view strides")
+        if len(self._strides) == 1:
+            setfunc = self._setfunc
+            itemsize = self._itemsize
+            offset = self._offset
+            advance = self._advances[0]
+            for item in value:
+                setfunc(offset, offset + itemsize, item)
+                offset += advance
+        else:
+            for view, item in zip(self, value):
+                view._assign(item)
+
+    def _assign_bytes(self, data):
+        """Assigns the passed bytes to the items of the MemoryView."""
+        if self._is_contiguous():
+            self._setbytes(self._offset, self._offset + len(data), data)
+            return
+        itemsize = self._itemsize
+        if len(self._strides) == 1:
+            offset = self._offset
+            advance = self._advances[0]
+            for start in range(0, len(data), itemsize):
+                self._setbytes(offset, offset + itemsize,
+                               data[start:start + itemsize])
+                offset += advance
+            return
+        size = len(data) // max(self._strides[0], 1)
+        for index, view in enumerate(self):
+            view._assign_bytes(data[index * size:(index + 1) * size])
+
     def __len__(self):
         """The length of the MemoryView over the current dimension
         (amount of items for the current dimension).
         """
-        return self.strides[0]
+        return self._strides[0]
 
     def __repr__(self):
-        retval = "["
-        slen = self.strides[0]
-        for dim in range(slen - 1):
-            retval += "%s, " % self[dim]
-        retval += str(self[slen - 1])
-        retval += "]"
-        return retval
+        return "[%s]" % ", ".join(str(item) for item in self)
+
+    def __iter__(self):
+        """Iterates over the items or views of the current dimension."""
+        offset = self._offset
+        advance = self._advances[0]
+        if len(self._strides) == 1:
+            getfunc = self._getfunc
+            itemsize = self._itemsize
+            for _ in range(self._strides[0]):
+                yield getfunc(offset, offset + itemsize)
+                offset += advance
+        else:
+            strides = self._strides[1:]
+            advances = self._advances[1:]
+            for _ in range(self._strides[0]):
+                yield self._create_view(offset, strides, advances)
+                offset += advance
 
     def __getitem__(self, index):
-        """Returns the item at the specified index."""
-        if type(index) is slice:
-            raise IndexError("slicing is not supported")
-        else:
-            if index >= len(self):
-                raise IndexError("index '%d'is out of bounds for '%d'" %
-                                 (index, len(self)))
-            if self.ndim == 1:
-                offset = self._offset + index * self.itemsize
-                return self._getfunc(offset, offset + self.itemsize)
-            else:
-                advance = self.itemsize
-                for b in self.strides[1:]:
-                    advance *= b
-                offset = self._offset + advance * index
-                view = MemoryView(self._source, self.itemsize,
-                                  self.strides[1:], self._getfunc,
-                                  self._setfunc, self._srcsize)
-                view._offset = offset
-                return view
+        """Returns the item or view at the specified index."""
+        offset, view = self._index(index)
+        if view is None:
+            return self._getfunc(offset, offset + self._itemsize)
+        return view
 
     def __setitem__(self, index, value):
-        """Sets the item at index to the specified value."""
-        if type(index) is slice:
-            raise IndexError("slicing is not supported")
+        """Sets the item or view at index to the specified value."""
+        offset, view = self._index(index)
+        if view is None:
+            self._setfunc(offset, offset + self._itemsize, value)
         else:
-            if index >= len(self):
-                raise IndexError("index '%d'is out of bounds for '%d'" %
-                                 (index, len(self)))
-            offset = self._offset + index * self.itemsize
-            if self.ndim == 1:
-                self._setfunc(offset, offset + self.itemsize, value)
-            else:
-                advance = self.itemsize
-                for b in self.strides[1:]:
-                    advance *= b
-                offset = self._offset + advance * index
-                view = MemoryView(self._source, self.itemsize,
-                                  self.strides[1:], self._getfunc,
-                                  self._setfunc, self._srcsize)
-                view._offset = offset
-                if len(value) != len(view):
-                    raise ValueError("value does not match the view strides")
-                for x in range(len(view)):
-                    view[x] = value[x]
+            view._assign(value)
 
     @property
     def size(self):
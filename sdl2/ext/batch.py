@@ -0,0 +1,208 @@
+"""Multiprocess batch rendering of scenes onto software surfaces."""
+import ctypes
+from collections import deque
+from .common import SDLError
+from .compat import *
+from .sprite import Renderer, SoftwareSprite, SpriteFactory, TEXTURE
+from .font import FontManager
+from .. import SDL_Init, surface
+
+_HASMP = True
+try:
+    from multiprocessing import Pool, cpu_count
+    from multiprocessing.sharedctypes import RawArray
+except ImportError:
+    _HASMP = False
+
+__all__ = ["RenderContext", "BatchRenderer"]
+
+# ARGB8888 masks, which match the target of SDL's software renderer.
+_MASKS = (0x00FF0000, 0x0000FF00, 0x000000FF, 0xFF000000)
+
+
+def _create_surface(size):
+    """Creates a 32bpp ARGB SDL_Surface of the passed size."""
+    rmask, gmask, bmask, amask = _MASKS
+    sf = surface.SDL_CreateRGBSurface(0, size[0], size[1], 32, rmask, gmask,
+                                      bmask, amask)
+    if not sf:
+        raise SDLError()
+    return sf.contents
+
+
+class RenderContext(object):
+    """Per-process rendering state for batch rendering workers.
+
+    The RenderContext owns the target surface, a Renderer on top of it
+    and a SpriteFactory creating TextureSprite objects for that
+    Renderer. Sprites loaded via get_sprite() and FontManager instances
+    acquired via get_fontmanager() are kept for the lifetime of the
+    RenderContext, so that subsequent scenes can reuse them.
+    """
+    def __init__(self, size):
+        """Creates a new RenderContext with a target of the passed size."""
+        self.size = size[0], size[1]
+        self.target = SoftwareSprite(_create_surface(size), True)
+        self.renderer = Renderer(self.target)
+        self.factory = SpriteFactory(TEXTURE, renderer=self.renderer)
+        self._sprites = {}
+        self._fonts = {}
+
+    def get_sprite(self, fname):
+        """Gets a TextureSprite for the passed image file.
+
+        The image file will be loaded only once per RenderContext.
+        """
+        sprite = self._sprites.get(fname)
+        if sprite is None:
+            sprite = self.factory.from_image(fname)
+            self._sprites[fname] = sprite
+        return sprite
+
+    def get_fontmanager(self, font_path, size=16):
+        """Gets a FontManager for the passed font file and size.
+
+        The font will be opened only once per RenderContext.
+        """
+        key = (font_path, size)
+        fontmanager = self._fonts.get(key)
+        if fontmanager is None:
+            fontmanager = FontManager(font_path, size=size)
+            self._fonts[key] = fontmanager
+        return fontmanager
+
+    def clear(self, color=0):
+        """Clears the target with the passed color."""
+        self.renderer.clear(color)
+
+
+# Worker process state, set up by _init_worker().
+_context = None
+_drawfunc = None
+_slots = None
+_slotsize = 0
+
+
+def _init_worker(size, drawfunc, slots, slotsize):
+    """Initializes the RenderContext of a worker process."""
+    global _context, _drawfunc, _slots, _slotsize
+    # Software rendering does not need any subsystem, but SDL has to be
+    # initialized in each process.
+    if SDL_Init(0) != 0:
+        raise SDLError()
+    _context = RenderContext(size)
+    _drawfunc = drawfunc
+    _slots = slots
+    _slotsize = slotsize
+
+
+def _render_job(args):
+    """Renders a single scene and copies the result into its slot."""
+    slot, scene = args
+    _context.clear()
+    _drawfunc(_context, scene)
+    _context.renderer.present()
+    target = _context.target.surface
+    dst = ctypes.addressof(_slots) + slot * _slotsize
+    ctypes.memmove(dst, target.pixels, _slotsize)
+    return slot
+
+
+class BatchRenderer(object):
+    """Renders scene descriptions in parallel on a pool of processes.
+
+    Each worker process keeps a RenderContext, whose sprites and fonts
+    stay loaded between scenes. The rendered pixels are passed back to
+    the calling process via shared memory.
+
+    It is the responsibility of the caller code to ensure that drawfunc
+    and the scene descriptions can be pickled.
+    """
+    def __init__(self, size, drawfunc, processes=None, slots=None):
+        """Creates a new BatchRenderer.
+
+        size denotes the width and height of the rendered scenes.
+        drawfunc is invoked in the worker processes as
+        drawfunc(context, scene) for each scene to be rendered, with
+        context being the RenderContext of the worker. processes is the
+        amount of worker processes to use and defaults to the amount of
+        CPUs. slots denotes the amount of scenes that can be in flight at
+        the same time and defaults to twice the amount of processes.
+        """
+        if not _HASMP:
+            raise UnsupportedError(BatchRenderer,
+                                   "no multiprocessing support found")
+        if not callable(drawfunc):
+            raise TypeError("drawfunc must be callable")
+        self.size = size[0], size[1]
+        sf = _create_surface(self.size)
+        self._slotsize = sf.pitch * sf.h
+        surface.SDL_FreeSurface(sf)
+
+        self._pool = None
+        self._processes = processes
+        self._nslots = slots
+        self._drawfunc = drawfunc
+        self._slots = None
+
+    def _start(self):
+        """Creates the shared memory and the process pool."""
+        if self._pool is not None:
+            return
+        if self._processes is not None:
+            processes = self._processes
+        else:
+            processes = cpu_count()
+        if self._nslots is None:
+            self._nslots = processes * 2
+        self._slots = RawArray(ctypes.c_ubyte,
+                               self._slotsize * self._nslots)
+        self._pool = Pool(processes, _init_worker,
+                          (self.size, self._drawfunc, self._slots,
+                           self._slotsize))
+
+    def _fetch(self, slot):
+        """Copies the pixels of the passed slot into a new SoftwareSprite."""
+        sf = _create_surface(self.size)
+        src = ctypes.addressof(self._slots) + slot * self._slotsize
+        ctypes.memmove(sf.pixels, src, self._slotsize)
+        return SoftwareSprite(sf, True)
+
+    def render(self, scenes):
+        """Renders the passed scenes.
+
+        This returns a generator, which yields a SoftwareSprite for each
+        scene in the order of the passed scenes.
+        """
+        self._start()
+        pending = deque()
+        free = list(range(self._nslots))
+        apply_async = self._pool.apply_async
+        try:
+            for scene in scenes:
+                if not free:
+                    slot = pending.popleft().get()
+                    free.append(slot)
+                    yield self._fetch(slot)
+                job = (free.pop(), scene)
+                pending.append(apply_async(_render_job, (job,)))
+            while pending:
+                yield self._fetch(pending.popleft().get())
+        finally:
+            # Jobs of an abandoned generator must not write into the
+            # slots of the next render() call.
+            while pending:
+                pending.popleft().wait()
+
+    def close(self):
+        """Shuts down the worker processes."""
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+        self._pool = None
+        self._slots = None
+
+    def __del__(self):
+        """Shuts down the worker processes."""
+        if getattr(self, "_pool", None) is not None:
+            self._pool.terminate()
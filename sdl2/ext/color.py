@@ -4,35 +4,75 @@ color module for color creation and conversion operations.
 from math import floor
 from .compat import *
 
+_HASNUMPY = True
+try:
+    import numpy
+except ImportError:
+    _HASNUMPY = False
 
-__all__ = ["Color", "is_rgb_color", "is_rgba_color", "argb_to_color", "ARGB",
-           "rgba_to_color", "RGBA", "string_to_color", "convert_to_color",
-           "COLOR"]
+
+__all__ = ["Color", "ColorArray", "is_rgb_color", "is_rgba_color",
+           "argb_to_color", "ARGB", "rgba_to_color", "RGBA",
+           "string_to_color", "convert_to_color", "COLOR"]
 
 
 class Color(object):
     """A simple RGBA-based color implementation."""
+    __slots__ = ["_r", "_g", "_b", "_a"]
+
     def __init__(self, r=255, g=255, b=255, a=255):
         """Creates a Color with the specified RGBA values."""
         if r < 0 or r > 255:
             raise ValueError("r must be in the range [0; 255]")
         if g < 0 or g > 255:
-            raise ValueError("r must be in the range [0; 255]")
+            raise ValueError("g must be in the range [0; 255]")
         if b < 0 or b > 255:
-            raise ValueError("r must be in the range [0; 255]")
+            raise ValueError("b must be in the range [0; 255]")
         if a < 0 or a > 255:
-            raise ValueError("r must be in the range [0; 255]")
+            raise ValueError("a must be in the range [0; 255]")
         self._r = int(r)
         self._g = int(g)
         self._b = int(b)
         self._a = int(a)
 
+    @classmethod
+    def from_argb(cls, v):
+        """Creates a Color from an integer value, assuming the integer
+        represents a 32-bit ARGB value.
+        """
+        color = cls.__new__(cls)
+        color._a = (v >> 24) & 0xFF
+        color._r = (v >> 16) & 0xFF
+        color._g = (v >> 8) & 0xFF
+        color._b = v & 0xFF
+        return color
+
+    @classmethod
+    def from_rgba(cls, v):
+        """Creates a Color from an integer value, assuming the integer
+        represents a 32-bit RGBA value.
+        """
+        color = cls.__new__(cls)
+        color._r = (v >> 24) & 0xFF
+        color._g = (v >> 16) & 0xFF
+        color._b = (v >> 8) & 0xFF
+        color._a = v & 0xFF
+        return color
+
     def __repr__(self):
         return "Color(r=%d, g=%d, b=%d, a=%d)" % \
-            (self.r, self.g, self.b, self.a)
+            (self._r, self._g, self._b, self._a)
+
+    def __reduce__(self):
+        return (Color, (self._r, self._g, self._b, self._a))
 
     def __copy__(self):
-        return Color(self.r, self.g, self.b, self.a)
+        color = Color.__new__(Color)
+        color._r = self._r
+        color._g = self._g
+        color._b = self._b
+        color._a = self._a
+        return color
 
     def __eq__(self, color):
         return self.r == color.r and self.g == color.g and \
@@ -43,7 +83,7 @@ class Color(object):
             self.b != color.b or self.a != color.a
 
     def __int__(self):
-        return (self.r << 24 | self.g << 16 | self.b << 8 | self.a)
+        return (self._r << 24 | self._g << 16 | self._b << 8 | self._a)
 
     def __long__(self):
         return (self.r << 24 | self.g << 16 | self.b << 8 | self.a)
@@ -114,7 +154,7 @@ class Color(object):
         return 4
 
     def __getitem__(self, index):
-        return (self.r, self.g, self.b, self.a)[index]
+        return (self._r, self._g, self._b, self._a)[index]
 
     def __setitem__(self, index, val):
         tmp = [self.r, self.g, self.b, self.a]
@@ -428,6 +468,368 @@ class Color(object):
         return (self.r / 255.0, self.g / 255.0, self.b / 255.0, self.a / 255.0)
 
 
+def _hue_channel(p, q, h):
+    """Calculates a RGB channel for the hue h of a HSL color."""
+    h = numpy.where(h < 0, h + 1, numpy.where(h > 1, h - 1, h))
+    return numpy.select([h < 1.0 / 6.0, h < 0.5, h < 2.0 / 3.0],
+                        [p + (q - p) * 6 * h, q,
+                         p + (q - p) * 6 * (2.0 / 3.0 - h)], p)
+
+
+def _hue(rn, gn, bn, maxv, diff):
+    """Calculates the hue of normalized RGB values."""
+    sdiff = numpy.where(diff == 0, 1, diff)
+    h = numpy.where(maxv == rn, (60 * (gn - bn) / sdiff) % 360.0,
+                    numpy.where(maxv == gn, (60 * (bn - rn) / sdiff) + 120.0,
+                                (60 * (rn - gn) / sdiff) + 240.0))
+    h = numpy.where(h < 0, h + 360.0, h)
+    return numpy.where(diff == 0, 0.0, h)
+
+
+class ColorArray(object):
+    """An array of RGBA colors.
+
+    The ColorArray stores N colors as a (N, 4) uint8 numpy array, which
+    is available via the data attribute. It provides the conversions
+    and arithmetic operations of Color for all colors at once without
+    creating Color objects.
+    """
+    def __init__(self, colors):
+        """Creates a ColorArray.
+
+        colors can be the amount of colors to create, which will be
+        opaque white, an array-like object of shape (N, 3) or (N, 4) with
+        the RGB(A) values of each color or a sequence of Color-compatible
+        values.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(ColorArray,
+                                   "numpy module could not be loaded")
+        if isinstance(colors, ColorArray):
+            data = colors.data.copy()
+        elif type(colors) in (int, long):
+            data = numpy.full((colors, 4), 255, dtype=numpy.uint8)
+        elif isinstance(colors, numpy.ndarray):
+            data = _rgba_array(colors)
+        else:
+            colors = list(colors)
+            data = numpy.empty((len(colors), 4), dtype=numpy.uint8)
+            for index, color in enumerate(colors):
+                data[index] = tuple(convert_to_color(color))
+        self.data = data
+
+    @classmethod
+    def _wrap(cls, data):
+        """Creates a ColorArray on the passed (N, 4) uint8 array."""
+        colors = cls.__new__(cls)
+        colors.data = data
+        return colors
+
+    @classmethod
+    def from_argb(cls, values):
+        """Creates a ColorArray from integer values, assuming that they
+        represent 32-bit ARGB values.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(cls.from_argb,
+                                   "numpy module could not be loaded")
+        values = numpy.asarray(values, dtype=numpy.uint32).ravel()
+        shifts = numpy.array([16, 8, 0, 24], dtype=numpy.uint32)
+        return cls._wrap(((values[:, None] >> shifts) & 0xFF).astype(
+            numpy.uint8))
+
+    @classmethod
+    def from_rgba(cls, values):
+        """Creates a ColorArray from integer values, assuming that they
+        represent 32-bit RGBA values.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(cls.from_rgba,
+                                   "numpy module could not be loaded")
+        values = numpy.asarray(values, dtype=numpy.uint32).ravel()
+        shifts = numpy.array([24, 16, 8, 0], dtype=numpy.uint32)
+        return cls._wrap(((values[:, None] >> shifts) & 0xFF).astype(
+            numpy.uint8))
+
+    def to_argb(self):
+        """Returns the colors as uint32 array of 32-bit ARGB values."""
+        data = self.data.astype(numpy.uint32)
+        return (data[:, 3] << 24) | (data[:, 0] << 16) | (data[:, 1] << 8) | \
+            data[:, 2]
+
+    def to_rgba(self):
+        """Returns the colors as uint32 array of 32-bit RGBA values."""
+        data = self.data.astype(numpy.uint32)
+        return (data[:, 0] << 24) | (data[:, 1] << 16) | (data[:, 2] << 8) | \
+            data[:, 3]
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None:
+            return self.data
+        return self.data.astype(dtype)
+
+    def __repr__(self):
+        return "ColorArray(%s)" % self.data.tolist()
+
+    def __len__(self):
+        return len(self.data)
+
+    def __iter__(self):
+        for r, g, b, a in self.data.tolist():
+            color = Color.__new__(Color)
+            color._r = r
+            color._g = g
+            color._b = b
+            color._a = a
+            yield color
+
+    def __getitem__(self, index):
+        """Returns the Color at the specified index or a ColorArray view
+        for a slice or an index array.
+        """
+        if type(index) in (int, long):
+            r, g, b, a = self.data[index].tolist()
+            color = Color.__new__(Color)
+            color._r = r
+            color._g = g
+            color._b = b
+            color._a = a
+            return color
+        return ColorArray._wrap(self.data[index])
+
+    def __setitem__(self, index, value):
+        """Sets the color(s) at the specified index to the passed value."""
+        self.data[index] = _color_values(value)
+
+    def __eq__(self, colors):
+        return numpy.array_equal(self.data, _color_values(colors))
+
+    def __ne__(self, colors):
+        return not self.__eq__(colors)
+
+    def __invert__(self):
+        return ColorArray._wrap(255 - self.data)
+
+    def __mod__(self, colors):
+        values = _color_values(colors)
+        if numpy.any(values == 0):
+            raise ZeroDivisionError("modulo by zero")
+        return ColorArray._wrap(self.data % values)
+
+    def __truediv__(self, colors):
+        values = _color_values(colors)
+        # Colors divided by 0 become 0, like Color does.
+        result = self.data // numpy.maximum(values, 1)
+        return ColorArray._wrap(numpy.where(values == 0, 0, result).astype(
+            numpy.uint8))
+
+    __div__ = __truediv__
+
+    def __mul__(self, colors):
+        values = _color_values(colors).astype(numpy.uint16)
+        return ColorArray._wrap(numpy.minimum(self.data * values, 255).astype(
+            numpy.uint8))
+
+    def __sub__(self, colors):
+        values = _color_values(colors).astype(numpy.int16)
+        return ColorArray._wrap(numpy.maximum(self.data - values, 0).astype(
+            numpy.uint8))
+
+    def __add__(self, colors):
+        values = _color_values(colors).astype(numpy.uint16)
+        return ColorArray._wrap(numpy.minimum(self.data + values, 255).astype(
+            numpy.uint8))
+
+    @property
+    def r(self):
+        """Gets or sets the red values of the colors."""
+        return self.data[:, 0]
+
+    @r.setter
+    def r(self, val):
+        """Gets or sets the red values of the colors."""
+        self.data[:, 0] = _channel_values(val)
+
+    @property
+    def g(self):
+        """Gets or sets the green values of the colors."""
+        return self.data[:, 1]
+
+    @g.setter
+    def g(self, val):
+        """Gets or sets the green values of the colors."""
+        self.data[:, 1] = _channel_values(val)
+
+    @property
+    def b(self):
+        """Gets or sets the blue values of the colors."""
+        return self.data[:, 2]
+
+    @b.setter
+    def b(self, val):
+        """Gets or sets the blue values of the colors."""
+        self.data[:, 2] = _channel_values(val)
+
+    @property
+    def a(self):
+        """Gets or sets the alpha values of the colors."""
+        return self.data[:, 3]
+
+    @a.setter
+    def a(self, val):
+        """Gets or sets the alpha values of the colors."""
+        self.data[:, 3] = _channel_values(val)
+
+    @property
+    def hsva(self):
+        """The colors as (N, 4) array of HSVA values."""
+        rn, gn, bn, an = self.normalize().T
+        maxv = numpy.maximum(numpy.maximum(rn, gn), bn)
+        minv = numpy.minimum(numpy.minimum(rn, gn), bn)
+        diff = maxv - minv
+        s = 100.0 * diff / numpy.where(maxv == 0, 1, maxv)
+        h = _hue(rn, gn, bn, maxv, diff)
+        return numpy.column_stack((h, s, maxv * 100.0, an * 100.0))
+
+    @hsva.setter
+    def hsva(self, value):
+        """The colors as (N, 4) array of HSVA values."""
+        h, s, v, a = _check_values(value, 4, "HSVA")
+        if numpy.any((s < 0) | (s > 100) | (v < 0) | (v > 100) | (a < 0) |
+                     (a > 100) | (h < 0) | (h > 360)):
+            raise ValueError("invalid HSVA value")
+        s = s / 100.0
+        v = v / 100.0
+        hi = numpy.floor(h / 60.0).astype(int)
+        if numpy.any(hi > 5):
+            raise OverflowError("invalid HSVA value")
+        f = (h / 60.0) - hi
+        p = v * (1 - s)
+        q = v * (1 - s * f)
+        t = v * (1 - s * (1 - f))
+        data = numpy.empty((len(h), 4), dtype=numpy.uint8)
+        data[:, 0] = numpy.choose(hi, (v, q, p, p, t, v)) * 255
+        data[:, 1] = numpy.choose(hi, (t, v, v, q, p, p)) * 255
+        data[:, 2] = numpy.choose(hi, (p, p, t, v, v, q)) * 255
+        data[:, 3] = (a / 100.0) * 255
+        self.data[:] = data
+
+    @property
+    def hsla(self):
+        """The colors as (N, 4) array of HSLA values."""
+        rn, gn, bn, an = self.normalize().T
+        maxv = numpy.maximum(numpy.maximum(rn, gn), bn)
+        minv = numpy.minimum(numpy.minimum(rn, gn), bn)
+        diff = maxv - minv
+        l = 50.0 * (maxv + minv)
+        divisor = numpy.where(l <= 50.0, maxv + minv, 2.0 - maxv - minv)
+        s = numpy.where(diff == 0, 0.0,
+                        diff / numpy.where(divisor == 0, 1, divisor) * 100.0)
+        h = _hue(rn, gn, bn, maxv, diff)
+        return numpy.column_stack((h, s, l, an * 100.0))
+
+    @hsla.setter
+    def hsla(self, value):
+        """The colors as (N, 4) array of HSLA values."""
+        h, s, l, a = _check_values(value, 4, "HSLA")
+        if numpy.any((s < 0) | (s > 100) | (l < 0) | (l > 100) | (a < 0) |
+                     (a > 100) | (h < 0) | (h > 360)):
+            raise ValueError("invalid HSLA value")
+        s = s / 100.0
+        l = l / 100.0
+        q = numpy.where(l < 0.5, l * (1 + s), l + s - (l * s))
+        p = 2 * l - q
+        ht = h / 360.0
+        data = numpy.empty((len(h), 4), dtype=numpy.uint8)
+        for index, shift in enumerate((1.0 / 3.0, 0, -1.0 / 3.0)):
+            channel = _hue_channel(p, q, ht + shift)
+            data[:, index] = numpy.where(s == 0, l, channel) * 255
+        data[:, 3] = (a / 100.0) * 255
+        self.data[:] = data
+
+    @property
+    def i1i2i3(self):
+        """The colors as (N, 3) array of I1I2I3 values."""
+        rn, gn, bn, _ = self.normalize().T
+        return numpy.column_stack(((rn + gn + bn) / 3.0, (rn - bn) / 2.0,
+                                   (2 * gn - rn - bn) / 4.0))
+
+    @i1i2i3.setter
+    def i1i2i3(self, value):
+        """The colors as (N, 3) array of I1I2I3 values."""
+        i1, i2, i3 = _check_values(value, 3, "I1I2I3")
+        if numpy.any((i1 < 0) | (i1 > 1) | (i2 < -0.5) | (i2 > 0.5) |
+                     (i3 < -0.5) | (i3 > 0.5)):
+            raise ValueError("invalid I1I2I3 value")
+        ab = i1 - i2 - 2 * i3 / 3.0
+        ar = 2 * i2 + ab
+        ag = 3 * i1 - ar - ab
+        rgb = numpy.trunc(numpy.column_stack((ar, ag, ab)) * 255)
+        if numpy.any((rgb < 0) | (rgb > 255)):
+            raise ValueError("invalid I1I2I3 value")
+        self.data[:, :3] = rgb
+
+    @property
+    def cmy(self):
+        """The colors as (N, 3) array of CMY values."""
+        return 1.0 - self.data[:, :3] / 255.0
+
+    @cmy.setter
+    def cmy(self, value):
+        """The colors as (N, 3) array of CMY values."""
+        cmy = numpy.column_stack(_check_values(value, 3, "CMY"))
+        if numpy.any((cmy < 0) | (cmy > 1)):
+            raise ValueError("invalid CMY value")
+        self.data[:, :3] = (1.0 - cmy) * 255
+
+    def normalize(self):
+        """Returns the RGBA values in a normalized form with the range
+        [0;1] as (N, 4) float array.
+        """
+        return self.data / 255.0
+
+
+def _rgba_array(values):
+    """Converts an array of RGB(A) values to a (N, 4) uint8 array."""
+    values = numpy.asarray(values)
+    if values.ndim != 2 or values.shape[1] not in (3, 4):
+        raise ValueError("colors must be an array of RGB(A) values")
+    if numpy.any((values < 0) | (values > 255)):
+        raise ValueError("color values must be in the range [0; 255]")
+    data = numpy.full((len(values), 4), 255, dtype=numpy.uint8)
+    data[:, :values.shape[1]] = values
+    return data
+
+
+def _color_values(colors):
+    """Gets the RGBA values of a Color-compatible value or a ColorArray as
+    uint8 array, which can be broadcast against ColorArray.data.
+    """
+    if isinstance(colors, ColorArray):
+        return colors.data
+    if isinstance(colors, numpy.ndarray) and colors.ndim == 2:
+        return _rgba_array(colors)
+    return numpy.array(tuple(convert_to_color(colors)), dtype=numpy.uint8)
+
+
+def _channel_values(values):
+    """Checks the passed values for a color channel."""
+    values = numpy.asarray(values)
+    if values.dtype.kind not in "iu":
+        raise TypeError("values must be integers")
+    if numpy.any((values < 0) | (values > 255)):
+        raise ValueError("The values must be in the range [0; 255]")
+    return values
+
+
+def _check_values(value, count, name):
+    """Gets the columns of an (N, count) array of color model values."""
+    value = numpy.asarray(value, dtype=numpy.float64)
+    if value.ndim != 2 or value.shape[1] != count:
+        raise TypeError("%s values must be an (N, %d) array" % (name, count))
+    return value.T
+
+
 def is_rgb_color(v):
     """Checks, if the passed value is an item that could be converted to
     a RGB color.
@@ -469,13 +871,7 @@ def argb_to_color(v):
     """Converts an integer value to a Color, assuming the integer
     represents a 32-bit ARGB value.
     """
-    v = long(v)
-
-    a = ((v & 0xFF000000) >> 24)
-    r = ((v & 0x00FF0000) >> 16)
-    g = ((v & 0x0000FF00) >> 8)
-    b = ((v & 0x000000FF))
-    return Color(r, g, b, a)
+    return Color.from_argb(long(v))
 
 
 ARGB = argb_to_color
@@ -485,18 +881,135 @@ def rgba_to_color(v):
     """Converts an integer value to a Color, assuming the integer
     represents a 32-bit RGBBA value.
     """
-    v = long(v)
-
-    r = ((v & 0xFF000000) >> 24)
-    g = ((v & 0x00FF0000) >> 16)
-    b = ((v & 0x0000FF00) >> 8)
-    a = ((v & 0x000000FF))
-    return Color(r, g, b, a)
+    return Color.from_rgba(long(v))
 
 
 RGBA = rgba_to_color
 
 
+# CSS color names and their ARGB values, see string_to_color().
+_CSSCOLORS = {
+    "aliceblue": 0xFFF0F8FF, "antiquewhite": 0xFFFAEBD7, "aqua": 0xFF00FFFF,
+    "aquamarine": 0xFF7FFFD4, "azure": 0xFFF0FFFF, "beige": 0xFFF5F5DC,
+    "bisque": 0xFFFFE4C4, "black": 0xFF000000, "blanchedalmond": 0xFFFFEBCD,
+    "blue": 0xFF0000FF, "blueviolet": 0xFF8A2BE2, "brown": 0xFFA52A2A,
+    "burlywood": 0xFFDEB887, "cadetblue": 0xFF5F9EA0, "chartreuse": 0xFF7FFF00,
+    "chocolate": 0xFFD2691E, "coral": 0xFFFF7F50, "cornflowerblue": 0xFF6495ED,
+    "cornsilk": 0xFFFFF8DC, "crimson": 0xFFDC143C, "cyan": 0xFF00FFFF,
+    "darkblue": 0xFF00008B, "darkcyan": 0xFF008B8B,
+    "darkgoldenrod": 0xFFB8860B, "darkgray": 0xFFA9A9A9,
+    "darkgreen": 0xFF006400, "darkgrey": 0xFFA9A9A9, "darkkhaki": 0xFFBDB76B,
+    "darkmagenta": 0xFF8B008B, "darkolivegreen": 0xFF556B2F,
+    "darkorange": 0xFFFF8C00, "darkorchid": 0xFF9932CC, "darkred": 0xFF8B0000,
+    "darksalmon": 0xFFE9967A, "darkseagreen": 0xFF8FBC8F,
+    "darkslateblue": 0xFF483D8B, "darkslategray": 0xFF2F4F4F,
+    "darkslategrey": 0xFF2F4F4F, "darkturquoise": 0xFF00CED1,
+    "darkviolet": 0xFF9400D3, "deeppink": 0xFFFF1493,
+    "deepskyblue": 0xFF00BFFF, "dimgray": 0xFF696969, "dimgrey": 0xFF696969,
+    "dodgerblue": 0xFF1E90FF, "firebrick": 0xFFB22222,
+    "floralwhite": 0xFFFFFAF0, "forestgreen": 0xFF228B22,
+    "fuchsia": 0xFFFF00FF, "gainsboro": 0xFFDCDCDC, "ghostwhite": 0xFFF8F8FF,
+    "gold": 0xFFFFD700, "goldenrod": 0xFFDAA520, "gray": 0xFF808080,
+    "green": 0xFF008000, "greenyellow": 0xFFADFF2F, "grey": 0xFF808080,
+    "honeydew": 0xFFF0FFF0, "hotpink": 0xFFFF69B4, "indianred": 0xFFCD5C5C,
+    "indigo": 0xFF4B0082, "ivory": 0xFFFFFFF0, "khaki": 0xFFF0E68C,
+    "lavender": 0xFFE6E6FA, "lavenderblush": 0xFFFFF0F5,
+    "lawngreen": 0xFF7CFC00, "lemonchiffon": 0xFFFFFACD,
+    "lightblue": 0xFFADD8E6, "lightcoral": 0xFFF08080, "lightcyan": 0xFFE0FFFF,
+    "lightgoldenrodyellow": 0xFFFAFAD2, "lightgray": 0xFFD3D3D3,
+    "lightgreen": 0xFF90EE90, "lightgrey": 0xFFD3D3D3, "lightpink": 0xFFFFB6C1,
+    "lightsalmon": 0xFFFFA07A, "lightseagreen": 0xFF20B2AA,
+    "lightskyblue": 0xFF87CEFA, "lightslategray": 0xFF778899,
+    "lightslategrey": 0xFF778899, "lightsteelblue": 0xFFB0C4DE,
+    "lightyellow": 0xFFFFFFE0, "lime": 0xFF00FF00, "limegreen": 0xFF32CD32,
+    "linen": 0xFFFAF0E6, "magenta": 0xFFFF00FF, "maroon": 0xFF800000,
+    "mediumaquamarine": 0xFF66CDAA, "mediumblue": 0xFF0000CD,
+    "mediumorchid": 0xFFBA55D3, "mediumpurple": 0xFF9370DB,
+    "mediumseagreen": 0xFF3CB371, "mediumslateblue": 0xFF7B68EE,
+    "mediumspringgreen": 0xFF00FA9A, "mediumturquoise": 0xFF48D1CC,
+    "mediumvioletred": 0xFFC71585, "midnightblue": 0xFF191970,
+    "mintcream": 0xFFF5FFFA, "mistyrose": 0xFFFFE4E1, "moccasin": 0xFFFFE4B5,
+    "navajowhite": 0xFFFFDEAD, "navy": 0xFF000080, "oldlace": 0xFFFDF5E6,
+    "olive": 0xFF808000, "olivedrab": 0xFF6B8E23, "orange": 0xFFFFA500,
+    "orangered": 0xFFFF4500, "orchid": 0xFFDA70D6, "palegoldenrod": 0xFFEEE8AA,
+    "palegreen": 0xFF98FB98, "paleturquoise": 0xFFAFEEEE,
+    "palevioletred": 0xFFDB7093, "papayawhip": 0xFFFFEFD5,
+    "peachpuff": 0xFFFFDAB9, "peru": 0xFFCD853F, "pink": 0xFFFFC0CB,
+    "plum": 0xFFDDA0DD, "powderblue": 0xFFB0E0E6, "purple": 0xFF800080,
+    "rebeccapurple": 0xFF663399, "red": 0xFFFF0000, "rosybrown": 0xFFBC8F8F,
+    "royalblue": 0xFF4169E1, "saddlebrown": 0xFF8B4513, "salmon": 0xFFFA8072,
+    "sandybrown": 0xFFF4A460, "seagreen": 0xFF2E8B57, "seashell": 0xFFFFF5EE,
+    "sienna": 0xFFA0522D, "silver": 0xFFC0C0C0, "skyblue": 0xFF87CEEB,
+    "slateblue": 0xFF6A5ACD, "slategray": 0xFF708090, "slategrey": 0xFF708090,
+    "snow": 0xFFFFFAFA, "springgreen": 0xFF00FF7F, "steelblue": 0xFF4682B4,
+    "tan": 0xFFD2B48C, "teal": 0xFF008080, "thistle": 0xFFD8BFD8,
+    "tomato": 0xFFFF6347, "turquoise": 0xFF40E0D0, "violet": 0xFFEE82EE,
+    "wheat": 0xFFF5DEB3, "white": 0xFFFFFFFF, "whitesmoke": 0xFFF5F5F5,
+    "yellow": 0xFFFFFF00, "yellowgreen": 0xFF9ACD32, "transparent": 0x00000000
+    }
+
+_HEXDIGITS = frozenset("0123456789abcdefABCDEF")
+
+# Colors converted from immutable values, see convert_to_color().
+_colorcache = {}
+_COLORCACHE_SIZE = 4096
+_CACHEKEYS = (str, int, long, tuple)
+
+
+def _cached_color(v, convert):
+    """Converts the passed value to a Color via convert() using the color
+    cache.
+
+    The cache keeps its own copies of the colors, so that changes on the
+    returned Color do not affect subsequent conversions.
+    """
+    try:
+        color = _colorcache.get(v)
+    except TypeError:
+        # A tuple containing unhashable values.
+        return convert(v)
+    if color is None:
+        color = convert(v)
+        if len(_colorcache) >= _COLORCACHE_SIZE:
+            _colorcache.clear()
+        _colorcache[v] = color.__copy__()
+        return color
+    return color.__copy__()
+
+
+def _parse_color_string(s):
+    """Converts a hex color string or color name to a Color value."""
+    value = _CSSCOLORS.get(s.lower())
+    if value is not None:
+        return Color.from_argb(value)
+
+    if not(s.startswith("#") or s.startswith("0x")):
+        raise ValueError("value is not Color-compatible")
+
+    if s.startswith("#"):
+        s = s[1:]
+    else:
+        s = s[2:]
+
+    if not _HEXDIGITS.issuperset(s):
+        raise ValueError("value is not Color-compatible")
+    v = int(s, 16) if s else 0
+    if len(s) == 3:
+        # A triple/quadruple in the form #ead == #eeaadd
+        v = (v >> 8 & 0xF) << 28 | (v >> 4 & 0xF) << 20 | (v & 0xF) << 12 | \
+            0xFF
+        v |= v >> 4 & 0x0F0F0F00
+    elif len(s) == 4:
+        v = (v >> 12 & 0xF) << 28 | (v >> 8 & 0xF) << 20 | \
+            (v >> 4 & 0xF) << 12 | (v & 0xF) << 4
+        v |= v >> 4
+    elif len(s) == 6:
+        v = v << 8 | 0xFF
+    elif len(s) != 8:
+        raise ValueError("value is not Color-compatible")
+    return Color.from_rgba(v)
+
+
 def string_to_color(s):
     """Converts a hex color string or color name to a Color value.
 
@@ -511,47 +1024,19 @@ def string_to_color(s):
     0xRGBA
     0xRRGGBB
     0xRRGGBBAA
+
+    Supported color names are the color keywords of CSS, e.g. "red" or
+    "cornflowerblue", which are not case-sensitive.
     """
     if type(s) is not str:
         raise TypeError("s must be a string")
+    return _cached_color(s, _parse_color_string)
 
-    if not(s.startswith("#") or s.startswith("0x")):
-        raise ValueError("value is not Color-compatible")
-
-    if s.startswith("#"):
-        s = s[1:]
-    else:
-        s = s[2:]
-
-    r, g, b, a = 255, 255, 255, 255
-    if len(s) in (3, 4):
-        # A triple/quadruple in the form #ead == #eeaadd
-        r = int(s[0], 16) << 4 | int(s[0], 16)
-        g = int(s[1], 16) << 4 | int(s[1], 16)
-        b = int(s[2], 16) << 4 | int(s[2], 16)
-        if len(s) == 4:
-            a = int(s[3], 16) << 4 | int(s[3], 16)
-    elif len(s) in (6, 8):
-        r = int(s[0], 16) << 4 | int(s[1], 16)
-        g = int(s[2], 16) << 4 | int(s[3], 16)
-        b = int(s[4], 16) << 4 | int(s[5], 16)
-        if len(s) == 8:
-            a = int(s[6], 16) << 4 | int(s[7], 16)
-    else:
-        raise ValueError("value is not Color-compatible")
-    return Color(r, g, b, a)
-
-
-def convert_to_color(v):
-    """Tries to convert the passed value to a Color object.
-
-    If the color is an integer value, it is assumed to be in ARGB layout.
-    """
-    if isinstance(v, Color):
-        return v
 
+def _convert_to_color(v):
+    """Converts the passed value to a new Color object."""
     if type(v) is str:
-        return string_to_color(v)
+        return _parse_color_string(v)
     if type(v) in (int, long):
         return argb_to_color(v)
 
@@ -586,4 +1071,19 @@ def convert_to_color(v):
     raise ValueError("value is not Color-compatible")
 
 
+def convert_to_color(v):
+    """Tries to convert the passed value to a Color object.
+
+    If the color is an integer value, it is assumed to be in ARGB layout.
+
+    The conversions of strings, integers and tuples are cached, so that
+    converting the same value repeatedly does not need to parse it again.
+    """
+    if isinstance(v, Color):
+        return v
+    if type(v) in _CACHEKEYS:
+        return _cached_color(v, _convert_to_color)
+    return _convert_to_color(v)
+
+
 COLOR = convert_to_color
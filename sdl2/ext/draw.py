@@ -1,13 +1,21 @@
 """Drawing routines for software surfaces."""
 import ctypes
-from .compat import isiterable, UnsupportedError
+from .compat import *
 from .array import to_ctypes
 from .color import convert_to_color
-from .. import surface, pixels, rect
+from .. import surface, pixels, rect, endian
+from ..surface import SDL_MUSTLOCK, SDL_LockSurface, SDL_UnlockSurface
 from .algorithms import clipline
 from .sprite import SoftwareSprite
 
-__all__ = ["prepare_color", "fill", "line"]
+_HASNUMPY = True
+try:
+    import numpy
+except ImportError:
+    _HASNUMPY = False
+
+__all__ = ["prepare_color", "map_colors", "fill", "line", "circle", "ellipse",
+           "arc", "polygon"]
 
 
 def _get_target_surface(target):
@@ -21,23 +29,121 @@ def _get_target_surface(target):
     return rtarget
 
 
-def prepare_color(color, target):
-    """Prepares the passed color for the passed target."""
-    color = convert_to_color(color)
-    pformat = None
-    # Software surfaces
+# Mapped color values of each pixel format, see prepare_color().
+_colorcache = {}
+_COLORCACHE_SIZE = 4096
+_FORMATCACHE_SIZE = 64
+_RAWKEYS = (int, long, str, tuple)
+
+
+def _get_pixel_format(target):
+    """Gets the SDL_PixelFormat from the passed target."""
     if isinstance(target, pixels.SDL_PixelFormat):
-        pformat = target
+        return target
     elif isinstance(target, surface.SDL_Surface):
-        pformat = target.format.contents
+        return target.format.contents
     elif isinstance(target, SoftwareSprite):
-        pformat = target.surface.format.contents
-    if pformat is None:
-        raise TypeError("unsupported target type")
-    if pformat.Amask != 0:
-        # Target has an alpha mask
-        return pixels.SDL_MapRGBA(pformat, color.r, color.g, color.b, color.a)
-    return pixels.SDL_MapRGB(pformat, color.r, color.g, color.b)
+        return target.surface.format.contents
+    raise TypeError("unsupported target type")
+
+
+def _format_key(pformat):
+    """Gets a key identifying the color mapping of the SDL_PixelFormat or
+    None, if the mapping cannot be cached.
+    """
+    if pformat.palette:
+        # Palettes can be freed and their memory be reused for other
+        # palettes, so there is no reliable key for them.
+        return None
+    if pformat.format != pixels.SDL_PIXELFORMAT_UNKNOWN:
+        return pformat.format
+    return (pformat.BitsPerPixel, pformat.Rmask, pformat.Gmask,
+            pformat.Bmask, pformat.Amask)
+
+
+def prepare_color(color, target):
+    """Prepares the passed color for the passed target.
+
+    The mapped color values are cached for each pixel format without a
+    palette, so that SDL is only asked for colors, which were not
+    prepared before.
+    """
+    pformat = _get_pixel_format(target)
+    key = _format_key(pformat)
+    if key is None:
+        cache = {}
+    else:
+        cache = _colorcache.get(key)
+        if cache is None:
+            if len(_colorcache) >= _FORMATCACHE_SIZE:
+                _colorcache.clear()
+            cache = _colorcache[key] = {}
+    # Immutable color values can be looked up without converting them.
+    rawkey = color if type(color) in _RAWKEYS else None
+    try:
+        value = cache.get(rawkey)
+    except TypeError:
+        # Unhashable tuple items are reported by convert_to_color().
+        value = rawkey = None
+    if value is not None:
+        return value
+    color = convert_to_color(color)
+    r, g, b, a = color.r, color.g, color.b, color.a
+    value = cache.get((r, g, b, a))
+    if value is None:
+        if pformat.Amask != 0:
+            # Target has an alpha mask
+            value = pixels.SDL_MapRGBA(pformat, r, g, b, a)
+        else:
+            value = pixels.SDL_MapRGB(pformat, r, g, b)
+        if len(cache) >= _COLORCACHE_SIZE:
+            cache.clear()
+        cache[(r, g, b, a)] = value
+    if rawkey is not None:
+        cache[rawkey] = value
+    return value
+
+
+def map_colors(target, colors):
+    """Maps an array of RGBA values to pixel values for the passed target
+    at once.
+
+    colors must be an array-like object of shape (..., 4), holding the
+    red, green, blue and alpha value of each color. The result is a
+    numpy uint32 array of shape (...) with the same values
+    SDL_MapRGBA() would return for each color.
+    """
+    if not _HASNUMPY:
+        raise UnsupportedError(map_colors, "numpy module could not be loaded")
+    pformat = _get_pixel_format(target)
+    colors = numpy.asarray(colors, dtype=numpy.uint8)
+    if colors.ndim < 1 or colors.shape[-1] != 4:
+        raise ValueError("colors must be an array of RGBA values")
+    shape = colors.shape[:-1]
+    colors = colors.reshape(-1, 4)
+    if pformat.palette:
+        # Find the closest palette entry for each color, like SDL does.
+        palette = pformat.palette.contents
+        entries = ctypes.string_at(palette.colors, palette.ncolors * 4)
+        entries = numpy.frombuffer(entries, numpy.uint8).reshape(-1, 4)
+        entries = entries.astype(numpy.int32)
+        result = numpy.empty(len(colors), dtype=numpy.uint32)
+        step = max(65536 // max(len(entries), 1), 1)
+        for start in range(0, len(colors), step):
+            chunk = colors[start:start + step, numpy.newaxis].astype(
+                numpy.int32)
+            dist = ((chunk - entries) ** 2).sum(axis=2)
+            result[start:start + step] = dist.argmin(axis=1)
+        return result.reshape(shape)
+    colors = colors.astype(numpy.uint32)
+    result = numpy.zeros(len(colors), dtype=numpy.uint32)
+    for idx, (shift, loss) in enumerate(((pformat.Rshift, pformat.Rloss),
+                                         (pformat.Gshift, pformat.Gloss),
+                                         (pformat.Bshift, pformat.Bloss))):
+        result |= (colors[:, idx] >> loss) << shift
+    result |= ((colors[:, 3] >> pformat.Aloss) << pformat.Ashift) & \
+        numpy.uint32(pformat.Amask)
+    return result.reshape(shape)
 
 
 def fill(target, color, area=None):
@@ -76,12 +182,215 @@ def fill(target, color, area=None):
         surface.SDL_FillRects(rtarget, varea, count, color)
 
 
+def _clip_segments(segs, left, top, right, bottom):
+    """Clips the passed (N, 4) segment array to the passed area using the
+    Liang-Barsky algorithm.
+
+    Returns the clipped segments as float array and a boolean mask
+    denoting the segments, which are (partially) within the area.
+    """
+    x1, y1, x2, y2 = segs.T
+    dx = x2 - x1
+    dy = y2 - y1
+    t0 = numpy.zeros(len(segs))
+    t1 = numpy.ones(len(segs))
+    visible = numpy.ones(len(segs), dtype=bool)
+    for p, q in ((-dx, x1 - left), (dx, right - x1),
+                 (-dy, y1 - top), (dy, bottom - y1)):
+        parallel = p == 0
+        visible &= ~(parallel & (q < 0))
+        with numpy.errstate(divide="ignore", invalid="ignore"):
+            r = numpy.where(parallel, 0, q / numpy.where(parallel, 1, p))
+        t0 = numpy.where(~parallel & (p < 0), numpy.maximum(t0, r), t0)
+        t1 = numpy.where(~parallel & (p > 0), numpy.minimum(t1, r), t1)
+    visible &= t0 <= t1
+    clipped = numpy.column_stack((x1 + t0 * dx, y1 + t0 * dy,
+                                  x1 + t1 * dx, y1 + t1 * dy))
+    return clipped, visible
+
+
+def _run_index(counts):
+    """Gets the index of each element within its run for the passed run
+    lengths, e.g. (0, 1, 2, 0, 1) for the run lengths (3, 2).
+    """
+    total = int(counts.sum())
+    starts = numpy.cumsum(counts) - counts
+    return numpy.arange(total, dtype=counts.dtype) - \
+        numpy.repeat(starts, counts)
+
+
+def _rect_pixels(rx, ry, rw, rh):
+    """Gets the x and y coordinates of all pixels within the passed
+    rectangle arrays.
+    """
+    counts = rw * rh
+    idx = _run_index(counts)
+    rw = numpy.repeat(rw, counts)
+    return (numpy.repeat(rx, counts) + idx % rw,
+            numpy.repeat(ry, counts) + idx // rw)
+
+
+def _round_minor(step, dminor, major, counts):
+    """Gets the minor axis offsets of the pixels at the passed steps along
+    the major axis, rounding halves up.
+    """
+    return numpy.floor(step * numpy.repeat(dminor, counts) /
+                       numpy.repeat(major, counts).astype(numpy.float64) +
+                       0.5)
+
+
+def _line_pixels(segs, width):
+    """Gets the x and y coordinates of all pixels of the passed non
+    axis-aligned (N, 4) segment array.
+
+    The pixels are calculated along the major axis of each segment,
+    rounding to the nearest pixel on the minor axis with halves being
+    rounded up, like Bresenham's algorithm does. Lines with a width
+    greater than 1 are widened along the minor axis, so that their
+    perpendicular thickness matches the width.
+    """
+    x1, y1, x2, y2 = segs.T
+    dx = x2 - x1
+    dy = y2 - y1
+    xmajor = numpy.abs(dx) >= numpy.abs(dy)
+    major = numpy.maximum(numpy.where(xmajor, numpy.abs(dx), numpy.abs(dy)),
+                          1)
+    dmajor = numpy.where(xmajor, dx, dy)
+    dminor = numpy.where(xmajor, dy, dx)
+    counts = major + 1
+    if width > 1:
+        # Each pixel on the major axis becomes a run of pixels on the
+        # minor axis.
+        thick = numpy.floor(width * numpy.hypot(dx, dy) / major + 0.5)
+        thick = numpy.maximum(thick, 1).astype(segs.dtype)
+        step = _run_index(counts)
+        pminor = _round_minor(step, dminor, major, counts)
+        pthick = numpy.repeat(thick, counts)
+        step = numpy.repeat(step, pthick)
+        pminor = numpy.repeat(pminor.astype(segs.dtype), pthick) + \
+            _run_index(pthick) - numpy.repeat(pthick // 2, pthick)
+        counts = counts * thick
+    else:
+        step = _run_index(counts)
+        pminor = _round_minor(step, dminor, major, counts)
+        pminor = pminor.astype(segs.dtype)
+    pmajor = step * numpy.repeat(numpy.sign(dmajor), counts)
+    rxmajor = numpy.repeat(xmajor, counts)
+    xs = numpy.where(rxmajor, pmajor, pminor)
+    xs += numpy.repeat(x1, counts)
+    ys = numpy.where(rxmajor, pminor, pmajor)
+    ys += numpy.repeat(y1, counts)
+    return xs, ys
+
+
+def _pixel_buffer(rtarget):
+    """Gets the pixels of the SDL_Surface as flat numpy byte array."""
+    pitch = rtarget.pitch
+    pxbuf = ctypes.cast(rtarget.pixels,
+                        ctypes.POINTER(ctypes.c_ubyte * (pitch * rtarget.h)))
+    return numpy.frombuffer(pxbuf.contents, numpy.uint8)
+
+
+def _get_pixels(rtarget, xs, ys):
+    """Gets the mapped colors of the pixels at the passed coordinates of
+    the SDL_Surface.
+    """
+    bpp = rtarget.format.contents.BytesPerPixel
+    pitch = rtarget.pitch
+    pxbuf = _pixel_buffer(rtarget)
+    if bpp == 3:
+        offsets = ys * pitch + xs * 3
+        b0, b1, b2 = (pxbuf[offsets + idx].astype(numpy.uint32)
+                      for idx in range(3))
+        if endian.SDL_BYTEORDER == endian.SDL_LIL_ENDIAN:
+            return b0 | (b1 << 8) | (b2 << 16)
+        return (b0 << 16) | (b1 << 8) | b2
+    dtype = {1: numpy.uint8, 2: numpy.uint16, 4: numpy.uint32}[bpp]
+    return pxbuf.view(dtype)[ys * (pitch // bpp) + xs].astype(numpy.uint32)
+
+
+def _put_pixels(rtarget, color, xs, ys):
+    """Sets the pixels at the passed coordinates of the SDL_Surface to
+    the passed mapped color or array of mapped colors.
+    """
+    if len(xs) == 0:
+        return
+    bpp = rtarget.format.contents.BytesPerPixel
+    pitch = rtarget.pitch
+    pxbuf = _pixel_buffer(rtarget)
+    if bpp == 3:
+        offsets = ys * pitch + xs * 3
+        if endian.SDL_BYTEORDER == endian.SDL_LIL_ENDIAN:
+            values = (color & 0xFF, (color >> 8) & 0xFF, color >> 16)
+        else:
+            values = (color >> 16, (color >> 8) & 0xFF, color & 0xFF)
+        for idx, value in enumerate(values):
+            pxbuf[offsets + idx] = value
+    else:
+        dtype = {1: numpy.uint8, 2: numpy.uint16, 4: numpy.uint32}[bpp]
+        pxbuf.view(dtype)[ys * (pitch // bpp) + xs] = color
+
+
+def _line_numpy(rtarget, color, dline, width):
+    """Draws the lines of the passed sequence on the SDL_Surface using
+    numpy.
+    """
+    segs = numpy.asarray(dline, dtype=numpy.int32).reshape(-1, 4)
+    clip_rect = rtarget.clip_rect
+    left, right = clip_rect.x, clip_rect.x + clip_rect.w - 1
+    top, bottom = clip_rect.y, clip_rect.y + clip_rect.h - 1
+
+    x1, y1, x2, y2 = segs.T
+    half = width // 2
+    vertical = x1 == x2
+    diagonal = ~vertical & (y1 != y2)
+    aligned = ~diagonal
+
+    if SDL_MUSTLOCK(rtarget):
+        SDL_LockSurface(rtarget)
+    try:
+        # Horizontal and vertical lines are drawn as rectangles of the
+        # line width.
+        x1, y1, x2, y2 = segs[aligned].T
+        vertical = vertical[aligned]
+        rx = numpy.where(vertical, x1 - half, numpy.minimum(x1, x2))
+        ry = numpy.where(vertical, numpy.minimum(y1, y2), y1 - half)
+        rw = numpy.where(vertical, width, numpy.abs(x2 - x1))
+        rh = numpy.where(vertical, numpy.abs(y2 - y1), width)
+        cx1 = numpy.maximum(rx, left)
+        cy1 = numpy.maximum(ry, top)
+        cw = numpy.maximum(numpy.minimum(rx + rw, right + 1) - cx1, 0)
+        ch = numpy.maximum(numpy.minimum(ry + rh, bottom + 1) - cy1, 0)
+        xs, ys = _rect_pixels(cx1, cy1, cw, ch)
+        _put_pixels(rtarget, color, xs, ys)
+
+        segs = segs[diagonal]
+        if len(segs) == 0:
+            return
+        # Leave enough room for rounding and widened lines at the
+        # borders and discard all pixels outside of the clipping area.
+        clipped, visible = _clip_segments(segs, left - width, top - width,
+                                          right + width, bottom + width)
+        segs = numpy.rint(clipped[visible]).astype(numpy.int32)
+        xs, ys = _line_pixels(segs, width)
+        inside = (xs >= left) & (xs <= right) & (ys >= top) & (ys <= bottom)
+        _put_pixels(rtarget, color, xs[inside], ys[inside])
+    finally:
+        if SDL_MUSTLOCK(rtarget):
+            SDL_UnlockSurface(rtarget)
+
+
 def line(target, color, dline, width=1):
     """Draws one or multiple lines on the passed target.
 
     dline can be a sequence of four integers for a single line in the
     form (x1, y1, x2, y2) or a sequence of a multiple of 4 for drawing
     multiple lines at once, e.g. (x1, y1, x2, y2, x3, y3, x4, y4, ...).
+
+    If numpy is available, all lines are rasterized at once and lines of
+    any width can be drawn on 8, 16, 24 and 32 bpp surfaces. Otherwise,
+    lines, which are not horizontal or vertical, are limited to a width
+    of 1 and 24 bpp surfaces are not supported.
     """
     if width < 1:
         raise ValueError("width must be greater than 0")
@@ -91,6 +400,9 @@ def line(target, color, dline, width=1):
     # line: (x1, y1, x2, y2) OR (x1, y1, x2, y2, ...)
     if (len(dline) % 4) != 0:
         raise ValueError("line does not contain a valid set of points")
+    if _HASNUMPY:
+        _line_numpy(rtarget, color, dline, width)
+        return
     pcount = len(dline)
     SDLRect = rect.SDL_Rect
     fillrect = surface.SDL_FillRect
@@ -116,13 +428,13 @@ def line(target, color, dline, width=1):
         if x1 == x2:
             # Vertical line
             yh = abs(y2 - y1)
-            varea = SDLRect(x1 - width // 2, y1, width, yh)
+            varea = SDLRect(x1 - width // 2, min(y1, y2), width, yh)
             fillrect(rtarget, varea, color)
             continue
         if y1 == y2:
             # Horizontal line
             xw = abs(x2 - x1)
-            varea = SDLRect(x1, y1 - width // 2, xw, width)
+            varea = SDLRect(min(x1, x2), y1 - width // 2, xw, width)
             fillrect(rtarget, varea, color)
             continue
         if width != 1:
@@ -153,3 +465,386 @@ def line(target, color, dline, width=1):
                 if e2 < dx:
                     err += dx
                     y1 += sy
+
+
+def _clip_area(rtarget):
+    """Gets the left, top, right and bottom pixel of the clipping area of
+    the SDL_Surface.
+    """
+    clip_rect = rtarget.clip_rect
+    return (clip_rect.x, clip_rect.y, clip_rect.x + clip_rect.w - 1,
+            clip_rect.y + clip_rect.h - 1)
+
+
+def _to_shapes(data, size, name):
+    """Converts the passed flat sequence of shape values into a (N, size)
+    float array.
+    """
+    shapes = numpy.asarray(data, dtype=numpy.float64)
+    if shapes.size % size != 0:
+        raise ValueError("%s does not contain a valid set of values" % name)
+    return shapes.reshape(-1, size)
+
+
+def _span_pixels(xa, xb, ys):
+    """Gets the x and y coordinates of all pixels within the passed
+    horizontal spans, which range from xa to xb (inclusive) on the rows
+    ys, along with the index of the span of each pixel.
+    """
+    xa = xa.astype(numpy.intp)
+    counts = numpy.maximum(xb.astype(numpy.intp) - xa + 1, 0)
+    span = numpy.repeat(numpy.arange(len(counts)), counts)
+    xs = numpy.repeat(xa, counts) + _run_index(counts)
+    return xs, numpy.repeat(ys.astype(numpy.intp), counts), span
+
+
+def _ellipse_distance(dx, dy, rx, ry):
+    """Approximates the signed distance of the passed points relative to
+    the center of an ellipse to its outline.
+
+    The distance is negative for points within the ellipse and exact for
+    circles.
+    """
+    q = numpy.sqrt((dx / rx) ** 2 + (dy / ry) ** 2)
+    grad = numpy.hypot(dx / rx ** 2, dy / ry ** 2)
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        dist = (q - 1) * q / grad
+    return numpy.where(grad > 0, dist, -numpy.minimum(rx, ry))
+
+
+def _ellipse_pixels(shapes, width, filled, antialias, area, arcs=None):
+    """Gets the x and y coordinates and the coverage of all pixels of the
+    passed (N, 4) ellipse array, consisting of the center and the
+    horizontal and vertical radius of each ellipse.
+
+    The ellipses are scanned row by row. Each row is split into the
+    spans close to the outline, whose coverage is calculated from the
+    distance to the outline, and the inner span, which is either skipped
+    or fully covered. If arcs is a (N, 2) array of start and end angles
+    in degrees, only the pixels within the angles are kept.
+    """
+    left, top, right, bottom = area
+    cx, cy, rx, ry = shapes.T
+    if filled:
+        opad, ipad = 1.0, 1.5
+    else:
+        opad = ipad = width * 0.5 + 1
+    ox, oy = rx + opad, ry + opad
+    y1 = numpy.maximum(numpy.ceil(cy - oy), top)
+    y2 = numpy.minimum(numpy.floor(cy + oy), bottom)
+    counts = numpy.maximum(y2 - y1 + 1, 0).astype(numpy.intp)
+    rows = numpy.repeat(numpy.arange(len(shapes)), counts)
+    ys = numpy.repeat(y1, counts) + _run_index(counts)
+    rcx = cx[rows]
+    dy = ys - cy[rows]
+    outer = ox[rows] * numpy.sqrt(numpy.maximum(1 - (dy / oy[rows]) ** 2, 0))
+    xa = numpy.maximum(numpy.ceil(rcx - outer), left)
+    xb = numpy.minimum(numpy.floor(rcx + outer), right)
+    ix, iy = rx[rows] - ipad, ry[rows] - ipad
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        inner = ix * numpy.sqrt(1 - (dy / iy) ** 2)
+    hole = (ix > 0) & (iy > 0) & (numpy.abs(dy) < iy)
+    # The inner span consists of all pixels strictly within the inner
+    # ellipse.
+    ia = numpy.where(hole, numpy.maximum(numpy.floor(rcx - inner) + 1, xa),
+                     xb + 1)
+    ib = numpy.where(hole, numpy.minimum(numpy.ceil(rcx + inner) - 1, xb),
+                     xb)
+    ia = numpy.minimum(ia, ib + 1)
+    xs, pys, span = _span_pixels(numpy.concatenate((xa, ib + 1)),
+                                 numpy.concatenate((ia - 1, xb)),
+                                 numpy.concatenate((ys, ys)))
+    shape = rows[span % max(len(ys), 1)]
+    dx = xs - cx[shape]
+    dy = pys - cy[shape]
+    dist = _ellipse_distance(dx, dy, rx[shape], ry[shape])
+    if filled:
+        coverage = 0.5 - dist
+    else:
+        coverage = width * 0.5 + 0.5 - numpy.abs(dist)
+    if antialias:
+        coverage = numpy.minimum(coverage, 1)
+    else:
+        coverage = (coverage >= 0.5).astype(numpy.float64)
+    if filled:
+        hxs, hys, span = _span_pixels(ia, ib, ys)
+        xs = numpy.concatenate((xs, hxs))
+        pys = numpy.concatenate((pys, hys))
+        if arcs is not None:
+            shape = numpy.concatenate((shape, rows[span]))
+        coverage = numpy.concatenate((coverage, numpy.ones(len(hxs))))
+    keep = coverage > 0
+    if arcs is not None:
+        start, end = arcs[shape].T
+        extent = numpy.where(end - start >= 360, 360, (end - start) % 360)
+        angle = numpy.degrees(numpy.arctan2(pys - cy[shape],
+                                            xs - cx[shape]))
+        keep &= (angle - start) % 360 <= extent
+    return xs[keep], pys[keep], coverage[keep]
+
+
+def _polygon_pixels(polygons, area):
+    """Gets the x and y coordinates of all pixels within the passed
+    polygons.
+
+    The polygons are filled using the even-odd rule, so that convex and
+    concave as well as self-intersecting polygons are supported. Like
+    rectangles, the polygons include the pixels on their top and left
+    edges, but not the ones on their bottom and right edges.
+    """
+    left, top, right, bottom = area
+    edges = []
+    for idx, points in enumerate(polygons):
+        edges.append(numpy.column_stack((points, numpy.roll(points, -1, 0),
+                                         numpy.full(len(points), idx))))
+    x1, y1, x2, y2, pid = numpy.concatenate(edges).T
+    # Each edge crosses the rows from its top up to, but not including
+    # its bottom, so that shared vertices are only counted once.
+    ytop = numpy.maximum(numpy.ceil(numpy.minimum(y1, y2)), top)
+    ybottom = numpy.minimum(numpy.ceil(numpy.maximum(y1, y2)) - 1, bottom)
+    counts = numpy.maximum(ybottom - ytop + 1, 0).astype(numpy.intp)
+    edge = numpy.repeat(numpy.arange(len(x1)), counts)
+    ys = numpy.repeat(ytop, counts) + _run_index(counts)
+    xs = x1[edge] + (ys - y1[edge]) * (x2[edge] - x1[edge]) / \
+        (y2[edge] - y1[edge])
+    order = numpy.lexsort((xs, ys, pid[edge]))
+    xs, ys = xs[order], ys[order]
+    xa = numpy.maximum(numpy.ceil(xs[0::2]), left)
+    xb = numpy.minimum(numpy.ceil(xs[1::2]) - 1, right)
+    xs, ys, span = _span_pixels(xa, xb, ys[0::2])
+    return xs, ys
+
+
+def _wu_pixels(segs):
+    """Gets the x and y coordinates and the coverage of all pixels of the
+    passed (N, 4) segment array using Xiaolin Wu's algorithm.
+
+    Each step along the major axis of a segment covers the two pixels
+    closest to the segment on the minor axis, weighted by their distance
+    to it.
+    """
+    x1, y1, x2, y2 = segs.T
+    xmajor = numpy.abs(x2 - x1) >= numpy.abs(y2 - y1)
+    maj1 = numpy.where(xmajor, x1, y1)
+    maj2 = numpy.where(xmajor, x2, y2)
+    min1 = numpy.where(xmajor, y1, x1)
+    min2 = numpy.where(xmajor, y2, x2)
+    dmajor = maj2 - maj1
+    with numpy.errstate(divide="ignore", invalid="ignore"):
+        slope = numpy.where(dmajor != 0, (min2 - min1) / dmajor, 0)
+    start = numpy.rint(numpy.minimum(maj1, maj2))
+    counts = (numpy.rint(numpy.maximum(maj1, maj2)) - start + 1)
+    counts = counts.astype(numpy.intp)
+    seg = numpy.repeat(numpy.arange(len(segs)), counts)
+    pmajor = start[seg] + _run_index(counts)
+    pminor = min1[seg] + (pmajor - maj1[seg]) * slope[seg]
+    base = numpy.floor(pminor)
+    frac = pminor - base
+    pmajor = numpy.concatenate((pmajor, pmajor))
+    pminor = numpy.concatenate((base, base + 1))
+    xmajor = numpy.concatenate((xmajor[seg], xmajor[seg]))
+    xs = numpy.where(xmajor, pmajor, pminor).astype(numpy.intp)
+    ys = numpy.where(xmajor, pminor, pmajor).astype(numpy.intp)
+    return xs, ys, numpy.concatenate((1 - frac, frac))
+
+
+def _outline_pixels(segs, width, antialias, area):
+    """Gets the x and y coordinates and the coverage of all pixels of the
+    passed (N, 4) segment array, clipped to the passed area.
+    """
+    left, top, right, bottom = area
+    segs, visible = _clip_segments(segs, left - width, top - width,
+                                   right + width, bottom + width)
+    segs = segs[visible]
+    if antialias and width == 1:
+        xs, ys, coverage = _wu_pixels(segs)
+    else:
+        segs = numpy.rint(segs).astype(numpy.intp)
+        xs, ys = _line_pixels(segs, width)
+        coverage = numpy.ones(len(xs))
+    inside = (xs >= left) & (xs <= right) & (ys >= top) & (ys <= bottom) & \
+        (coverage > 0)
+    return xs[inside], ys[inside], coverage[inside]
+
+
+def _merge_pixels(xs, ys, coverage):
+    """Merges the duplicate pixels of the passed coordinates, keeping the
+    highest coverage for each pixel.
+    """
+    order = numpy.lexsort((coverage, xs, ys))
+    xs, ys, coverage = xs[order], ys[order], coverage[order]
+    last = numpy.ones(len(xs), dtype=bool)
+    last[:-1] = (xs[1:] != xs[:-1]) | (ys[1:] != ys[:-1])
+    return xs[last], ys[last], coverage[last]
+
+
+def _blend_pixels(rtarget, color, xs, ys, alpha, avalue):
+    """Blends the passed Color into the pixels at the passed coordinates
+    of the SDL_Surface using the passed alpha values in the range [0, 1].
+
+    The alpha channel of the pixels, if any, is blended towards avalue.
+    """
+    pformat = rtarget.format.contents
+    if pformat.palette:
+        # Indexed colors can't be mixed, so pixels are either set or not.
+        keep = alpha >= 0.5
+        _put_pixels(rtarget, prepare_color(color, pformat), xs[keep],
+                    ys[keep])
+        return
+    dst = _get_pixels(rtarget, xs, ys)
+    result = numpy.zeros(len(dst), dtype=numpy.uint32)
+    for mask, shift, loss, value in \
+            ((pformat.Rmask, pformat.Rshift, pformat.Rloss, color.r),
+             (pformat.Gmask, pformat.Gshift, pformat.Gloss, color.g),
+             (pformat.Bmask, pformat.Bshift, pformat.Bloss, color.b),
+             (pformat.Amask, pformat.Ashift, pformat.Aloss, avalue)):
+        if mask == 0:
+            continue
+        mask = numpy.uint32(mask)
+        channel = ((dst & mask) >> shift) << loss
+        channel = numpy.rint(channel + (value - channel) * alpha)
+        result |= ((channel.astype(numpy.uint32) >> loss) << shift) & mask
+    _put_pixels(rtarget, result, xs, ys)
+
+
+def _plot(target, color, xs, ys, coverage, blend):
+    """Plots the passed color with the passed coverage on the pixels of
+    the target.
+    """
+    rtarget = _get_target_surface(target)
+    color = convert_to_color(color)
+    if blend:
+        alpha = coverage * (color.a / 255.0)
+        avalue = 255
+    else:
+        alpha = coverage
+        avalue = color.a
+    opaque = alpha >= 1
+    if SDL_MUSTLOCK(rtarget):
+        SDL_LockSurface(rtarget)
+    try:
+        _put_pixels(rtarget, prepare_color(color, target), xs[opaque],
+                    ys[opaque])
+        partial = ~opaque
+        if partial.any():
+            _blend_pixels(rtarget, color, xs[partial], ys[partial],
+                          alpha[partial], avalue)
+    finally:
+        if SDL_MUSTLOCK(rtarget):
+            SDL_UnlockSurface(rtarget)
+
+
+def _draw_ellipses(func, target, color, shapes, width, filled, antialias,
+                   blend, arcs=None):
+    """Draws the passed (N, 4) ellipse array on the target."""
+    if not _HASNUMPY:
+        raise UnsupportedError(func, "numpy module could not be loaded")
+    if width < 1:
+        raise ValueError("width must be greater than 0")
+    if (shapes[:, 2:] <= 0).any():
+        raise ValueError("radius must be greater than 0")
+    rtarget = _get_target_surface(target)
+    xs, ys, coverage = _ellipse_pixels(shapes, width, filled, antialias,
+                                       _clip_area(rtarget), arcs)
+    _plot(target, color, xs, ys, coverage, blend)
+
+
+def circle(target, color, dcircle, width=1, filled=False, antialias=False,
+           blend=False):
+    """Draws one or multiple circles on the passed target.
+
+    dcircle can be a sequence of three values for a single circle in the
+    form (x, y, radius) or a sequence of a multiple of 3 for drawing
+    multiple circles at once, e.g. (x1, y1, r1, x2, y2, r2, ...).
+
+    If filled is False, the outline of the circle is drawn with the
+    passed width. If antialias is True, the edges of the circle are
+    smoothed by blending them with the existing pixels. If blend is True,
+    the alpha value of the color is used to blend the circle with the
+    existing pixels.
+    """
+    shapes = _to_shapes(dcircle, 3, "circle")
+    shapes = shapes[:, (0, 1, 2, 2)]
+    _draw_ellipses(circle, target, color, shapes, width, filled, antialias,
+                   blend)
+
+
+def ellipse(target, color, dellipse, width=1, filled=False, antialias=False,
+            blend=False):
+    """Draws one or multiple ellipses on the passed target.
+
+    dellipse can be a sequence of four values for a single ellipse in the
+    form (x, y, rx, ry), with rx and ry being the horizontal and vertical
+    radius, or a sequence of a multiple of 4 for drawing multiple ellipses
+    at once, e.g. (x1, y1, rx1, ry1, x2, y2, rx2, ry2, ...).
+
+    See circle() for the meaning of width, filled, antialias and blend.
+    """
+    shapes = _to_shapes(dellipse, 4, "ellipse")
+    _draw_ellipses(ellipse, target, color, shapes, width, filled, antialias,
+                   blend)
+
+
+def arc(target, color, darc, width=1, filled=False, antialias=False,
+        blend=False):
+    """Draws one or multiple elliptical arcs on the passed target.
+
+    darc can be a sequence of six values for a single arc in the form
+    (x, y, rx, ry, start, end) or a sequence of a multiple of 6 for
+    drawing multiple arcs at once. start and end are the angles in
+    degrees, at which the arc starts and ends. The angles are measured
+    clockwise from the positive x-axis, with the arc running clockwise
+    from start to end.
+
+    If filled is True, the pie slice enclosed by the arc and the center
+    is filled. See circle() for the meaning of width, antialias and
+    blend.
+    """
+    shapes = _to_shapes(darc, 6, "arc")
+    _draw_ellipses(arc, target, color, shapes[:, :4], width, filled,
+                   antialias, blend, shapes[:, 4:])
+
+
+def polygon(target, color, points, width=1, filled=False, antialias=False,
+            blend=False):
+    """Draws one or multiple polygons on the passed target.
+
+    points can be a sequence of an even amount of values for a single
+    polygon in the form (x1, y1, x2, y2, x3, y3, ...) or a sequence of
+    such sequences for drawing multiple polygons at once. The last point
+    is connected with the first one.
+
+    Filled polygons may be convex or concave and are filled using the
+    even-odd rule. If antialias is True, the edges are smoothed using
+    Xiaolin Wu's algorithm. Outlines with a width greater than 1 are not
+    antialiased. See circle() for the meaning of blend.
+    """
+    if not _HASNUMPY:
+        raise UnsupportedError(polygon, "numpy module could not be loaded")
+    if width < 1:
+        raise ValueError("width must be greater than 0")
+    if len(points) > 0 and isiterable(points[0]):
+        polygons = [_to_shapes(p, 2, "polygon") for p in points]
+    else:
+        polygons = [_to_shapes(points, 2, "polygon")]
+    for points in polygons:
+        if len(points) < 2:
+            raise ValueError("polygon must contain at least two points")
+    rtarget = _get_target_surface(target)
+    area = _clip_area(rtarget)
+    segs = numpy.concatenate([numpy.column_stack((p, numpy.roll(p, -1, 0)))
+                              for p in polygons])
+    if filled:
+        xs, ys = _polygon_pixels(polygons, area)
+        coverage = numpy.ones(len(xs))
+        if antialias:
+            exs, eys, ecoverage = _outline_pixels(segs, 1, True, area)
+            xs = numpy.concatenate((xs, exs))
+            ys = numpy.concatenate((ys, eys))
+            coverage = numpy.concatenate((coverage, ecoverage))
+    else:
+        xs, ys, coverage = _outline_pixels(segs, width, antialias, area)
+    if antialias:
+        # Pixels covered by multiple edges must be blended only once.
+        xs, ys, coverage = _merge_pixels(xs, ys, coverage)
+    _plot(target, color, xs, ys, coverage, blend)
@@ -1,9 +1,16 @@
 """Font and text rendering routines."""
 import os
-from .. import surface, rect, pixels
+import mmap
+import weakref
+from bisect import bisect_right
+from collections import OrderedDict
+from ctypes import addressof, byref, c_int, c_ubyte
+from .. import surface, rect, pixels, render, blendmode, rwops
 from .common import SDLError
 from .compat import *
-from .sprite import SoftwareSprite
+from .sprite import Renderer, SoftwareSprite, TextureSprite, \
+    _texture_bytesize
+from ..stdinc import Uint8
 from .color import Color, convert_to_color
 
 _HASSDLTTF = True
@@ -13,7 +20,70 @@ except ImportError:
     _HASSDLTTF = False
 
 
-__all__ = ["BitmapFont", "FontManager"]
+__all__ = ["BitmapFont", "FontManager", "FontRegistry", "GlyphAtlas",
+           "TextCache", "TextLayout", "font_registry"]
+
+# Maximum amount of text layouts kept by a BitmapFont or GlyphAtlas.
+_LAYOUTCACHE_SIZE = 256
+# Space between the glyphs on the textures of a GlyphAtlas.
+_GLYPHPADDING = 1
+# Maximum amount of text widths kept per font for TextLayout objects.
+_WIDTHCACHE_SIZE = 65536
+# Text widths measured by TTF_SizeUTF8(),
+# {font address: {font state: {text: width}}}
+_textwidths = {}
+
+
+def _font_state(font):
+    """Gets the style, outline, hinting and kerning of the TTF_Font."""
+    return (sdlttf.TTF_GetFontStyle(font), sdlttf.TTF_GetFontOutline(font),
+            sdlttf.TTF_GetFontHinting(font), sdlttf.TTF_GetFontKerning(font))
+
+
+def _text_width(font, text):
+    """Gets the width of the passed text in pixels for the TTF_Font."""
+    states = _textwidths.get(addressof(font.contents))
+    if states is None:
+        states = _textwidths[addressof(font.contents)] = {}
+    # The font may be shared and have its style changed at any time.
+    state = _font_state(font)
+    widths = states.get(state)
+    if widths is None:
+        widths = states[state] = {}
+    width = widths.get(text)
+    if width is None:
+        if len(widths) >= _WIDTHCACHE_SIZE:
+            widths.clear()
+        w, h = c_int(), c_int()
+        if sdlttf.TTF_SizeUTF8(font, byteify(text, "utf-8"), byref(w),
+                               byref(h)) != 0:
+            raise SDLError(sdlttf.TTF_GetError())
+        width = widths[text] = w.value
+    return width
+
+
+def _forget_font(font):
+    """Removes the measured text widths of the passed TTF_Font."""
+    if font:
+        _textwidths.pop(addressof(font.contents), None)
+
+
+# FontRegistry objects, whose fonts become invalid on shutting down SDL_ttf.
+_registries = weakref.WeakSet()
+
+
+def _init_ttf():
+    """Initializes SDL_ttf, if necessary.
+
+    Fonts opened before SDL_ttf was shut down are invalid and will be
+    dropped from all FontRegistry objects.
+    """
+    if sdlttf.TTF_WasInit() != 0:
+        return
+    for registry in list(_registries):
+        registry._drop_fonts()
+    if sdlttf.TTF_Init() != 0:
+        raise SDLError()
 
 
 class BitmapFont(object):
@@ -68,6 +138,9 @@ class BitmapFont(object):
         elif isinstance(imgsurface, surface.SDL_Surface):
             self.surface = imgsurface
         self.size = size[0], size[1]
+        # textures = {Renderer: TextureSprite}
+        self._textures = {}
+        self._layouts = OrderedDict()
         self._calculate_offsets()
 
     def _calculate_offsets(self):
@@ -82,41 +155,59 @@ class BitmapFont(object):
                 offsets[c] = rect.SDL_Rect(x, y, w, h)
                 x += w
             y += h
+        self._layouts.clear()
+
+    def _layout(self, text):
+        """Calculates the glyph positions for the passed text.
+
+        Returns a list of (srcrect, x, y) entries for the characters
+        available on the font, the width and height of the text and the
+        width of its last line. The layouts of recently used strings are
+        cached.
+        """
+        layouts = self._layouts
+        layout = layouts.pop(text, None)
+        if layout is None:
+            w, h = self.size
+            offsets = self.offsets
+            glyphs = []
+            tw, y = 0, 0
+            for line in text.split(os.linesep):
+                x = 0
+                for c in line:
+                    if c in offsets:
+                        glyphs.append((offsets[c], x, y))
+                    #elif c != ' ':
+                    #    TODO: raise an exception for unknown char?
+                    x += w
+                tw = max(tw, x)
+                y += h
+            layout = glyphs, (tw, y), x
+            if len(layouts) >= _LAYOUTCACHE_SIZE:
+                layouts.popitem(last=False)
+        layouts[text] = layout
+        return layout
 
     def render(self, text, bpp=None):
         """Renders the passed text on a new Sprite and returns it."""
-        tw, th = 0, 0
-        w, h = self.size
-        # TODO
-        lines = text.split(os.linesep)
-        for line in lines:
-            tw = max(tw, sum([w for c in line]))
-            th += h
-
+        glyphs, (tw, th), _ = self._layout(text)
         if bpp is None:
             bpp = self.surface.format.contents.BitsPerPixel
         sf = surface.SDL_CreateRGBSurface(0, tw, th, bpp, 0, 0, 0, 0)
         sf = sf.contents
         imgsurface = SoftwareSprite(sf, False)
-        target = imgsurface.surface
+        self._blit(imgsurface.surface, glyphs, 0, 0)
+        return imgsurface
+
+    def _blit(self, target, glyphs, x, y):
+        """Blits the glyphs of a layout onto the target surface."""
         blit_surface = surface.SDL_BlitSurface
         fontsf = self.surface
-        offsets = self.offsets
-
         dstr = rect.SDL_Rect(0, 0, 0, 0)
-        y = 0
-        for line in lines:
-            dstr.y = y
-            x = 0
-            for c in line:
-                dstr.x = x
-                if c in offsets:
-                    blit_surface(fontsf, offsets[c], target, dstr)
-                #elif c != ' ':
-                #    TODO: raise an exception for unknown char?
-                x += w
-            y += h
-        return imgsurface
+        for srcrect, gx, gy in glyphs:
+            dstr.x = x + gx
+            dstr.y = y + gy
+            blit_surface(fontsf, srcrect, target, dstr)
 
     def render_on(self, imgsurface, text, offset=(0, 0)):
         """Renders a text on the passed sprite, starting at a specific
@@ -137,26 +228,73 @@ class BitmapFont(object):
         else:
             raise TypeError("unsupported surface type")
 
-        lines = text.split(os.linesep)
-        blit_surface = surface.SDL_BlitSurface
-        fontsf = self.surface
-        offsets = self.offsets
-
-        dstr = rect.SDL_Rect(0, 0, 0, 0)
-        y = offset[1]
-        for line in lines:
-            dstr.y = y
-            x = offset[0]
-            for c in line:
-                dstr.x = x
-                if c in offsets:
-                    blit_surface(fontsf, offsets[c], target, dstr)
-                #elif c != ' ':
-                #    TODO: raise an exception for unknown char?
-                x += w
-            y += h
+        glyphs, (tw, th), lastwidth = self._layout(text)
+        self._blit(target, glyphs, offset[0], offset[1])
+        x = offset[0] + lastwidth
+        y = offset[1] + th
         return (offset[0], offset[1], x + w, y + h)
 
+    def get_texture(self, renderer):
+        """Gets the TextureSprite holding the font's glyphs for the
+        passed Renderer.
+
+        The texture is created on the first call and registered with
+        the TextureRegistry of the Renderer.
+        """
+        sprite = self._textures.get(renderer)
+        if sprite is None:
+            if not isinstance(renderer, Renderer):
+                raise TypeError("renderer must be a Renderer")
+            fontsf = self.surface
+            texture = render.SDL_CreateTextureFromSurface(renderer.renderer,
+                                                          fontsf)
+            if not texture:
+                raise SDLError()
+            sprite = TextureSprite(texture.contents)
+
+            def source():
+                sf = surface.SDL_ConvertSurface(fontsf, fontsf.format, 0)
+                if not sf:
+                    raise SDLError()
+                return sf.contents
+            renderer.textures.add(sprite, "font", source)
+            self._textures[renderer] = sprite
+        return sprite
+
+    def draw(self, renderer, text, offset=(0, 0)):
+        """Draws the passed text onto the target of the Renderer.
+
+        The top-left start position of the text will be the passed
+        offset. Returns the drawn area as (x, y, width, height) tuple.
+        """
+        return self.draw_texts(renderer, ((text, offset),))[0]
+
+    def draw_texts(self, renderer, texts):
+        """Draws multiple texts onto the target of the Renderer.
+
+        texts is an iterable of (text, offset) tuples. All glyphs are
+        copied from the same texture. Returns a list with the drawn
+        area as (x, y, width, height) tuple for each text.
+        """
+        sprite = self.get_texture(renderer)
+        if sprite._registry is not None:
+            sprite._registry.touch(sprite)
+        texture = sprite.texture
+        sdlrenderer = renderer.renderer
+        rendercopy = render.SDL_RenderCopy
+        w, h = self.size
+        dstrect = rect.SDL_Rect(0, 0, w, h)
+        areas = []
+        for text, (x, y) in texts:
+            glyphs, (tw, th), _ = self._layout(text)
+            for srcrect, gx, gy in glyphs:
+                dstrect.x = x + gx
+                dstrect.y = y + gy
+                if rendercopy(sdlrenderer, texture, srcrect, dstrect) != 0:
+                    raise SDLError()
+            areas.append((x, y, tw, th))
+        return areas
+
     def contains(self, c):
         """Checks, whether a certain character exists in the font."""
         return c == ' ' or c in self.offsets
@@ -172,24 +310,279 @@ class BitmapFont(object):
         return True
 
 
+class TextCache(object):
+    """A size-bounded cache for rendered text.
+
+    The TextCache keeps rendered text surfaces and textures of a
+    FontManager. If the total size of the cached pixel data exceeds the
+    budget, the least recently used entries are dropped.
+    """
+    def __init__(self, budget=8 * 1024 * 1024):
+        """Creates a new TextCache with a budget in bytes."""
+        if budget < 0:
+            raise ValueError("budget must not be negative")
+        self.budget = budget
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # entries = {key: (SDL_Surface or TextureSprite, size in bytes)}
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        """The amount of cached entries."""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Checks, whether an entry for the passed key exists."""
+        return key in self._entries
+
+    @property
+    def hit_rate(self):
+        """The ratio of lookups, which found a cached entry."""
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / float(lookups)
+
+    def get(self, key):
+        """Gets the cached entry for the passed key or None."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries[key] = entry
+        return entry[0]
+
+    def put(self, key, value):
+        """Adds a rendered SDL_Surface or TextureSprite to the cache.
+
+        SDL_Surface objects are owned by the cache afterwards and will be
+        freed, once they are dropped from it.
+        """
+        if isinstance(value, TextureSprite):
+            bytesize = _texture_bytesize(value.texture)
+        elif isinstance(value, surface.SDL_Surface):
+            bytesize = value.pitch * value.h
+        else:
+            raise TypeError("value must be a SDL_Surface or TextureSprite")
+        self._drop(key)
+        self._entries[key] = (value, bytesize)
+        self.total += bytesize
+        while self.total > self.budget and self._entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key):
+        """Removes the entry for the passed key."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        value, bytesize = entry
+        self.total -= bytesize
+        if isinstance(value, surface.SDL_Surface):
+            surface.SDL_FreeSurface(value)
+
+    def clear(self):
+        """Removes all entries from the cache."""
+        for key in list(self._entries):
+            self._drop(key)
+
+    def reset_stats(self):
+        """Resets the hit, miss and eviction counters."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+
+class FontRegistry(object):
+    """Shares opened fonts within a process.
+
+    The FontRegistry maps each font file into memory once and opens the
+    font in different sizes from that memory via TTF_OpenFontRW(). Fonts
+    opened via the FontRegistry are reference-counted, so that multiple
+    FontManager objects requesting the same file and size share the
+    same TTF_Font. Changing the style of a shared font thus affects all
+    its users.
+    """
+    def __init__(self):
+        """Creates a new, empty FontRegistry."""
+        if not _HASSDLTTF:
+            raise UnsupportedError(FontRegistry,
+                                   "FontRegistry requires sdlttf support")
+        # files = {path: (mmap, ctypes buffer)}
+        self._files = {}
+        # fonts = {(path, size): [font, references]}
+        self._fonts = {}
+        # handles = {font address: (path, size)}
+        self._handles = {}
+        # preloaded = {path: [font, ...]}
+        self._preloaded = {}
+        _registries.add(self)
+
+    def __len__(self):
+        """The amount of opened fonts."""
+        return len(self._fonts)
+
+    def _drop_fonts(self):
+        """Drops all fonts and unmaps their files without closing them,
+        since they became invalid by shutting down SDL_ttf.
+        """
+        for font, references in self._fonts.values():
+            _forget_font(font)
+        self._fonts = {}
+        self._handles = {}
+        self._preloaded = {}
+        for path in list(self._files):
+            self._unmap_file(path)
+
+    def _map_file(self, path):
+        """Maps the font file into memory."""
+        data = self._files.get(path)
+        if data is None:
+            with open(path, "rb") as fp:
+                size = os.fstat(fp.fileno()).st_size
+                if size == 0:
+                    raise ValueError("%s is empty" % path)
+                # Copy-on-write mappings are writable for ctypes, but
+                # never change the file.
+                mapped = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_COPY)
+            buf = (c_ubyte * size).from_buffer(mapped)
+            data = self._files[path] = (mapped, buf)
+        return data
+
+    def _unmap_file(self, path):
+        """Unmaps the font file, if it is not used anymore."""
+        if path in self._preloaded:
+            return
+        for fpath, _ in self._fonts:
+            if fpath == path:
+                return
+        data = self._files.pop(path, None)
+        if data is not None:
+            mapped, buf = data
+            del buf
+            data = None
+            try:
+                mapped.close()
+            except BufferError:
+                # ctypes objects still refer to the mapping, which is
+                # released, once they are garbage-collected.
+                pass
+
+    def open(self, path, size):
+        """Opens the font file in the passed size.
+
+        If the font was opened already, its reference count will be
+        increased and the same TTF_Font will be returned.
+        """
+        _init_ttf()
+        path = os.path.abspath(path)
+        key = (path, size)
+        entry = self._fonts.get(key)
+        if entry is not None:
+            entry[1] += 1
+            return entry[0]
+        mapped, buf = self._map_file(path)
+        rw = rwops.SDL_RWFromConstMem(buf, len(buf))
+        if not rw:
+            self._unmap_file(path)
+            raise SDLError()
+        font = sdlttf.TTF_OpenFontRW(rw, 1, size)
+        if not font:
+            self._unmap_file(path)
+            raise SDLError(sdlttf.TTF_GetError())
+        self._fonts[key] = [font, 1]
+        self._handles[addressof(font.contents)] = key
+        return font
+
+    def close(self, font):
+        """Releases a font opened via open().
+
+        The font will be closed, once it is not referenced anymore.
+        """
+        key = self._handles.get(addressof(font.contents))
+        if key is None:
+            # Not opened by the registry or dropped on shutting down
+            # SDL_ttf.
+            return
+        entry = self._fonts[key]
+        entry[1] -= 1
+        if entry[1] > 0:
+            return
+        del self._fonts[key]
+        del self._handles[addressof(font.contents)]
+        _forget_font(font)
+        if sdlttf.TTF_WasInit() != 0:
+            sdlttf.TTF_CloseFont(font)
+        self._unmap_file(key[0])
+
+    def preload(self, path, sizes):
+        """Opens the font file in the passed sizes and keeps the fonts
+        open until unload() is called.
+
+        Returns a list with the TTF_Font for each size.
+        """
+        fonts = [self.open(path, size) for size in sizes]
+        self._preloaded.setdefault(os.path.abspath(path), []).extend(fonts)
+        return fonts
+
+    def unload(self, path):
+        """Releases the fonts of the file, which were preloaded."""
+        path = os.path.abspath(path)
+        for font in self._preloaded.pop(path, []):
+            self.close(font)
+        self._unmap_file(path)
+
+    def references(self, path, size):
+        """Gets the amount of references to a font file in a size."""
+        entry = self._fonts.get((os.path.abspath(path), size))
+        if entry is None:
+            return 0
+        return entry[1]
+
+
+_fontregistry = None
+
+
+def font_registry():
+    """Gets the process-wide FontRegistry used by FontManager objects."""
+    global _fontregistry
+    if _fontregistry is None:
+        _fontregistry = FontRegistry()
+    return _fontregistry
+
+
 class FontManager(object):
     """Manage fonts and rendering of text."""
     def __init__(self, font_path, alias=None, size=16,
-                 color=Color(255, 255, 255), bg_color=Color(0, 0, 0)):
+                 color=Color(255, 255, 255), bg_color=Color(0, 0, 0),
+                 cache=None, registry=None):
         """Initialize the FontManager
 
         One font path must be given to initialize the FontManager. The
         default_font will be set to this font. color and bg_color
         will give the FontManager a default color. size is the default
-        font size in pixels.
+        font size in pixels. cache can be a TextCache to keep rendered
+        text for subsequent render() and render_texture() calls.
+        registry is the FontRegistry to open fonts with and defaults to
+        the process-wide one. Fonts of the same registry are shared, so
+        a FontManager changing the style of its fonts should use its own
+        registry.
         """
         if not _HASSDLTTF:
             raise UnsupportedError(FontManager,
                                    "FontManager requires sdlttf support")
-        if sdlttf.TTF_WasInit() == 0 and sdlttf.TTF_Init() != 0:
-            raise SDLError()
+        _init_ttf()
         self.fonts = {}  # fonts = {alias: {size:font_ptr}}
         self.aliases = {}  # aliases = {alias:font_path}
+        # atlases = {(renderer, alias, size, style): GlyphAtlas}
+        self._atlases = {}
+        self.cache = cache
+        if registry is None:
+            registry = font_registry()
+        self.registry = registry
         self._textcolor = pixels.SDL_Color(0, 0, 0)
         self._bgcolor = pixels.SDL_Color(255, 255, 255)
         self.color = color
@@ -203,10 +596,15 @@ class FontManager(object):
 
     def close(self):
         """Close all opened fonts."""
+        for atlas in getattr(self, "_atlases", {}).values():
+            atlas.clear()
+        self._atlases = {}
+        if getattr(self, "cache", None) is not None:
+            self.cache.clear()
         for alias, fonts in self.fonts.items():
             for size, font in fonts.items():
                 if font:
-                    sdlttf.TTF_CloseFont(font)
+                    self.registry.close(font)
         self.fonts = {}
         self.aliases = {}
 
@@ -243,10 +641,7 @@ class FontManager(object):
 
         Raises an exception if something went wrong.
         """
-        font = sdlttf.TTF_OpenFont(byteify(font_path, "utf-8"), size)
-        if font is None:
-            raise SDLError()
-        return font
+        return self.registry.open(font_path, size)
 
     def _change_font_size(self, alias, size):
         """Loads an already opened font in another size."""
@@ -255,6 +650,19 @@ class FontManager(object):
         font = self._load_font(self.aliases[alias], size)
         self.fonts[alias][size] = font
 
+    def preload(self, sizes, alias=None):
+        """Loads a font in all of the passed sizes.
+
+        This method uses the font designated by the alias or the
+        default_font. Sizes being loaded already are skipped.
+        """
+        alias = alias or self.default_font
+        if alias not in self.fonts:
+            raise KeyError("Font %s not loaded in FontManager" % alias)
+        for size in sizes:
+            if size not in self.fonts[alias]:
+                self._change_font_size(alias, size)
+
     @property
     def color(self):
         """The text color to be used."""
@@ -304,15 +712,9 @@ class FontManager(object):
             size = list(self.fonts[alias].keys())[0]
         self._default_font = self.fonts[alias][size]
 
-    def render(self, text, alias=None, size=None, width=None, color=None,
-               bg_color=None, **kwargs):
-        """Renders text to a surface.
-
-        This method uses the font designated by the alias or the
-        default_font.  A size can be passed even if the font was not
-        loaded with this size.  A width can be given for line wrapping.
-        If no bg_color or color are given, it will default to the
-        FontManager's bg_color and color.
+    def _render_args(self, text, alias, size, width, color, bg_color):
+        """Resolves the arguments of render() to the font and colors to
+        use and a key for the TextCache.
         """
         alias = alias or self.default_font
         size = size or self.size
@@ -335,6 +737,15 @@ class FontManager(object):
             self._change_font_size(alias, size)
         font = self.fonts[alias][size]
         text = byteify(text, "utf-8")
+        # The font may be shared and have its style changed at any time.
+        key = (text, alias, size, width or None,
+               (color.r, color.g, color.b, color.a),
+               (bg_color.r, bg_color.g, bg_color.b, bg_color.a),
+               _font_state(font))
+        return font, text, width, color, bg_color, key
+
+    def _render(self, font, text, width, color, bg_color):
+        """Renders the text with the passed font to a new SDL_Surface."""
         if width:
             sf = sdlttf.TTF_RenderUTF8_Blended_Wrapped(font, text, color,
                                                        width)
@@ -346,3 +757,720 @@ class FontManager(object):
         if not sf:
             raise SDLError(sdlttf.TTF_GetError())
         return sf.contents
+
+    def render(self, text, alias=None, size=None, width=None, color=None,
+               bg_color=None, **kwargs):
+        """Renders text to a surface.
+
+        This method uses the font designated by the alias or the
+        default_font.  A size can be passed even if the font was not
+        loaded with this size.  A width can be given for line wrapping.
+        If no bg_color or color are given, it will default to the
+        FontManager's bg_color and color.
+
+        If the FontManager has a cache, the rendered text is kept in it
+        and the returned surface is a copy of the cached one.
+        """
+        font, text, width, color, bg_color, key = \
+            self._render_args(text, alias, size, width, color, bg_color)
+        cache = self.cache
+        if cache is None:
+            return self._render(font, text, width, color, bg_color)
+        sf = cache.get(key)
+        created = sf is None
+        if created:
+            sf = self._render(font, text, width, color, bg_color)
+        # The caller owns the returned surface and may free it.
+        copy = surface.SDL_ConvertSurface(sf, sf.format, 0)
+        if created:
+            cache.put(key, sf)
+        if not copy:
+            raise SDLError()
+        return copy.contents
+
+    def render_texture(self, renderer, text, alias=None, size=None,
+                       width=None, color=None, bg_color=None):
+        """Renders text to a TextureSprite for the passed Renderer.
+
+        The arguments are handled like those of render(). If the
+        FontManager has a cache, the TextureSprite is kept in it and the
+        same TextureSprite is returned for subsequent calls with equal
+        arguments, so it should not be modified by the caller.
+        """
+        if not isinstance(renderer, Renderer):
+            raise TypeError("renderer must be a Renderer")
+        font, text, width, color, bg_color, key = \
+            self._render_args(text, alias, size, width, color, bg_color)
+        cache = self.cache
+        key = (renderer,) + key
+        if cache is not None:
+            sprite = cache.get(key)
+            if sprite is not None:
+                return sprite
+        sprite = self._render_texture(renderer, font, text, width, color,
+                                      bg_color)
+        if cache is not None:
+            cache.put(key, sprite)
+        return sprite
+
+    def _render_texture(self, renderer, font, text, width, color, bg_color):
+        """Renders the text with the passed font to a new TextureSprite."""
+        sf = self._render(font, text, width, color, bg_color)
+        texture = render.SDL_CreateTextureFromSurface(renderer.renderer, sf)
+        surface.SDL_FreeSurface(sf)
+        if not texture:
+            raise SDLError()
+        sprite = TextureSprite(texture.contents)
+        renderer.textures.add(sprite, "text")
+        return sprite
+
+    def prewarm(self, texts, renderer=None, **kwargs):
+        """Renders the passed texts into the cache.
+
+        texts is an iterable of strings, which are rendered with the
+        passed keyword arguments of render(). If a renderer is passed,
+        the texts are cached as TextureSprite objects for it, as
+        render_texture() would do. Texts being cached already are skipped.
+        Returns the amount of rendered texts.
+        """
+        cache = self.cache
+        if cache is None:
+            raise ValueError("the FontManager has no cache")
+        if renderer is not None and not isinstance(renderer, Renderer):
+            raise TypeError("renderer must be a Renderer")
+        count = 0
+        for text in texts:
+            args = self._render_args(text, kwargs.get("alias"),
+                                     kwargs.get("size"), kwargs.get("width"),
+                                     kwargs.get("color"),
+                                     kwargs.get("bg_color"))
+            font, text, width, color, bg_color, key = args
+            if renderer is not None:
+                key = (renderer,) + key
+            if key in cache:
+                continue
+            if renderer is not None:
+                value = self._render_texture(renderer, font, text, width,
+                                             color, bg_color)
+            else:
+                value = self._render(font, text, width, color, bg_color)
+            cache.put(key, value)
+            count += 1
+        return count
+
+    def layout(self, text, width=None, align="left", alias=None, size=None):
+        """Creates a TextLayout for the passed text.
+
+        This method uses the font designated by the alias or the
+        default_font in the passed size or the FontManager's size. See
+        TextLayout for the width and align arguments.
+        """
+        alias = alias or self.default_font
+        size = size or self.size
+        if alias not in self.aliases:
+            raise KeyError("Font %s not loaded" % alias)
+        elif size not in self.fonts[alias]:
+            self._change_font_size(alias, size)
+        return TextLayout(self.fonts[alias][size], text, width, align)
+
+    def get_atlas(self, renderer, alias=None, size=None):
+        """Gets the GlyphAtlas for a font and the passed Renderer.
+
+        This method uses the font designated by the alias or the
+        default_font in the passed size or the FontManager's size. The
+        GlyphAtlas is created on the first call and kept until the
+        FontManager is closed.
+        """
+        alias = alias or self.default_font
+        size = size or self.size
+        if alias not in self.aliases:
+            raise KeyError("Font %s not loaded" % alias)
+        elif size not in self.fonts[alias]:
+            self._change_font_size(alias, size)
+        font = self.fonts[alias][size]
+        key = (renderer, alias, size, sdlttf.TTF_GetFontStyle(font))
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            atlas = GlyphAtlas(renderer, font)
+            self._atlases[key] = atlas
+        return atlas
+
+    def draw(self, renderer, text, x=0, y=0, alias=None, size=None,
+             color=None):
+        """Draws text onto the target of the passed Renderer.
+
+        In contrast to render(), the glyphs are rasterized only once and
+        drawn from the GlyphAtlas of the font, which makes this suitable
+        for text changing every frame. The top-left corner of the text
+        will be at the passed position. If no color is given, it will
+        default to the FontManager's color. Returns the drawn area as
+        (x, y, width, height) tuple.
+        """
+        if color is None:
+            color = self.color
+        atlas = self.get_atlas(renderer, alias, size)
+        return atlas.draw(text, x, y, color)
+
+
+class GlyphAtlas(object):
+    """A texture atlas of the rasterized glyphs of a font.
+
+    The GlyphAtlas rasterizes each glyph of a font only once, when it is
+    drawn for the first time, and packs it into one of its textures.
+    Text is drawn by copying the glyphs from those textures, so that
+    drawing frequently changing text, such as scores or timers, neither
+    renders a new surface nor uploads a new texture.
+
+    The glyphs are rasterized in white and tinted by the color and
+    alpha modulation of the textures on drawing. The positions of the
+    glyphs are calculated from the advances and kerning of the font and
+    cached for recently drawn strings.
+    """
+    def __init__(self, renderer, font, pagesize=(512, 512)):
+        """Creates a new GlyphAtlas for the passed Renderer and TTF_Font.
+
+        The font must stay open for the lifetime of the GlyphAtlas and
+        must not change its style or outline. pagesize denotes the size
+        of the textures, the glyphs are packed into.
+        """
+        if not _HASSDLTTF:
+            raise UnsupportedError(GlyphAtlas,
+                                   "GlyphAtlas requires sdlttf support")
+        if not isinstance(renderer, Renderer):
+            raise TypeError("renderer must be a Renderer")
+        self.renderer = renderer
+        self.font = font
+        self.pagesize = pagesize[0], pagesize[1]
+        self.height = sdlttf.TTF_FontHeight(font)
+        self.lineskip = sdlttf.TTF_FontLineSkip(font)
+        self.pages = []
+        # glyphs = {char: (page index, srcrect, x offset, advance)}
+        self._glyphs = {}
+        self._kerning = sdlttf.TTF_GetFontKerning(font) != 0
+        self._kernings = {}
+        self._layouts = OrderedDict()
+        # Position and height of the current row on the last page.
+        self._shelf = [0, 0, 0]
+
+    def __len__(self):
+        """The amount of cached glyphs."""
+        return len(self._glyphs)
+
+    def __contains__(self, ch):
+        """Checks, whether the glyph of the passed character is cached."""
+        return ch in self._glyphs
+
+    def _add_page(self):
+        """Adds a new, transparent texture to the atlas."""
+        w, h = self.pagesize
+        texture = render.SDL_CreateTexture(self.renderer.renderer,
+                                           pixels.SDL_PIXELFORMAT_ARGB8888,
+                                           render.SDL_TEXTUREACCESS_STATIC,
+                                           w, h)
+        if not texture:
+            raise SDLError()
+        page = TextureSprite(texture.contents)
+        self.renderer.textures.add(page, "glyphs")
+        if render.SDL_SetTextureBlendMode(page.texture,
+                                          blendmode.SDL_BLENDMODE_BLEND) != 0:
+            raise SDLError()
+        # The content of new textures is undefined.
+        empty = (Uint8 * (w * h * 4))()
+        if render.SDL_UpdateTexture(page.texture, None, empty, w * 4) != 0:
+            raise SDLError()
+        self.pages.append(page)
+        self._shelf = [0, 0, 0]
+
+    def _pack(self, glyphsf):
+        """Copies the pixels of the passed surface onto the atlas.
+
+        Returns the page index and area of the copied glyph.
+        """
+        pw, ph = self.pagesize
+        w, h = glyphsf.w, glyphsf.h
+        if w > pw or h > ph:
+            raise ValueError("glyph does not fit into the pages of the atlas")
+        if not self.pages:
+            self._add_page()
+        x, y, rowheight = self._shelf
+        if x + w > pw:
+            # Start a new row below the current one.
+            x, y, rowheight = 0, y + rowheight + _GLYPHPADDING, 0
+        if y + h > ph:
+            self._add_page()
+            x, y, rowheight = 0, 0, 0
+        area = rect.SDL_Rect(x, y, w, h)
+        page = self.pages[-1]
+        if render.SDL_UpdateTexture(page.texture, area, glyphsf.pixels,
+                                    glyphsf.pitch) != 0:
+            raise SDLError()
+        self._shelf = [x + w + _GLYPHPADDING, y, max(rowheight, h)]
+        return len(self.pages) - 1, area
+
+    def _add_glyph(self, ch):
+        """Rasterizes the glyph for the passed character into the atlas."""
+        code = ord(ch)
+        minx, maxx, miny, maxy, advance = c_int(), c_int(), c_int(), \
+            c_int(), c_int()
+        # SDL_ttf addresses glyphs by 16-bit code points.
+        if code > 0xFFFF or \
+                sdlttf.TTF_GlyphMetrics(self.font, code, byref(minx),
+                                        byref(maxx), byref(miny), byref(maxy),
+                                        byref(advance)) != 0:
+            glyph = (None, None, 0, 0)
+        elif maxx.value <= minx.value:
+            # Whitespace, there is nothing to draw.
+            glyph = (None, None, 0, advance.value)
+        else:
+            color = pixels.SDL_Color(255, 255, 255, 255)
+            sf = sdlttf.TTF_RenderGlyph_Blended(self.font, code, color)
+            if not sf:
+                raise SDLError(sdlttf.TTF_GetError())
+            fmt = sf.contents.format.contents.format
+            if fmt != pixels.SDL_PIXELFORMAT_ARGB8888:
+                tmp = surface.SDL_ConvertSurfaceFormat(
+                    sf, pixels.SDL_PIXELFORMAT_ARGB8888, 0)
+                surface.SDL_FreeSurface(sf)
+                if not tmp:
+                    raise SDLError()
+                sf = tmp
+            try:
+                page, area = self._pack(sf.contents)
+            finally:
+                surface.SDL_FreeSurface(sf)
+            # The rasterized glyph starts at the pen position or at the
+            # left edge of the glyph, if it reaches over the pen.
+            glyph = (page, area, min(minx.value, 0), advance.value)
+        self._glyphs[ch] = glyph
+        return glyph
+
+    def _get_kerning(self, prev, ch):
+        """Gets the kerning offset between the two passed characters."""
+        key = prev + ch
+        kerning = self._kernings.get(key)
+        if kerning is None:
+            kerning = 0
+            if ord(prev) <= 0xFFFF and ord(ch) <= 0xFFFF:
+                kerning = sdlttf.TTF_GetFontKerningSizeGlyphs(
+                    self.font, ord(prev), ord(ch)) or 0
+            self._kernings[key] = kerning
+        return kerning
+
+    def _layout(self, text):
+        """Calculates the glyph areas for the passed text.
+
+        Returns a list of (page index, srcrect, x, y, w, h) entries,
+        sorted by their page, and the size of the text.
+        """
+        layouts = self._layouts
+        layout = layouts.pop(text, None)
+        if layout is None:
+            glyphs = self._glyphs
+            kernings = self._kernings if self._kerning else None
+            quads = []
+            width = 0
+            y = 0
+            for line in text.split("\n"):
+                pen = 0
+                prev = None
+                for ch in line:
+                    glyph = glyphs.get(ch)
+                    if glyph is None:
+                        glyph = self._add_glyph(ch)
+                    page, area, offset, advance = glyph
+                    if kernings is not None and prev is not None:
+                        kerning = kernings.get(prev + ch)
+                        if kerning is None:
+                            kerning = self._get_kerning(prev, ch)
+                        pen += kerning
+                    if area is not None:
+                        x = pen + offset
+                        quads.append((page, area, x, y, area.w, area.h))
+                        if x + area.w > width:
+                            width = x + area.w
+                    pen += advance
+                    prev = ch
+                if pen > width:
+                    width = pen
+                y += self.lineskip
+            height = y - self.lineskip + self.height
+            if len(self.pages) > 1:
+                # Draw the glyphs page by page to change textures rarely.
+                quads.sort(key=lambda quad: quad[0])
+            layout = quads, (width, height)
+            if len(layouts) >= _LAYOUTCACHE_SIZE:
+                layouts.popitem(last=False)
+        layouts[text] = layout
+        return layout
+
+    def measure(self, text):
+        """Gets the width and height of the passed text in pixels.
+
+        Glyphs not being cached yet will be added to the atlas.
+        """
+        if isinstance(text, bytes):
+            text = text.decode("utf-8")
+        return self._layout(text)[1]
+
+    def draw(self, text, x=0, y=0, color=None):
+        """Draws the passed text onto the target of the Renderer.
+
+        The top-left corner of the text will be at the passed position.
+        Multiple lines can be separated by a linefeed. color denotes the
+        text color and defaults to white. Returns the drawn area as
+        (x, y, width, height) tuple.
+        """
+        if isinstance(text, bytes):
+            text = text.decode("utf-8")
+        quads, size = self._layout(text)
+        if color is None:
+            mod = ((255, 255, 255), 255)
+        else:
+            c = convert_to_color(color)
+            mod = ((c.r, c.g, c.b), c.a)
+        sdlrenderer = self.renderer.renderer
+        rendercopy = render.SDL_RenderCopy
+        dstrect = rect.SDL_Rect()
+        current = None
+        for index, area, qx, qy, w, h in quads:
+            if index != current:
+                current = index
+                page = self.pages[index]
+                if page._registry is not None:
+                    page._registry.touch(page)
+                texture = page.texture
+                if page._texmod != mod:
+                    (r, g, b), a = mod
+                    render.SDL_SetTextureColorMod(texture, r, g, b)
+                    render.SDL_SetTextureAlphaMod(texture, a)
+                    page._texmod = mod
+            dstrect.x = x + qx
+            dstrect.y = y + qy
+            dstrect.w = w
+            dstrect.h = h
+            if rendercopy(sdlrenderer, texture, area, dstrect) != 0:
+                raise SDLError()
+        return x, y, size[0], size[1]
+
+    def clear(self):
+        """Removes all glyphs and destroys the textures of the atlas."""
+        for page in self.pages:
+            if page._registry is not None:
+                page._registry.remove(page)
+        self.pages = []
+        self._glyphs = {}
+        self._layouts.clear()
+        self._shelf = [0, 0, 0]
+
+
+class TextLayout(object):
+    """Breaks text into lines and positions them for drawing.
+
+    The TextLayout splits its text into paragraphs at linefeeds and
+    wraps each paragraph into lines fitting into the width of the
+    layout, breaking lines at spaces. Words are measured once per font
+    and font style via TTF_SizeUTF8(). Changing the text or editing
+    single paragraphs only re-flows the paragraphs, which actually
+    changed.
+
+    Each line is described by a (y, runs, width) line box, with y being
+    the top of the line, runs a list of (x, text) tuples to be drawn and
+    width being the width of the line's text.
+    """
+    ALIGNMENTS = ("left", "center", "right", "justify")
+
+    def __init__(self, font, text="", width=None, align="left"):
+        """Creates a new TextLayout for the passed TTF_Font.
+
+        width denotes the maximum width of a line in pixels. If width is
+        None, lines are only broken at linefeeds. align can be "left",
+        "center", "right" or "justify" and requires a width to be set.
+        """
+        if not _HASSDLTTF:
+            raise UnsupportedError(TextLayout,
+                                   "TextLayout requires sdlttf support")
+        if align not in TextLayout.ALIGNMENTS:
+            raise ValueError("align must be one of %s" %
+                             (TextLayout.ALIGNMENTS,))
+        if width is not None and width <= 0:
+            raise ValueError("width must be a positive integer")
+        self.font = font
+        self.height = sdlttf.TTF_FontHeight(font)
+        self.lineskip = sdlttf.TTF_FontLineSkip(font)
+        self._width = width
+        self._align = align
+        self._paragraphs = []
+        # The line boxes of each paragraph without their y offset.
+        self._flows = []
+        # The index of the first line of each paragraph.
+        self._starts = []
+        self._linecount = 0
+        self._maxwidth = None
+        self.text = text
+
+    def __len__(self):
+        """The amount of lines."""
+        return self._linecount
+
+    def _flow(self, paragraph):
+        """Breaks the paragraph into lines.
+
+        Returns a list of (runs, width) tuples.
+        """
+        font = self.font
+        width = self._width
+        if width is None or paragraph == "":
+            return [([(0, paragraph)], _text_width(font, paragraph))]
+        space = _text_width(font, " ")
+        lines = []
+        words, linewidth = [], 0
+        for word in paragraph.split(" "):
+            wordwidth = _text_width(font, word)
+            if words:
+                if linewidth + space + wordwidth <= width:
+                    words.append((word, wordwidth))
+                    linewidth += space + wordwidth
+                    continue
+                lines.append((words, linewidth))
+            # Break words, which do not fit into a line on their own.
+            while wordwidth > width and len(word) > 1:
+                count = self._fit(word)
+                part = word[:count]
+                partwidth = _text_width(font, part)
+                lines.append(([(part, partwidth)], partwidth))
+                word = word[count:]
+                wordwidth = _text_width(font, word)
+            words, linewidth = [(word, wordwidth)], wordwidth
+        lines.append((words, linewidth))
+
+        align = self._align
+        boxes = []
+        last = len(lines) - 1
+        for index, (words, linewidth) in enumerate(lines):
+            if align == "justify" and index != last and len(words) > 1:
+                # Distribute the remaining space among the gaps.
+                gaps = len(words) - 1
+                extra = width - sum(wordwidth for _, wordwidth in words)
+                runs = []
+                x = 0
+                for gap, (word, wordwidth) in enumerate(words):
+                    runs.append((x + extra * gap // gaps, word))
+                    x += wordwidth
+                boxes.append((runs, width))
+                continue
+            text = " ".join(word for word, _ in words)
+            if align == "center":
+                x = (width - linewidth) // 2
+            elif align == "right":
+                x = width - linewidth
+            else:
+                x = 0
+            boxes.append(([(x, text)], linewidth))
+        return boxes
+
+    def _fit(self, word):
+        """Gets the amount of leading characters of the word, which fit
+        into the width of the layout. At least one character is returned.
+        """
+        low, high = 1, len(word)
+        while low < high:
+            mid = (low + high + 1) // 2
+            if _text_width(self.font, word[:mid]) <= self._width:
+                low = mid
+            else:
+                high = mid - 1
+        return low
+
+    def _update_starts(self, index=0):
+        """Recalculates the first lines of the paragraphs from index on."""
+        starts = self._starts
+        del starts[index:]
+        line = 0
+        if index > 0:
+            line = starts[index - 1] + len(self._flows[index - 1])
+        for flow in self._flows[index:]:
+            starts.append(line)
+            line += len(flow)
+        self._linecount = line
+        self._maxwidth = None
+
+    def _reflow(self):
+        """Re-flows all paragraphs."""
+        self._flows = [self._flow(paragraph)
+                       for paragraph in self._paragraphs]
+        self._update_starts()
+
+    @property
+    def text(self):
+        """The text of the layout."""
+        return "\n".join(self._paragraphs)
+
+    @text.setter
+    def text(self, value):
+        """The text of the layout.
+
+        Paragraphs, which also were part of the previous text, are not
+        re-flowed.
+        """
+        if isinstance(value, bytes):
+            value = value.decode("utf-8")
+        paragraphs = value.split("\n")
+        flows = dict(zip(self._paragraphs, self._flows))
+        newflows = []
+        for paragraph in paragraphs:
+            flow = flows.get(paragraph)
+            if flow is None:
+                flow = flows[paragraph] = self._flow(paragraph)
+            newflows.append(flow)
+        self._paragraphs = paragraphs
+        self._flows = newflows
+        self._update_starts()
+
+    @property
+    def width(self):
+        """The maximum width of a line in pixels or None."""
+        return self._width
+
+    @width.setter
+    def width(self, value):
+        """The maximum width of a line in pixels or None."""
+        if value is not None and value <= 0:
+            raise ValueError("width must be a positive integer")
+        if value != self._width:
+            self._width = value
+            self._reflow()
+
+    @property
+    def align(self):
+        """The alignment of the lines."""
+        return self._align
+
+    @align.setter
+    def align(self, value):
+        """The alignment of the lines."""
+        if value not in TextLayout.ALIGNMENTS:
+            raise ValueError("align must be one of %s" %
+                             (TextLayout.ALIGNMENTS,))
+        if value != self._align:
+            self._align = value
+            self._reflow()
+
+    @property
+    def paragraphs(self):
+        """The paragraphs of the text as tuple."""
+        return tuple(self._paragraphs)
+
+    @property
+    def size(self):
+        """The width and height of the laid out text in pixels.
+
+        If the layout has a width, it is used as the width of the text.
+        """
+        if self._linecount == 0:
+            return 0, 0
+        height = (self._linecount - 1) * self.lineskip + self.height
+        if self._width is not None:
+            return self._width, height
+        if self._maxwidth is None:
+            self._maxwidth = max(width for flow in self._flows
+                                 for _, width in flow)
+        return self._maxwidth, height
+
+    def set_paragraph(self, index, text):
+        """Replaces the paragraph at the passed index with text.
+
+        Only the replaced paragraph is re-flowed.
+        """
+        if "\n" in text:
+            raise ValueError("text must not contain linefeeds")
+        self._paragraphs[index] = text
+        self._flows[index] = self._flow(text)
+        if index < 0:
+            index += len(self._paragraphs)
+        self._update_starts(index)
+
+    def insert_paragraph(self, index, text):
+        """Inserts a paragraph before the passed index."""
+        if "\n" in text:
+            raise ValueError("text must not contain linefeeds")
+        count = len(self._paragraphs)
+        if index < 0:
+            index = max(count + index, 0)
+        index = min(index, count)
+        self._paragraphs.insert(index, text)
+        self._flows.insert(index, self._flow(text))
+        self._update_starts(index)
+
+    def append_paragraph(self, text):
+        """Appends a paragraph to the end of the text."""
+        self.insert_paragraph(len(self._paragraphs), text)
+
+    def remove_paragraph(self, index):
+        """Removes the paragraph at the passed index."""
+        del self._paragraphs[index]
+        del self._flows[index]
+        if index < 0:
+            index += len(self._paragraphs) + 1
+        self._update_starts(index)
+
+    def lines(self, start=0, stop=None):
+        """Gets the line boxes of the lines from start to stop.
+
+        This returns a generator, which yields a (y, runs, width) tuple
+        for each line.
+        """
+        if stop is None or stop > self._linecount:
+            stop = self._linecount
+        start = max(start, 0)
+        if start >= stop:
+            return
+        lineskip = self.lineskip
+        starts = self._starts
+        flows = self._flows
+        paragraph = bisect_right(starts, start) - 1
+        line = start
+        offset = start - starts[paragraph]
+        while line < stop:
+            flow = flows[paragraph]
+            for runs, width in flow[offset:offset + stop - line]:
+                yield line * lineskip, runs, width
+                line += 1
+            paragraph += 1
+            offset = 0
+
+    def visible_lines(self, top, height):
+        """Gets the line boxes of the lines visible in a view of the
+        passed height, which is scrolled down by top pixels.
+
+        This returns a generator like lines().
+        """
+        lineskip = self.lineskip
+        start = top // lineskip
+        # Lines are drawn with the font height, which can exceed the
+        # distance between two lines.
+        first = max(start - (self.height - 1) // lineskip, 0)
+        stop = (top + height + lineskip - 1) // lineskip
+        for box in self.lines(first, stop):
+            if box[0] + self.height > top:
+                yield box
+
+    def draw(self, atlas, x=0, y=0, top=0, height=None, color=None):
+        """Draws the text via the passed GlyphAtlas.
+
+        The text is drawn with its top-left corner at x and y. If a
+        height is passed, only the lines visible in a view of that
+        height, which is scrolled down by top pixels, are drawn. Returns
+        the amount of drawn lines.
+        """
+        if height is None:
+            boxes = self.lines()
+        else:
+            boxes = self.visible_lines(top, height)
+        count = 0
+        y -= top
+        for ly, runs, _ in boxes:
+            for rx, text in runs:
+                if text:
+                    atlas.draw(text, x + rx, y + ly, color)
+            count += 1
+        return count
@@ -1,4 +1,6 @@
 """Image loaders."""
+import os
+from collections import OrderedDict
 from .common import SDLError
 from .compat import UnsupportedError, byteify
 from .. import endian, surface, pixels
@@ -15,7 +17,113 @@ try:
 except ImportError:
     _HASSDLIMAGE = False
 
-__all__ = ["get_image_formats", "load_image"]
+__all__ = ["get_image_formats", "load_image", "ImageCache"]
+
+# Set, once SDL_image was initialized by _init_sdlimage().
+_imginit = False
+
+
+def _init_sdlimage():
+    """Initializes SDL_image once for all image formats.
+
+    SDL_image initializes format loaders on demand, so this does not
+    have to be repeated after sdl2.sdlimage.IMG_Quit() was called.
+    """
+    global _imginit
+    if not _imginit:
+        sdlimage.IMG_Init(sdlimage.IMG_INIT_JPG | sdlimage.IMG_INIT_PNG |
+                          sdlimage.IMG_INIT_TIF | sdlimage.IMG_INIT_WEBP)
+        _imginit = True
+
+
+def _copy_surface(imgsurface):
+    """Creates a copy of the passed SDL_Surface in the same format."""
+    copy = surface.SDL_ConvertSurface(imgsurface, imgsurface.format, 0)
+    if not copy:
+        raise SDLError()
+    return copy.contents
+
+
+class ImageCache(object):
+    """A size-bounded cache for decoded images.
+
+    The ImageCache keeps the surfaces decoded by load_image(). If the
+    total size of the cached pixel data exceeds the budget, the least
+    recently used surfaces are dropped.
+    """
+    def __init__(self, budget=64 * 1024 * 1024):
+        """Creates a new ImageCache with a budget in bytes."""
+        if budget < 0:
+            raise ValueError("budget must not be negative")
+        self.budget = budget
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # entries = {key: (SDL_Surface, size in bytes)}
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        """The amount of cached surfaces."""
+        return len(self._entries)
+
+    def __contains__(self, key):
+        """Checks, whether a surface for the passed key exists."""
+        return key in self._entries
+
+    @property
+    def hit_rate(self):
+        """The ratio of lookups, which found a cached surface."""
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+        return self.hits / float(lookups)
+
+    def get(self, key):
+        """Gets the cached SDL_Surface for the passed key or None."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries[key] = entry
+        return entry[0]
+
+    def put(self, key, imgsurface):
+        """Adds a SDL_Surface to the cache.
+
+        The SDL_Surface is owned by the cache afterwards and will be
+        freed, once it is dropped from it.
+        """
+        if not isinstance(imgsurface, surface.SDL_Surface):
+            raise TypeError("imgsurface must be a SDL_Surface")
+        bytesize = imgsurface.pitch * imgsurface.h
+        self._drop(key)
+        self._entries[key] = (imgsurface, bytesize)
+        self.total += bytesize
+        while self.total > self.budget and self._entries:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key):
+        """Removes the surface for the passed key."""
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        imgsurface, bytesize = entry
+        self.total -= bytesize
+        surface.SDL_FreeSurface(imgsurface)
+
+    def clear(self):
+        """Removes all surfaces from the cache."""
+        for key in list(self._entries):
+            self._drop(key)
+
+    def reset_stats(self):
+        """Resets the hit, miss and eviction counters."""
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
 
 
 def get_image_formats():
@@ -26,7 +134,7 @@ def get_image_formats():
             "png", "pnm", "ppm", "tga", "tif", "webp", "xcf", "xpm")
 
 
-def load_image(fname, enforce=None):
+def load_image(fname, enforce=None, pixelformat=None, cache=None):
     """Creates a SDL_Surface from an image file.
 
     This function makes use of the Python Imaging Library, if it is available
@@ -37,13 +145,46 @@ def load_image(fname, enforce=None):
     You can force the function to use only one of them, by passing the enforce
     as either "PIL" or "SDL".
 
+    If pixelformat is set to one of the SDL_PIXELFORMAT_* values, the
+    image will be converted to that format, so that blitting it onto
+    surfaces of the same format does not need any conversion.
+
+    cache can be an ImageCache, which keeps the decoded and converted
+    images by their path, modification time and size. The returned
+    surface is always a new copy, which has to be freed by the caller.
+
     Note: This will call sdl2.sdlimage.init() implicitly with the default
-    arguments, if the module is available and if sdl2.SDL_LoadBMP() failed to
-    load the image.
+    arguments once, if the module is available and if sdl2.SDL_LoadBMP()
+    failed to load the image.
     """
     if enforce is not None and enforce not in ("PIL", "SDL"):
         raise ValueError("enforce must be either 'PIL' or 'SDL', if set")
 
+    if cache is not None:
+        stat = os.stat(fname)
+        key = (os.path.abspath(fname), stat.st_mtime, stat.st_size, enforce,
+               pixelformat)
+        imgsurface = cache.get(key)
+        if imgsurface is not None:
+            return _copy_surface(imgsurface)
+
+    imgsurface = _load_image(fname, enforce)
+    if pixelformat is not None:
+        converted = surface.SDL_ConvertSurfaceFormat(imgsurface, pixelformat,
+                                                     0)
+        surface.SDL_FreeSurface(imgsurface)
+        if not converted:
+            raise SDLError()
+        imgsurface = converted.contents
+    if cache is not None:
+        copy = _copy_surface(imgsurface)
+        cache.put(key, imgsurface)
+        imgsurface = copy
+    return imgsurface
+
+
+def _load_image(fname, enforce):
+    """Decodes an image file into a SDL_Surface, see load_image()."""
     name = byteify(fname, "utf-8")
     if not _HASPIL and not _HASSDLIMAGE:
         imgsurface = surface.SDL_LoadBMP(name)
@@ -62,8 +203,7 @@ def load_image(fname, enforce=None):
 
     imgsurface = None
     if enforce != "PIL" and _HASSDLIMAGE:
-        sdlimage.IMG_Init(sdlimage.IMG_INIT_JPG | sdlimage.IMG_INIT_PNG |
-                          sdlimage.IMG_INIT_TIF | sdlimage.IMG_INIT_WEBP)
+        _init_sdlimage()
         imgsurface = sdlimage.IMG_Load(name)
         if not imgsurface:
             # An error occured - if we do not try PIL, break out now
@@ -0,0 +1,37 @@
+"""Command line tool to create resource packs.
+
+Usage: python -m sdl2.ext.mkpack [options] PACKFILE DIRECTORY
+"""
+import sys
+import optparse
+from .pack import create_pack
+
+
+def main(args=None):
+    """Creates a resource pack from the passed command line arguments."""
+    optparser = optparse.OptionParser(
+        prog="python -m sdl2.ext.mkpack",
+        usage="%prog [options] PACKFILE DIRECTORY")
+    optparser.add_option("-c", "--codec", type="choice",
+                         choices=["none", "zlib", "lz4"], default="zlib",
+                         help="compression codec for the members "
+                         "(default: zlib)")
+    optparser.add_option("-l", "--level", type="int", default=6,
+                         help="zlib compression level (default: 6)")
+    optparser.add_option("-a", "--align", type="int", default=4096,
+                         help="alignment of uncompressed members "
+                         "(default: 4096)")
+    optparser.add_option("-q", "--quiet", action="store_true", default=False,
+                         help="do not print the amount of packed files")
+    options, args = optparser.parse_args(args)
+    if len(args) != 2:
+        optparser.error("PACKFILE and DIRECTORY are required")
+    count = create_pack(args[0], args[1], options.codec, options.level,
+                        options.align)
+    if not options.quiet:
+        print("packed %d files into %s" % (count, args[0]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,249 @@
+"""Content-addressed resource packs with a sorted hash index."""
+import os
+import struct
+import hashlib
+import threading
+import zlib
+from bisect import bisect_left
+from .compat import *
+
+_HASLZ4 = True
+try:
+    import lz4.block
+except ImportError:
+    _HASLZ4 = False
+
+__all__ = ["PackFile", "create_pack", "is_packfile", "PACK_STORED",
+           "PACK_ZLIB", "PACK_LZ4"]
+
+PACK_STORED = 0
+PACK_ZLIB = 1
+PACK_LZ4 = 2
+
+_CODECS = {"none": PACK_STORED, "zlib": PACK_ZLIB, "lz4": PACK_LZ4}
+
+# header: magic, version, entry count, index offset, names offset
+_MAGIC = b"SDL2PACK"
+_VERSION = 1
+_HEADER = struct.Struct("<8sIIQQ")
+# index entry: path hash, data offset, stored size, size, codec
+_ENTRY = struct.Struct("<QQQQI4x")
+_NAMELEN = struct.Struct("<H")
+
+
+def _hash_name(name):
+    """Gets the 64-bit hash of a member name."""
+    return struct.unpack("<Q", hashlib.sha1(
+        name.encode("utf-8")).digest()[:8])[0]
+
+
+def _normalize(name):
+    """Normalizes the path separators of a member name."""
+    return name.replace(os.sep, "/").lstrip("/")
+
+
+def is_packfile(filename):
+    """Checks, if the passed file is a resource pack."""
+    try:
+        with open(filename, "rb") as fp:
+            return fp.read(len(_MAGIC)) == _MAGIC
+    except (IOError, OSError):
+        return False
+
+
+class PackFile(object):
+    """Read access to a resource pack.
+
+    Members are looked up via a binary search on the sorted hashes of
+    their full paths, without scanning any directories. Uncompressed
+    members are aligned to pages within the file, so that they can be
+    mapped into memory directly.
+    """
+    def __init__(self, filename):
+        """Opens the passed resource pack.
+
+        Raises a TypeError, if the file is not a resource pack.
+        """
+        self.filename = filename
+        self._lock = threading.Lock()
+        self._fp = open(filename, "rb")
+        try:
+            header = self._fp.read(_HEADER.size)
+            if len(header) != _HEADER.size or \
+                    not header.startswith(_MAGIC):
+                raise TypeError("file '%s' is not a resource pack" %
+                                filename)
+            magic, version, count, indexoffset, namesoffset = \
+                _HEADER.unpack(header)
+            if version != _VERSION:
+                raise TypeError("unsupported resource pack version %d" %
+                                version)
+            self._fp.seek(indexoffset)
+            index = self._fp.read(count * _ENTRY.size)
+            self._fp.seek(namesoffset)
+            names = self._fp.read()
+        except:
+            self._fp.close()
+            raise
+        unpack_from = _ENTRY.unpack_from
+        entries = [unpack_from(index, x * _ENTRY.size) for x in range(count)]
+        self._hashes = [entry[0] for entry in entries]
+        self._entries = [entry[1:] for entry in entries]
+        self._names = []
+        pos = 0
+        for x in range(count):
+            length = _NAMELEN.unpack_from(names, pos)[0]
+            pos += _NAMELEN.size
+            self._names.append(names[pos:pos + length].decode("utf-8"))
+            pos += length
+
+    def __len__(self):
+        """The amount of members."""
+        return len(self._names)
+
+    def __contains__(self, name):
+        """Checks, if the passed member exists."""
+        return self._find(name) is not None
+
+    def _find(self, name):
+        """Gets the position of the passed member in the index or None."""
+        name = _normalize(name)
+        key = _hash_name(name)
+        pos = bisect_left(self._hashes, key)
+        if pos < len(self._hashes) and self._hashes[pos] == key and \
+                self._names[pos] == name:
+            return pos
+        return None
+
+    def namelist(self):
+        """Gets the full paths of all members in the order of the index."""
+        return list(self._names)
+
+    def getinfo(self, name):
+        """Gets the (offset, stored size, size, codec) of the passed member.
+
+        Raises a KeyError, if the member could not be found.
+        """
+        pos = self._find(name)
+        if pos is None:
+            raise KeyError("'%s' not found in the resource pack" % name)
+        return self._entries[pos]
+
+    def data_range(self, name):
+        """Gets the (offset, size) of the data of the passed member within
+        the file or None, if the member is compressed.
+        """
+        offset, stored, size, codec = self.getinfo(name)
+        if codec != PACK_STORED:
+            return None
+        return offset, size
+
+    def read(self, name):
+        """Reads the data of the passed member.
+
+        Raises a KeyError, if the member could not be found.
+        """
+        offset, stored, size, codec = self.getinfo(name)
+        with self._lock:
+            self._fp.seek(offset)
+            data = self._fp.read(stored)
+        if codec == PACK_ZLIB:
+            data = zlib.decompress(data)
+        elif codec == PACK_LZ4:
+            if not _HASLZ4:
+                raise UnsupportedError(self.read,
+                                       "lz4 module could not be loaded")
+            data = lz4.block.decompress(data, uncompressed_size=size)
+        elif codec != PACK_STORED:
+            raise ValueError("unsupported codec %d" % codec)
+        if len(data) != size:
+            raise ValueError("corrupt member '%s'" % name)
+        return data
+
+    def close(self):
+        """Closes the resource pack."""
+        self._fp.close()
+
+
+def _compress(data, codec, level):
+    """Compresses the data with the passed codec.
+
+    Returns the codec and data to store. Data, which does not shrink by
+    at least an eighth, is stored uncompressed, so it can be mapped.
+    """
+    if codec == PACK_ZLIB:
+        packed = zlib.compress(data, level)
+    elif codec == PACK_LZ4:
+        packed = lz4.block.compress(data, store_size=False)
+    else:
+        return PACK_STORED, data
+    if len(packed) > len(data) - len(data) // 8:
+        return PACK_STORED, data
+    return codec, packed
+
+
+def create_pack(filename, path, codec="zlib", level=6, align=4096):
+    """Creates a resource pack from the files of a directory tree.
+
+    The members are named by their path relative to path, using '/' as
+    separator. Files with identical contents are stored only once.
+
+    codec can be "none", "zlib" or "lz4" and is used for all members,
+    which shrink by compressing them. level is the zlib compression
+    level. Uncompressed members are aligned to multiples of align bytes.
+    Returns the amount of members.
+    """
+    if codec not in _CODECS:
+        raise ValueError("unsupported codec '%s'" % codec)
+    codec = _CODECS[codec]
+    if codec == PACK_LZ4 and not _HASLZ4:
+        raise UnsupportedError(create_pack, "lz4 module could not be loaded")
+    root = os.path.abspath(path)
+    if not os.path.isdir(root):
+        raise ValueError("invalid path '%s'" % path)
+    members = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for fname in sorted(filenames):
+            fullpath = os.path.join(dirpath, fname)
+            if os.path.abspath(fullpath) == os.path.abspath(filename):
+                continue
+            members.append((_normalize(os.path.relpath(fullpath, root)),
+                            fullpath))
+
+    entries = {}
+    blobs = {}
+    with open(filename, "wb") as fp:
+        fp.write(b"\0" * _HEADER.size)
+        for name, fullpath in members:
+            key = _hash_name(name)
+            if key in entries:
+                raise ValueError("hash collision for '%s'" % name)
+            with open(fullpath, "rb") as src:
+                data = src.read()
+            digest = hashlib.sha1(data).digest()
+            blob = blobs.get(digest)
+            if blob is None:
+                mcodec, stored = _compress(data, codec, level)
+                offset = fp.tell()
+                if mcodec == PACK_STORED and align > 1:
+                    offset += -offset % align
+                    fp.seek(offset)
+                fp.write(stored)
+                blob = blobs[digest] = (offset, len(stored), len(data),
+                                        mcodec)
+            entries[key] = (name, blob)
+
+        order = sorted(entries)
+        indexoffset = fp.tell()
+        for key in order:
+            fp.write(_ENTRY.pack(key, *entries[key][1]))
+        namesoffset = fp.tell()
+        for key in order:
+            name = entries[key][0].encode("utf-8")
+            fp.write(_NAMELEN.pack(len(name)))
+            fp.write(name)
+        fp.seek(0)
+        fp.write(_HEADER.pack(_MAGIC, _VERSION, len(order), indexoffset,
+                              namesoffset))
+    return len(order)
@@ -1,15 +1,188 @@
 """Pixel-wise access routines."""
+import array
 import ctypes
-from .compat import UnsupportedError, experimental
+import struct
+from .compat import UnsupportedError
 from .array import MemoryView
 from ..surface import SDL_MUSTLOCK, SDL_LockSurface, SDL_UnlockSurface, \
     SDL_Surface
 from ..stdinc import Uint8
+from .. import endian
 from .sprite import SoftwareSprite
-from .draw import prepare_color
+from .draw import prepare_color, map_colors
 
 
-__all__ = ["PixelView", "pixels2d", "pixels3d"]
+__all__ = ["PixelView", "pixels2d", "pixels3d", "pixels_rgba",
+           "pixels_channels", "SurfacePixels", "surface_pixels"]
+
+
+def _get_surface(source):
+    """Gets the SDL_Surface from the passed source."""
+    if isinstance(source, SoftwareSprite):
+        return source.surface
+    elif isinstance(source, SDL_Surface):
+        return source
+    raise TypeError("source must be a Sprite or SDL_Surface")
+
+
+def _released(*args):
+    """Raises a ValueError for pixels being accessed after their surface
+    was unlocked.
+    """
+    raise ValueError("pixels are accessed after the surface was unlocked")
+
+
+# Buffer formats for the different pixel sizes.
+_FORMATS = {1: ("B", ctypes.c_ubyte),
+            2: ("H", ctypes.c_ushort),
+            3: ("B", ctypes.c_ubyte),
+            4: ("I" if struct.calcsize("I") == 4 else "L", ctypes.c_uint32),
+            }
+
+
+def _pixel_buffer(psurface):
+    """Gets a writable buffer of the pixels of the SDL_Surface, which is
+    indexed by pixels for 8, 16 and 32 bpp and by bytes for 24 bpp.
+    """
+    bpp = psurface.format.contents.BytesPerPixel
+    if bpp < 1 or bpp > 4:
+        raise ValueError("unsupported bpp")
+    fmt, ctype = _FORMATS[bpp]
+    srcsize = psurface.h * psurface.pitch
+    if hasattr(memoryview, "cast"):
+        buf = (ctypes.c_ubyte * srcsize).from_address(psurface.pixels)
+        return memoryview(buf).cast("B").cast(fmt)
+    # Python 2.x: ctypes arrays provide the same indexed access.
+    count = srcsize // ctypes.sizeof(ctype)
+    return (ctype * count).from_address(psurface.pixels)
+
+
+class _PixelAccess(object):
+    """Reads and writes the pixels of a SDL_Surface by their offset within
+    the pixel buffer.
+    """
+    unit = 1
+
+    def __init__(self, source, psurface):
+        self.source = source
+        self.format = psurface.format.contents
+        self.data = _pixel_buffer(psurface)
+        self.pitch = psurface.pitch // self.format.BytesPerPixel
+        self.released = False
+        if self.unit == 1:
+            self.get = self.data.__getitem__
+            self.set = self.data.__setitem__
+
+    def release(self):
+        """Marks the pixels as released, so that any further access raises
+        a ValueError.
+        """
+        self.released = True
+        self.get = self.set = _released
+
+    def setrow(self, offset, values):
+        """Sets the pixels starting at offset to the mapped values."""
+        if self.released:
+            _released()
+        data = self.data
+        if isinstance(data, memoryview):
+            values = array.array(data.format, values)
+        data[offset:offset + len(values)] = values
+
+
+class _PixelAccess24(_PixelAccess):
+    """Reads and writes the pixels of a 24 bpp SDL_Surface byte-wise."""
+    unit = 3
+
+    def __init__(self, source, psurface):
+        super(_PixelAccess24, self).__init__(source, psurface)
+        self.pitch = psurface.pitch
+        if endian.SDL_BYTEORDER == endian.SDL_LIL_ENDIAN:
+            self.shifts = (0, 8, 16)
+        else:
+            self.shifts = (16, 8, 0)
+
+    def get(self, offset):
+        data = self.data
+        s0, s1, s2 = self.shifts
+        return (data[offset] << s0) | (data[offset + 1] << s1) | \
+            (data[offset + 2] << s2)
+
+    def set(self, offset, value):
+        data = self.data
+        s0, s1, s2 = self.shifts
+        data[offset] = (value >> s0) & 0xFF
+        data[offset + 1] = (value >> s1) & 0xFF
+        data[offset + 2] = (value >> s2) & 0xFF
+
+    def setrow(self, offset, values):
+        """Sets the pixels starting at offset to the mapped values."""
+        if self.released:
+            _released()
+        for value in values:
+            self.set(offset, value)
+            offset += 3
+
+
+class _PixelRow(object):
+    """A row of pixels within a PixelView."""
+    __slots__ = ["_access", "_offset", "_len"]
+
+    def __init__(self, access, offset, length):
+        self._access = access
+        self._offset = offset
+        self._len = length
+
+    def __len__(self):
+        return self._len
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def __iter__(self):
+        access = self._access
+        if access.released:
+            _released()
+        if access.unit == 1:
+            return iter(access.data[self._offset:self._offset + self._len])
+        get = access.get
+        return (get(self._offset + x * 3) for x in range(self._len))
+
+    def _index(self, index):
+        if index < 0:
+            index += self._len
+        if index < 0 or index >= self._len:
+            raise IndexError("index '%d' is out of bounds for '%d'" %
+                             (index, self._len))
+        return self._offset + index * self._access.unit
+
+    def _slice(self, index):
+        start, stop, step = index.indices(self._len)
+        if step != 1:
+            raise IndexError("slicing with steps is not supported")
+        return _PixelRow(self._access,
+                         self._offset + start * self._access.unit,
+                         max(stop - start, 0))
+
+    def __getitem__(self, index):
+        if type(index) is slice:
+            return self._slice(index)
+        return self._access.get(self._index(index))
+
+    def __setitem__(self, index, value):
+        if type(index) is slice:
+            self._slice(index).assign(value)
+            return
+        access = self._access
+        access.set(self._index(index), prepare_color(value, access.format))
+
+    def assign(self, values):
+        """Sets the pixels of the row to the passed sequence of colors."""
+        if len(values) != self._len:
+            raise ValueError("value does not match the view strides")
+        pformat = self._access.format
+        self._access.setrow(self._offset,
+                            [prepare_color(v, pformat) for v in values])
 
 
 class PixelView(MemoryView):
@@ -17,12 +190,14 @@ class PixelView(MemoryView):
 
     The PixelView uses a y/x-layout. Accessing view[N] will operate on the
     Nth row of the underlying surface. To access a specific column within
-    that row, view[N][C] has to be used.
+    that row, view[N][C] has to be used. view[N, C] accesses the pixel
+    directly. Slices can be used to create views on parts of the surface,
+    e.g. view[y1:y2] for a range of rows or view[y1:y2, x1:x2] for a
+    rectangular area.
 
-    NOTE: The PixelView is implemented on top of the MemoryView class. As such
-    it makes heavy use of recursion to access rows and columns and can be
-    considered as slow in contrast to optimised ndim-array solutions such as
-    numpy.
+    The rows of the PixelView are created once and access the pixels
+    through the buffer protocol, so that reading and writing pixels does
+    not create any intermediate objects.
     """
     def __init__(self, source):
         """Creates a new PixelView from a Sprite or SDL_Surface.
@@ -31,59 +206,109 @@ class PixelView(MemoryView):
         The lock will be removed once the PixelView is garbage-collected or
         deleted.
         """
-        if isinstance(source, SoftwareSprite):
-            self._surface = source.surface
-            # keep a reference, so the Sprite's not GC'd
-            self._sprite = source
-        elif isinstance(source, SDL_Surface):
-            self._surface = source
-        else:
-            raise TypeError("source must be a Sprite or SDL_Surface")
-
+        self._surface = _get_surface(source)
+        self._pixels = None
         if SDL_MUSTLOCK(self._surface):
             SDL_LockSurface(self._surface)
+        self._init_view(source)
 
-        pxbuf = ctypes.cast(self._surface.pixels, ctypes.POINTER(Uint8))
+    def _init_view(self, source):
+        """Sets up the view for the already locked surface."""
+        if isinstance(source, SoftwareSprite):
+            # keep a reference, so the Sprite's not GC'd
+            self._sprite = source
+        self._parent = None
         itemsize = self._surface.format.contents.BytesPerPixel
+        pxbuf = ctypes.cast(self._surface.pixels, ctypes.POINTER(Uint8))
         strides = (self._surface.h, self._surface.w)
         srcsize = self._surface.h * self._surface.pitch
         super(PixelView, self).__init__(pxbuf, itemsize, strides,
-                                        getfunc=self._getitem,
-                                        setfunc=self._setitem,
                                         srcsize=srcsize)
+        if itemsize == 3:
+            self._access = _PixelAccess24(source, self._surface)
+        else:
+            self._access = _PixelAccess(source, self._surface)
+        self._setup(range(self._surface.h), 0, self._surface.w)
+
+    def _setup(self, ys, x, width):
+        """Creates the rows of the view for the passed surface rows,
+        starting at the surface column x.
+        """
+        access = self._access
+        pitch = access.pitch
+        first = x * access.unit
+        self._ys = ys
+        self._x = x
+        self._rows = [_PixelRow(access, y * pitch + first, width) for y in ys]
+        self._strides = (len(self._rows), width)
 
-    def _getitem(self, start, end):
-        if self.itemsize == 1:
-            # byte-wise access
-            return self.source[start:end]
-        # move the pointer to the correct location
-        src = ctypes.byref(self.source.contents, start)
-        casttype = ctypes.c_ubyte
-        if self.itemsize == 2:
-            casttype = ctypes.c_ushort
-        elif self.itemsize == 3:
-            # TODO
-            raise NotImplementedError("unsupported bpp")
-        elif self.itemsize == 4:
-            casttype = ctypes.c_uint
-        return ctypes.cast(src, ctypes.POINTER(casttype)).contents.value
-
-    def _setitem(self, start, end, value):
-        target = None
-        if self.itemsize == 1:
-            target = ctypes.cast(self.source, ctypes.POINTER(ctypes.c_ubyte))
-        elif self.itemsize == 2:
-            target = ctypes.cast(self.source, ctypes.POINTER(ctypes.c_ushort))
-        elif self.itemsize == 3:
-            # TODO
-            raise NotImplementedError("unsupported bpp")
-        elif self.itemsize == 4:
-            target = ctypes.cast(self.source, ctypes.POINTER(ctypes.c_uint))
-        value = prepare_color(value, self._surface)
-        target[start // self.itemsize] = value
+    def _subview(self, rows, cols):
+        """Creates a PixelView on the passed row and column slices."""
+        xstart, xstop, xstep = cols.indices(self._strides[1])
+        if xstep != 1:
+            raise IndexError("slicing with steps is not supported")
+        view = PixelView.__new__(PixelView)
+        view.__dict__.update(self.__dict__)
+        # The lock of the surface is owned by the topmost view.
+        view._parent = self._parent or self
+        view._setup(self._ys[rows], self._x + xstart, max(xstop - xstart, 0))
+        return view
+
+    def __len__(self):
+        return len(self._rows)
+
+    def __iter__(self):
+        return iter(self._rows)
+
+    def __repr__(self):
+        return repr([list(row) for row in self._rows])
+
+    def __getitem__(self, index):
+        """Returns the row, pixel or view at the specified index."""
+        if type(index) is tuple:
+            y, x = index
+            if type(y) is not slice and type(x) is not slice:
+                return self._rows[y][x]
+            if type(y) is not slice:
+                y = slice(y, (y + 1) or None)
+            if type(x) is not slice:
+                x = slice(x, (x + 1) or None)
+            return self._subview(y, x)
+        if type(index) is slice:
+            return self._subview(index, slice(None))
+        return self._rows[index]
+
+    def __setitem__(self, index, value):
+        """Sets the row, pixel or area at index to the specified value."""
+        if type(index) is tuple:
+            y, x = index
+            if type(y) is not slice:
+                # A single pixel or a slice of a row.
+                self._rows[y][x] = value
+                return
+            if type(x) is not slice:
+                # A single column of multiple rows.
+                rows = self._rows[y]
+                if len(value) != len(rows):
+                    raise ValueError("value does not match the view strides")
+                for row, rvalue in zip(rows, value):
+                    row[x] = rvalue
+                return
+        elif type(index) is not slice:
+            self._rows[index].assign(value)
+            return
+        view = self[index]
+        if len(value) != len(view):
+            raise ValueError("value does not match the view strides")
+        for row, rvalue in zip(view, value):
+            row.assign(rvalue)
 
     def __del__(self):
-        if self._surface is not None:
+        if getattr(self, "_parent", None) is not None or \
+                getattr(self, "_pixels", None) is not None:
+            # The lock is owned by the parent view or the SurfacePixels.
+            return
+        if getattr(self, "_surface", None) is not None:
             if SDL_MUSTLOCK(self._surface):
                 SDL_UnlockSurface(self._surface)
 
@@ -98,20 +323,72 @@ try:
         and pixels3d() to avoid the deletion of the source object.
         """
         def __new__(cls, shape, dtype=float, buffer_=None, offset=0,
-                    strides=None, order=None, source=None, surface=None):
+                    strides=None, order=None, source=None, surface=None,
+                    state=None):
             sfarray = numpy.ndarray.__new__(cls, shape, dtype, buffer_,
                                             offset, strides, order)
             sfarray._source = source
             sfarray._surface = surface
+            sfarray._state = state
+            sfarray._writeback = None
             return sfarray
 
         def __array_finalize__(self, sfarray):
             if sfarray is None:
                 return
             self._source = getattr(sfarray, '_source', None)
-            self._surface = getattr(sfarray, '_surface', None)
+            # Only the array created by pixels2d() or pixels3d() owns the
+            # lock of the surface.
+            self._surface = None
+            self._state = getattr(sfarray, '_state', None)
+            self._writeback = None
+
+        def _check_released(self):
+            if self._state is not None and self._state.released:
+                _released()
+
+        def __getitem__(self, index):
+            self._check_released()
+            return numpy.ndarray.__getitem__(self, index)
+
+        def __setitem__(self, index, value):
+            self._check_released()
+            numpy.ndarray.__setitem__(self, index, value)
+
+        def __array_ufunc__(self, ufunc, method, *inputs, **kwargs):
+            # Results of operations are plain arrays, which do not refer
+            # to the pixels of the surface.
+            args = []
+            for value in inputs:
+                if isinstance(value, SurfaceArray):
+                    value._check_released()
+                    value = value.view(numpy.ndarray)
+                args.append(value)
+            outputs = kwargs.get("out")
+            if outputs:
+                out = []
+                for value in outputs:
+                    if isinstance(value, SurfaceArray):
+                        value._check_released()
+                        value = value.view(numpy.ndarray)
+                    out.append(value)
+                kwargs["out"] = tuple(out)
+            result = getattr(ufunc, method)(*args, **kwargs)
+            if outputs and method != "at":
+                return outputs[0] if len(outputs) == 1 else outputs
+            return result
+
+        def __repr__(self):
+            self._check_released()
+            return numpy.ndarray.__repr__(self)
+
+        def __str__(self):
+            self._check_released()
+            return numpy.ndarray.__str__(self)
 
         def __del__(self):
+            if self._writeback is not None:
+                self._writeback(self)
             if self._surface:
                 if SDL_MUSTLOCK(self._surface):
                     SDL_UnlockSurface(self._surface)
@@ -120,62 +397,425 @@ except ImportError:
     _HASNUMPY = False
 
 
-@experimental
-def pixels2d(source):
-    """Creates a 2D pixel array from the passed source."""
-    if not _HASNUMPY:
-        raise UnsupportedError(pixels2d, "numpy module could not be loaded")
-    if isinstance(source, SoftwareSprite):
-        psurface = source.surface
-    elif isinstance(source, SDL_Surface):
-        psurface = source
-    else:
-        raise TypeError("source must be a Sprite or SDL_Surface")
+def _raw_array(source, psurface, state):
+    """Creates a (h, w, bpp) byte array for the pixels of the already
+    locked surface.
 
+    If no lock state is passed, the array will unlock the surface on
+    deletion.
+    """
     bpp = psurface.format.contents.BytesPerPixel
     if bpp < 1 or bpp > 4:
         raise ValueError("unsupported bpp")
-    strides = (psurface.pitch, bpp)
     srcsize = psurface.h * psurface.pitch
-    shape = psurface.h, psurface.w   # surface.pitch // bpp
+    owner = psurface if state is None else None
+    pxbuf = ctypes.cast(psurface.pixels,
+                        ctypes.POINTER(ctypes.c_ubyte * srcsize)).contents
+    return SurfaceArray((psurface.h, psurface.w, bpp), numpy.uint8, pxbuf,
+                        0, (psurface.pitch, bpp, 1), "C", source, owner,
+                        state)
 
+
+def _array2d(source, psurface, state=None):
+    """Creates a 2D pixel array for the already locked surface."""
+    bpp = psurface.format.contents.BytesPerPixel
+    if bpp == 3:
+        raise ValueError("24 bpp surfaces are not supported, use "
+                         "pixels3d() instead")
     dtypes = {1: numpy.uint8,
               2: numpy.uint16,
-              3: numpy.uint32,
               4: numpy.uint32
               }
+    raw = _raw_array(source, psurface, state)
+    return raw.view(dtypes[bpp])[:, :, 0].transpose()
+
+
+def _array3d(source, psurface, state=None):
+    """Creates a 3D pixel array for the already locked surface."""
+    return _raw_array(source, psurface, state).transpose(1, 0, 2)
+
+
+def _channel_offsets(pformat):
+    """Gets the byte offsets of the red, green, blue and alpha channel
+    within a pixel of the passed SDL_PixelFormat.
+
+    The offset of a missing channel is None. If a channel does not occupy
+    exactly one byte, None is returned.
+    """
+    if pformat.palette:
+        return None
+    bpp = pformat.BytesPerPixel
+    offsets = []
+    for mask, shift in ((pformat.Rmask, pformat.Rshift),
+                        (pformat.Gmask, pformat.Gshift),
+                        (pformat.Bmask, pformat.Bshift),
+                        (pformat.Amask, pformat.Ashift)):
+        if mask == 0:
+            offsets.append(None)
+            continue
+        if shift % 8 != 0 or (mask >> shift) != 0xFF:
+            return None
+        if endian.SDL_BYTEORDER == endian.SDL_LIL_ENDIAN:
+            offsets.append(shift // 8)
+        else:
+            offsets.append(bpp - 1 - shift // 8)
+    if None in offsets[:3]:
+        return None
+    return offsets
+
 
+def _read_rgba(psurface, raw):
+    """Converts the pixels of the passed raw array into RGBA values."""
+    pformat = psurface.format.contents
+    rgba = numpy.empty(raw.shape[:2] + (4,), dtype=numpy.uint8)
+    offsets = _channel_offsets(pformat)
+    if offsets is not None:
+        for idx, offset in enumerate(offsets):
+            if offset is None:
+                rgba[:, :, idx] = 0xFF
+            else:
+                rgba[:, :, idx] = raw[:, :, offset]
+        return rgba
+    values = _read_values(raw)
+    if pformat.palette:
+        palette = pformat.palette.contents
+        entries = ctypes.string_at(palette.colors, palette.ncolors * 4)
+        entries = numpy.frombuffer(entries, numpy.uint8).reshape(-1, 4)
+        rgba[:] = entries[numpy.minimum(values, len(entries) - 1)]
+        return rgba
+    for idx, (mask, shift) in enumerate(((pformat.Rmask, pformat.Rshift),
+                                         (pformat.Gmask, pformat.Gshift),
+                                         (pformat.Bmask, pformat.Bshift),
+                                         (pformat.Amask, pformat.Ashift))):
+        if mask == 0:
+            rgba[:, :, idx] = 0xFF
+            continue
+        # Expand the channel to the full byte range like SDL does.
+        vmax = mask >> shift
+        channel = (values & numpy.uint32(mask)) >> shift
+        rgba[:, :, idx] = (channel * 255 + vmax // 2) // vmax
+    return rgba
+
+
+def _read_values(raw):
+    """Gets the pixel values of the passed raw array as uint32 array."""
+    if raw.shape[2] == 3:
+        b0, b1, b2 = (raw[:, :, idx].astype(numpy.uint32) for idx in range(3))
+        if endian.SDL_BYTEORDER == endian.SDL_LIL_ENDIAN:
+            return b0 | (b1 << 8) | (b2 << 16)
+        return (b0 << 16) | (b1 << 8) | b2
+    dtype = {1: numpy.uint8, 2: numpy.uint16, 4: numpy.uint32}[raw.shape[2]]
+    return raw.view(dtype)[:, :, 0].astype(numpy.uint32)
+
+
+def _write_rgba(psurface, raw, rgba):
+    """Writes the passed RGBA values back to the raw array."""
+    pformat = psurface.format.contents
+    offsets = _channel_offsets(pformat)
+    if offsets is not None:
+        for idx, offset in enumerate(offsets):
+            if offset is not None:
+                raw[:, :, offset] = rgba[:, :, idx]
+        return
+    values = map_colors(pformat, rgba)
+    bpp = raw.shape[2]
+    if bpp == 3:
+        if endian.SDL_BYTEORDER == endian.SDL_LIL_ENDIAN:
+            shifts = (0, 8, 16)
+        else:
+            shifts = (16, 8, 0)
+        for idx, shift in enumerate(shifts):
+            raw[:, :, idx] = (values >> shift) & 0xFF
+    else:
+        dtype = {1: numpy.uint8, 2: numpy.uint16, 4: numpy.uint32}[bpp]
+        raw.view(dtype)[:, :, 0] = values
+
+
+class _RGBAWriteback(object):
+    """Writes the RGBA copy of a surface back to its pixels."""
+    def __init__(self, psurface, raw):
+        self.psurface = psurface
+        self.raw = raw
+
+    def __call__(self, rgba):
+        if self.raw is not None:
+            _write_rgba(self.psurface, self.raw, rgba)
+            self.raw = None
+
+
+def _array_rgba(source, psurface, state=None):
+    """Creates a (h, w, 4) RGBA array for the already locked surface.
+
+    If the channels of the surface are stored in RGBA or ABGR byte order,
+    the array is a view on the pixels. Otherwise it is a converted copy,
+    which is written back to the surface on deletion of the array or, if
+    a lock state is passed, on unlocking the surface.
+    """
+    raw = _raw_array(source, psurface, state)
+    offsets = _channel_offsets(psurface.format.contents)
+    if offsets is not None and None not in offsets:
+        if offsets == [0, 1, 2, 3]:
+            return raw[:, :, 0:4]
+        if offsets == [3, 2, 1, 0]:
+            return raw[:, :, 3::-1]
+    # The raw array must not unlock the surface before the copy is
+    # written back, so the copy owns the lock instead.
+    raw._surface = None
+    rgba = SurfaceArray(raw.shape[:2] + (4,), numpy.uint8, source=source,
+                        surface=psurface if state is None else None,
+                        state=state)
+    rgba[:] = _read_rgba(psurface, raw)
+    rgba._writeback = _RGBAWriteback(psurface, raw)
+    return rgba
+
+
+def _array_channels(source, psurface, state=None):
+    """Creates a (h, w) array for each of the red, green, blue and alpha
+    channel of the already locked surface.
+    """
+    offsets = _channel_offsets(psurface.format.contents)
+    if offsets is None:
+        raise ValueError("the color channels of the surface do not occupy "
+                         "whole bytes")
+    raw = _raw_array(source, psurface, state)
+    return tuple(raw[:, :, offset] if offset is not None else None
+                 for offset in offsets)
+
+
+def _locked_array(func, source, create):
+    """Locks the surface of the passed source and creates an array, which
+    unlocks it on deletion.
+    """
+    if not _HASNUMPY:
+        raise UnsupportedError(func, "numpy module could not be loaded")
+    psurface = _get_surface(source)
     if SDL_MUSTLOCK(psurface):
         SDL_LockSurface(psurface)
-    pxbuf = ctypes.cast(psurface.pixels,
-                        ctypes.POINTER(ctypes.c_ubyte * srcsize)).contents
-    return SurfaceArray(shape, dtypes[bpp], pxbuf, 0, strides, "C", source,
-                        psurface).transpose()
+    try:
+        return create(source, psurface)
+    except:
+        if SDL_MUSTLOCK(psurface):
+            SDL_UnlockSurface(psurface)
+        raise
+
+
+def pixels2d(source):
+    """Creates a 2D pixel array from the passed source.
+
+    The array has a x/y-layout and holds the pixel values of the source.
+    24 bpp surfaces are not supported.
+    """
+    return _locked_array(pixels2d, source, _array2d)
 
 
-@experimental
 def pixels3d(source):
     """Creates a 3D pixel array from the passed source.
+
+    The array has a x/y-layout and holds the bytes of each pixel in the
+    order, in which they are stored.
     """
-    if not _HASNUMPY:
-        raise UnsupportedError(pixels3d, "numpy module could not be loaded")
-    if isinstance(source, SoftwareSprite):
-        psurface = source.surface
-    elif isinstance(source, SDL_Surface):
-        psurface = source
-    else:
-        raise TypeError("source must be a Sprite or SDL_Surface")
+    return _locked_array(pixels3d, source, _array3d)
 
-    bpp = psurface.format.contents.BytesPerPixel
-    if bpp < 1 or bpp > 4:
-        raise ValueError("unsupported bpp")
-    strides = (psurface.pitch, bpp, 1)
-    srcsize = psurface.h * psurface.pitch
-    shape = psurface.h, psurface.w, bpp
 
+def pixels_rgba(source, copy=False):
+    """Creates a 3D RGBA array from the passed source.
+
+    The array has a y/x-layout and holds the red, green, blue and alpha
+    value of each pixel. If the pixel format stores the channels in RGBA
+    or ABGR byte order, the array is a view on the pixels. Otherwise it
+    is a converted copy, which is written back to the source, once the
+    array is deleted.
+
+    If copy is True, a plain numpy array with the RGBA values is returned,
+    which is neither bound to the source nor written back to it.
+    """
+    if not copy:
+        return _locked_array(pixels_rgba, source, _array_rgba)
+    if not _HASNUMPY:
+        raise UnsupportedError(pixels_rgba, "numpy module could not be loaded")
+    psurface = _get_surface(source)
     if SDL_MUSTLOCK(psurface):
         SDL_LockSurface(psurface)
-    pxbuf = ctypes.cast(psurface.pixels,
-                        ctypes.POINTER(ctypes.c_ubyte * srcsize)).contents
-    return SurfaceArray(shape, numpy.uint8, pxbuf, 0, strides, "C", source,
-                        psurface).transpose(1, 0, 2)
+    try:
+        return _read_rgba(psurface, _raw_array(source, psurface, _LockState()))
+    finally:
+        if SDL_MUSTLOCK(psurface):
+            SDL_UnlockSurface(psurface)
+
+
+def pixels_channels(source):
+    """Creates a 2D array for each color channel of the passed source.
+
+    Returns a (red, green, blue, alpha) tuple of arrays with a
+    y/x-layout, which view the channels of the pixels as derived from
+    the color masks of the source. If the source has no alpha channel,
+    alpha will be None. Each channel must occupy a whole byte.
+    """
+    return _locked_array(pixels_channels, source, _array_channels)
+
+
+# Amount of SurfacePixels users of each locked surface.
+_surfacelocks = {}
+
+
+class _LockState(object):
+    """Shared state of all views created during a single lock of a
+    SurfacePixels object.
+    """
+    __slots__ = ["released"]
+
+    def __init__(self):
+        self.released = False
+
+
+class SurfacePixels(object):
+    """Direct access to the pixels of a locked surface.
+
+    The surface is locked, when the SurfacePixels is entered in a with
+    statement or lock() is called, and unlocked, when the with statement
+    is left or unlock() is called. Locks of the same surface by multiple
+    SurfacePixels objects and nested locks are reference-counted, so that
+    the surface is only locked once and unlocked by the last user.
+
+    The views returned by view(), pixels2d(), pixels3d(), pixels_rgba()
+    and pixels_channels() access the pixels directly. They must not be
+    used after the surface was unlocked and raise a ValueError, if they
+    are.
+    """
+    def __init__(self, source):
+        """Creates a new SurfacePixels for a Sprite or SDL_Surface."""
+        self._surface = _get_surface(source)
+        self._source = source
+        self._count = 0
+        self._state = None
+        self._accesses = []
+        self._copies = []
+
+    def __enter__(self):
+        self.lock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.unlock()
+
+    @property
+    def surface(self):
+        """The SDL_Surface, whose pixels are accessed."""
+        return self._surface
+
+    @property
+    def locked(self):
+        """Indicates, whether the surface is locked by the SurfacePixels."""
+        return self._count > 0
+
+    def lock(self):
+        """Locks the surface for accessing its pixels."""
+        if self._count == 0:
+            key = ctypes.addressof(self._surface)
+            users = _surfacelocks.get(key, 0)
+            if users == 0 and SDL_MUSTLOCK(self._surface):
+                SDL_LockSurface(self._surface)
+            _surfacelocks[key] = users + 1
+            self._state = _LockState()
+        self._count += 1
+
+    def unlock(self):
+        """Unlocks the surface.
+
+        Once the surface is unlocked, the views created since lock() must
+        not be used anymore.
+        """
+        if self._count == 0:
+            raise ValueError("surface is not locked")
+        self._count -= 1
+        if self._count > 0:
+            return
+        for rgba in self._copies:
+            rgba._writeback(rgba)
+        self._copies = []
+        self._state.released = True
+        for access in self._accesses:
+            access.release()
+        self._accesses = []
+        key = ctypes.addressof(self._surface)
+        users = _surfacelocks.pop(key) - 1
+        if users > 0:
+            _surfacelocks[key] = users
+        elif SDL_MUSTLOCK(self._surface):
+            SDL_UnlockSurface(self._surface)
+
+    def _check_locked(self):
+        if self._count == 0:
+            raise ValueError("surface is not locked")
+
+    def view(self):
+        """Creates a PixelView for the locked surface."""
+        self._check_locked()
+        view = PixelView.__new__(PixelView)
+        view._surface = self._surface
+        view._pixels = self
+        view._init_view(self._source)
+        self._accesses.append(view._access)
+        return view
+
+    def pixels2d(self):
+        """Creates a 2D numpy array for the locked surface.
+
+        See pixels2d() for details.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(self.pixels2d,
+                                   "numpy module could not be loaded")
+        self._check_locked()
+        return _array2d(self._source, self._surface, self._state)
+
+    def pixels3d(self):
+        """Creates a 3D numpy array for the locked surface.
+
+        See pixels3d() for details.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(self.pixels3d,
+                                   "numpy module could not be loaded")
+        self._check_locked()
+        return _array3d(self._source, self._surface, self._state)
+
+    def pixels_rgba(self):
+        """Creates a 3D RGBA numpy array for the locked surface.
+
+        See pixels_rgba() for details. A converted copy is written back to
+        the surface on unlocking it.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(self.pixels_rgba,
+                                   "numpy module could not be loaded")
+        self._check_locked()
+        rgba = _array_rgba(self._source, self._surface, self._state)
+        if rgba._writeback is not None:
+            self._copies.append(rgba)
+        return rgba
+
+    def pixels_channels(self):
+        """Creates a 2D numpy array for each color channel of the locked
+        surface.
+
+        See pixels_channels() for details.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(self.pixels_channels,
+                                   "numpy module could not be loaded")
+        self._check_locked()
+        return _array_channels(self._source, self._surface, self._state)
+
+
+def surface_pixels(source):
+    """Creates a SurfacePixels for accessing the pixels of the passed
+    Sprite or SDL_Surface.
+
+    Usage:
+
+        with surface_pixels(sprite) as pixels:
+            view = pixels.view()
+            view[0][0] = 0xFFFFFFFF
+    """
+    return SurfacePixels(source)
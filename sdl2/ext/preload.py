@@ -0,0 +1,286 @@
+"""Parallel loading of resources on a pool of threads."""
+import os
+import threading
+from .common import SDLError
+from .compat import *
+from .events import EventHandler
+from .image import get_image_formats, _init_sdlimage
+from .sprite import SoftwareSprite
+from .. import surface
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+_HASSDLIMAGE = True
+try:
+    from .. import sdlimage
+except ImportError:
+    _HASSDLIMAGE = False
+
+_HASSDLMIXER = True
+try:
+    from .. import sdlmixer
+except ImportError:
+    _HASSDLMIXER = False
+
+try:
+    from multiprocessing import cpu_count
+except ImportError:
+    cpu_count = lambda: 2
+
+__all__ = ["Preloader"]
+
+_FONTTYPES = ("fon", "otf", "ttc", "ttf")
+_SOUNDTYPES = ("aif", "aiff", "flac", "it", "mid", "midi", "mod", "mp3",
+               "ogg", "opus", "s3m", "voc", "wav", "xm")
+_KINDS = ("image", "sound", "font", "data")
+
+
+def _get_kind(name):
+    """Guesses the kind of a resource from its file suffix."""
+    suffix = os.path.splitext(name)[1][1:].lower()
+    if suffix in get_image_formats():
+        return "image"
+    if suffix in _SOUNDTYPES:
+        return "sound"
+    if suffix in _FONTTYPES:
+        return "font"
+    return "data"
+
+
+def _free(kind, data):
+    """Frees the decoded data of a resource, which will not be used."""
+    if kind == "image":
+        surface.SDL_FreeSurface(data)
+    elif kind == "sound":
+        sdlmixer.Mix_FreeChunk(data)
+
+
+class Preloader(object):
+    """Loads the resources of a manifest on a pool of threads.
+
+    The files are read and decoded by worker threads, which run in
+    parallel, while SDL_image, SDL_mixer or zlib do the work. Objects,
+    which have to be created on the main thread, such as textures or
+    fonts, are created by update(), which hands over a bounded amount of
+    loaded resources on each call, so that it can be invoked once per
+    frame of a loading screen.
+    """
+    def __init__(self, resources, manifest, factory=None, fontmanager=None,
+                 threads=None, batchsize=16):
+        """Creates a new Preloader for the resources of the manifest.
+
+        resources is the Resources container to load the files from.
+        manifest is a sequence of resource names or (name, kind) tuples
+        with kind being one of "image", "sound", "font" or "data". If no
+        kind is passed, it is guessed from the file suffix. Each resource
+        name may only be listed once.
+
+        Images are turned into sprites by the passed SpriteFactory. If
+        no factory is passed, SoftwareSprite objects will be created.
+        Sounds are loaded as Mix_Chunk via SDL_mixer, which has to be
+        set up via Mix_OpenAudio() before. Fonts are added to the passed
+        FontManager and have to be plain files. Since the FontManager is
+        not thread-safe, the worker threads only locate the font files,
+        while opening them happens one after another on the main thread.
+        Data is loaded via Resources.get_buffer().
+
+        threads denotes the amount of worker threads and defaults to the
+        amount of CPUs. batchsize denotes the amount of resources, which
+        are handed over on each update().
+        """
+        self.resources = resources
+        self.factory = factory
+        self.fontmanager = fontmanager
+        self.batchsize = batchsize
+        self._threadcount = threads or cpu_count()
+        self._jobs = []
+        names = set()
+        for entry in manifest:
+            if isinstance(entry, tuple):
+                name, kind = entry
+            else:
+                name, kind = entry, _get_kind(entry)
+            if kind not in _KINDS:
+                raise ValueError("unsupported resource kind '%s'" % kind)
+            if kind == "sound" and not _HASSDLMIXER:
+                raise UnsupportedError(Preloader,
+                                       "sounds require sdlmixer support")
+            if kind == "font" and fontmanager is None:
+                raise ValueError("fonts require a FontManager")
+            if name in names:
+                raise ValueError("resource '%s' is listed twice" % name)
+            # Fail early on unknown resources.
+            resources.files[name]
+            names.add(name)
+            self._jobs.append((name, kind))
+
+        self.results = {}
+        self.errors = {}
+        self.loaded = EventHandler(self)
+        self._queue = None
+        self._done = queue.Queue()
+        self._cancelled = threading.Event()
+        self._threads = []
+        self._count = 0
+
+    @property
+    def total(self):
+        """The amount of resources to load."""
+        return len(self._jobs)
+
+    @property
+    def count(self):
+        """The amount of resources handed over so far."""
+        return self._count
+
+    @property
+    def progress(self):
+        """The fraction of resources handed over so far."""
+        if not self._jobs:
+            return 1.0
+        return float(self._count) / len(self._jobs)
+
+    @property
+    def cancelled(self):
+        """Indicates, whether loading was cancelled."""
+        return self._cancelled.is_set()
+
+    @property
+    def done(self):
+        """Indicates, whether all resources were handed over or loading
+        was cancelled."""
+        return self._count == len(self._jobs) or self.cancelled
+
+    def _decode(self, name, kind):
+        """Reads and decodes a resource on a worker thread."""
+        resources = self.resources
+        if kind == "image":
+            rw = resources.get_rwops(name)
+            if _HASSDLIMAGE:
+                imgsurface = sdlimage.IMG_Load_RW(rw, 1)
+            else:
+                imgsurface = surface.SDL_LoadBMP_RW(rw, 1)
+            if not imgsurface:
+                raise SDLError()
+            return imgsurface.contents
+        if kind == "sound":
+            chunk = sdlmixer.Mix_LoadWAV_RW(resources.get_rwops(name), 1)
+            if not chunk:
+                raise SDLError(sdlmixer.Mix_GetError())
+            return chunk
+        if kind == "font":
+            archive, ftype, pathname = resources.files[name]
+            if archive:
+                raise ValueError("fonts must be plain files")
+            return pathname
+        return resources.get_buffer(name)
+
+    def _finish(self, name, kind, data):
+        """Creates the object for a decoded resource on the main thread."""
+        if kind == "image":
+            if self.factory is not None:
+                return self.factory.from_surface(data, True)
+            return SoftwareSprite(data, True)
+        if kind == "font":
+            return self.fontmanager.add(data)
+        return data
+
+    def _work(self):
+        """Decodes resources until the queue is empty or loading was
+        cancelled."""
+        jobs = self._queue
+        while not self._cancelled.is_set():
+            try:
+                name, kind = jobs.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                data = self._decode(name, kind)
+            except Exception as exc:
+                self._done.put((name, kind, None, exc))
+            else:
+                self._done.put((name, kind, data, None))
+
+    def _hand_over(self, item):
+        """Hands a decoded resource over to the main thread."""
+        name, kind, data, error = item
+        self._count += 1
+        if error is None:
+            try:
+                obj = self._finish(name, kind, data)
+            except Exception as exc:
+                _free(kind, data)
+                error = exc
+        if error is not None:
+            self.errors[name] = error
+            return
+        self.results[name] = obj
+        self.loaded(name, obj)
+
+    def start(self):
+        """Starts loading the resources on the worker threads.
+
+        This is called implicitly by update() and wait().
+        """
+        if self._queue is not None:
+            return
+        if _HASSDLIMAGE:
+            _init_sdlimage()
+        self._queue = queue.Queue()
+        for job in self._jobs:
+            self._queue.put(job)
+        for x in range(min(self._threadcount, len(self._jobs))):
+            thread = threading.Thread(target=self._work)
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+
+    def update(self, maxitems=None):
+        """Hands over the resources loaded so far.
+
+        Creates the sprites and fonts for up to maxitems loaded
+        resources, which defaults to the batchsize, stores them in
+        results and invokes the loaded event for each of them. Resources
+        failing to load are stored with their exception in errors.
+        Returns the amount of resources handed over.
+        """
+        self.start()
+        if maxitems is None:
+            maxitems = self.batchsize
+        handed = 0
+        while handed < maxitems and not self.cancelled:
+            try:
+                item = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self._hand_over(item)
+            handed += 1
+        return handed
+
+    def wait(self):
+        """Loads and hands over all resources, blocking until all are
+        done."""
+        self.start()
+        while not self.done:
+            self._hand_over(self._done.get())
+
+    def cancel(self):
+        """Cancels loading the remaining resources.
+
+        Resources, which were decoded, but not handed over yet, will be
+        freed.
+        """
+        self._cancelled.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        while True:
+            try:
+                name, kind, data, error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            if error is None:
+                _free(kind, data)
@@ -0,0 +1,298 @@
+"""Color quantization of pixel data to indexed color palettes."""
+import ctypes
+from .compat import *
+from .common import SDLError
+from .color import ColorArray
+from .pixelaccess import pixels_rgba
+from .sprite import SoftwareSprite
+from .. import surface, pixels
+from ..surface import SDL_MUSTLOCK, SDL_LockSurface, SDL_UnlockSurface
+
+_HASNUMPY = True
+try:
+    import numpy
+except ImportError:
+    _HASNUMPY = False
+
+__all__ = ["PaletteQuantizer"]
+
+# Amount of lookup table cells per channel, see PaletteQuantizer.
+_LUTBITS = 5
+_LUTSHIFT = 8 - _LUTBITS
+_LUTSIZE = 1 << _LUTBITS
+
+# 4x4 Bayer threshold matrix for ordered dithering.
+_BAYER = ((0, 8, 2, 10),
+          (12, 4, 14, 6),
+          (3, 11, 1, 9),
+          (15, 7, 13, 5))
+
+
+def _get_surface(source):
+    """Gets the SDL_Surface from the passed source or None, if the source
+    is not a surface."""
+    if isinstance(source, SoftwareSprite):
+        return source.surface
+    elif isinstance(source, surface.SDL_Surface):
+        return source
+    return None
+
+
+class PaletteQuantizer(object):
+    """Maps colors to the nearest colors of an indexed color palette.
+
+    The PaletteQuantizer builds a lookup table once, which maps each
+    cell of a 32x32x32 grid over the RGB color space to the palette
+    entry closest to the cell's center. Pixels are mapped to the palette
+    by a single lookup, colors of the palette itself are always mapped to
+    their own entry. The alpha channel is ignored.
+    """
+    def __init__(self, palette):
+        """Creates a new PaletteQuantizer for the passed palette.
+
+        palette can be a sequence of Color-compatible values, such as the
+        palettes of sdl2.ext.colorpalettes, or a ColorArray.
+        """
+        if not _HASNUMPY:
+            raise UnsupportedError(PaletteQuantizer,
+                                   "numpy module could not be loaded")
+        self._palette = ColorArray(palette)
+        if len(self._palette) == 0:
+            raise ValueError("palette must not be empty")
+        rgb = self._palette.data[:, :3].astype(numpy.int32)
+        self._rgb = rgb
+        if len(rgb) <= 256:
+            self._dtype = numpy.uint8
+        else:
+            self._dtype = numpy.uint16
+
+        # Palette colors are looked up exactly, the first of duplicate
+        # entries wins like on searching the nearest color.
+        packed = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+        self._order = numpy.argsort(packed, kind="mergesort")
+        self._packed = packed[self._order]
+
+        grid = numpy.arange(_LUTSIZE, dtype=numpy.int32) << _LUTSHIFT
+        grid += 1 << (_LUTSHIFT - 1)
+        centers = numpy.stack(numpy.meshgrid(grid, grid, grid,
+                                             indexing="ij"), axis=-1)
+        centers = centers.reshape(-1, 3)
+        # |c - p|^2 = |c|^2 - 2 c.p + |p|^2, of which |c|^2 does not
+        # change the nearest palette entry of a cell center c.
+        fpalette = rgb.astype(numpy.float64)
+        self._fpalette = fpalette
+        self._norms = (fpalette ** 2).sum(axis=1)
+        dist = self._norms - 2 * numpy.dot(centers, fpalette.T)
+        self._lut = dist.argmin(axis=1).astype(self._dtype)
+        # Cells with more than one candidate entry, see _ambiguous_cells().
+        self._ambiguous = None
+
+    @property
+    def palette(self):
+        """The colors of the palette as ColorArray."""
+        return self._palette
+
+    def _lookup(self, rgb):
+        """Maps an (..., 3) int32 array of RGB values to palette
+        indices.
+        """
+        r = rgb[..., 0]
+        g = rgb[..., 1]
+        b = rgb[..., 2]
+        cells = ((r >> _LUTSHIFT) << (2 * _LUTBITS)) | \
+            ((g >> _LUTSHIFT) << _LUTBITS) | (b >> _LUTSHIFT)
+        indices = self._lut[cells]
+        packed = (r << 16) | (g << 8) | b
+        pos = numpy.searchsorted(self._packed, packed)
+        pos = numpy.minimum(pos, len(self._packed) - 1)
+        exact = self._packed[pos] == packed
+        indices[exact] = self._order[pos[exact]]
+        return indices
+
+    def _ordered(self, rgb):
+        """Maps the (h, w, 3) RGB array to palette indices using ordered
+        dithering.
+        """
+        h, w = rgb.shape[:2]
+        bayer = (numpy.array(_BAYER, dtype=numpy.float64) + 0.5) / 16 - 0.5
+        bayer = numpy.tile(bayer, ((h + 3) // 4, (w + 3) // 4))[:h, :w]
+        # The threshold spreads the colors by the average distance of
+        # the palette colors per channel.
+        spread = 256.0 / max(len(self._rgb), 2) ** (1.0 / 3.0)
+        rgb = rgb + (bayer * spread)[:, :, numpy.newaxis]
+        rgb = numpy.clip(numpy.rint(rgb), 0, 255).astype(numpy.int32)
+        return self._lookup(rgb)
+
+    def _ambiguous_cells(self):
+        """Gets a boolean array, which marks the cells of the lookup
+        table, that contain colors with different nearest palette
+        entries.
+        """
+        if self._ambiguous is not None:
+            return self._ambiguous
+        low = numpy.arange(_LUTSIZE, dtype=numpy.int32) << _LUTSHIFT
+        high = low + (1 << _LUTSHIFT) - 1
+        # The smallest and largest squared distance per channel between
+        # the values of a cell and each palette entry, (_LUTSIZE, n, 3).
+        rgb = self._rgb[numpy.newaxis]
+        below = low[:, numpy.newaxis, numpy.newaxis] - rgb
+        above = rgb - high[:, numpy.newaxis, numpy.newaxis]
+        mindist = numpy.maximum(numpy.maximum(below, above), 0) ** 2
+        maxdist = numpy.maximum(numpy.abs(below), numpy.abs(above)) ** 2
+        ambiguous = numpy.empty((_LUTSIZE, _LUTSIZE * _LUTSIZE), dtype=bool)
+        gbmin = (mindist[:, numpy.newaxis, :, 1] +
+                 mindist[numpy.newaxis, :, :, 2]).reshape(-1, len(rgb[0]))
+        gbmax = (maxdist[:, numpy.newaxis, :, 1] +
+                 maxdist[numpy.newaxis, :, :, 2]).reshape(-1, len(rgb[0]))
+        for r in range(_LUTSIZE):
+            cellmin = gbmin + mindist[r, :, 0]
+            cellmax = gbmax + maxdist[r, :, 0]
+            # Entries, which are closer at their farthest than another
+            # entry can be at its nearest, are the only candidates.
+            bound = cellmax.min(axis=1)[:, numpy.newaxis]
+            ambiguous[r] = (cellmin <= bound).sum(axis=1) > 1
+        self._ambiguous = ambiguous.reshape(-1)
+        return self._ambiguous
+
+    def _nearest(self, rgb):
+        """Maps an (n, 3) int32 array of RGB values to the indices of
+        their exact nearest palette entries.
+        """
+        cells = ((rgb[:, 0] >> _LUTSHIFT) << (2 * _LUTBITS)) | \
+            ((rgb[:, 1] >> _LUTSHIFT) << _LUTBITS) | (rgb[:, 2] >> _LUTSHIFT)
+        indices = self._lut[cells]
+        ambiguous = self._ambiguous_cells()[cells]
+        if ambiguous.any():
+            # The distances are exact, since all values are small
+            # integers, so that ties resolve to the first entry.
+            dist = self._norms - 2 * numpy.dot(rgb[ambiguous],
+                                               self._fpalette.T)
+            indices[ambiguous] = dist.argmin(axis=1)
+        return indices
+
+    def _floyd_steinberg(self, rgb):
+        """Maps the (h, w, 3) RGB array to palette indices using
+        Floyd-Steinberg dithering.
+
+        A pixel receives errors from its left neighbour and the three
+        pixels above it, so that all pixels with the same x + 2 * y are
+        independent of each other. Those anti-diagonals are processed
+        one after another, each in a single vectorized step.
+        """
+        h, w = rgb.shape[:2]
+        result = numpy.empty((h, w), dtype=self._dtype)
+        # The errors to diffuse with a padding row below and a padding
+        # column on each side.
+        errors = numpy.zeros((h + 1, w + 2, 3), dtype=numpy.float64)
+        palette = self._rgb
+        for diagonal in range(w + 2 * h - 2):
+            ys = numpy.arange(max(0, (diagonal - w + 2) // 2),
+                              min(h - 1, diagonal // 2) + 1)
+            xs = diagonal - 2 * ys
+            values = rgb[ys, xs] + errors[ys, xs + 1]
+            values = numpy.clip(numpy.rint(values), 0, 255)
+            values = values.astype(numpy.int32)
+            indices = self._nearest(values)
+            result[ys, xs] = indices
+            diff = values - palette[indices]
+            errors[ys, xs + 2] += diff * 0.4375
+            errors[ys + 1, xs] += diff * 0.1875
+            errors[ys + 1, xs + 1] += diff * 0.3125
+            errors[ys + 1, xs + 2] += diff * 0.0625
+        return result
+
+    def quantize(self, source, dither=None):
+        """Maps the colors of the passed source to palette indices.
+
+        source can be a SoftwareSprite, an SDL_Surface or an array-like
+        object of shape (..., 3) or (..., 4) with RGB(A) values. The
+        result is a numpy array of palette indices with the y/x-layout
+        of the surface or the shape of the array without its last
+        dimension.
+
+        dither can be None, "ordered" for ordered dithering or
+        "floyd-steinberg" for error diffusion. Error diffusion maps each
+        pixel to its exact nearest palette color, but has to process
+        the image in w + 2 * h sequential steps and is thus several
+        times slower than ordered dithering. Dithering requires the
+        source to be a surface or a 2D array of colors.
+        """
+        if _get_surface(source) is not None:
+            rgb = pixels_rgba(source, copy=True)[:, :, :3]
+        else:
+            rgb = numpy.asarray(source)
+            if rgb.ndim < 1 or rgb.shape[-1] not in (3, 4):
+                raise ValueError("source must be an array of RGB(A) values")
+            rgb = rgb[..., :3]
+        rgb = rgb.astype(numpy.int32)
+        if dither is None:
+            return self._lookup(rgb)
+        if rgb.ndim != 3:
+            raise ValueError("dithering requires a 2D array of colors")
+        if dither == "ordered":
+            return self._ordered(rgb)
+        if dither == "floyd-steinberg":
+            return self._floyd_steinberg(rgb)
+        raise ValueError("unsupported dither mode '%s'" % dither)
+
+    def set_palette(self, target):
+        """Sets the palette of the passed 8bpp SoftwareSprite or
+        SDL_Surface to the colors of the quantizer.
+        """
+        psurface = _get_surface(target)
+        if psurface is None:
+            raise TypeError("target must be a Sprite or SDL_Surface")
+        palette = psurface.format.contents.palette
+        if not palette:
+            raise ValueError("target must have a palette")
+        count = len(self._palette)
+        if count > palette.contents.ncolors:
+            raise ValueError("the palette of the target is too small")
+        colors = (pixels.SDL_Color * count)()
+        ctypes.memmove(colors, self._palette.data.tobytes(), count * 4)
+        if pixels.SDL_SetPaletteColors(palette, colors, 0, count) != 0:
+            raise SDLError()
+
+    def to_surface(self, source, dither=None, target=None):
+        """Quantizes the passed source into an 8bpp indexed SDL_Surface.
+
+        If no target is passed, a new SDL_Surface of the size of the
+        source will be created, which has to be freed by the caller.
+        Otherwise, target has to be an 8bpp SoftwareSprite or SDL_Surface
+        of the same size. The palette of the surface will be set to the
+        colors of the quantizer.
+
+        See quantize() for the supported sources and dither modes.
+        """
+        if len(self._palette) > 256:
+            raise ValueError("8bpp surfaces support up to 256 colors")
+        indices = self.quantize(source, dither)
+        if indices.ndim != 2:
+            raise ValueError("source must be a surface or a 2D array")
+        h, w = indices.shape
+        if target is None:
+            sf = surface.SDL_CreateRGBSurface(0, w, h, 8, 0, 0, 0, 0)
+            if not sf:
+                raise SDLError()
+            psurface = sf.contents
+        else:
+            psurface = _get_surface(target)
+            if psurface is None:
+                raise TypeError("target must be a Sprite or SDL_Surface")
+            if psurface.format.contents.BytesPerPixel != 1:
+                raise ValueError("target must be an 8bpp surface")
+            if (psurface.w, psurface.h) != (w, h):
+                raise ValueError("target must have the size of the source")
+        self.set_palette(psurface)
+        if SDL_MUSTLOCK(psurface):
+            SDL_LockSurface(psurface)
+        try:
+            pitch = psurface.pitch
+            pxbuf = ctypes.cast(psurface.pixels, ctypes.POINTER(
+                ctypes.c_ubyte * (pitch * h))).contents
+            dest = numpy.frombuffer(pxbuf, numpy.uint8).reshape(h, pitch)
+            dest[:, :w] = indices
+        finally:
+            if SDL_MUSTLOCK(psurface):
+                SDL_UnlockSurface(psurface)
+        return psurface
@@ -4,9 +4,20 @@ Resource management methods.
 import sys
 import os
 import re
+import json
+import struct
+import threading
 import zipfile
 import tarfile
+import zlib
 import io
+import mmap
+import ctypes
+from collections import OrderedDict
+from .common import SDLError
+from .compat import ISPYTHON2
+from .pack import PackFile, is_packfile
+from .. import rwops
 
 __all__ = ["open_zipfile", "open_tarfile", "open_url", "Resources"]
 
@@ -18,6 +29,248 @@ else:
     import urlparse
     import urllib2
 
+# Format version of the scan index files written by Resources.scan().
+_INDEXVERSION = 2
+
+
+def _listdir(path):
+    """Lists the files and directories of the passed directory.
+
+    Returns a list of (name, mtime, size) tuples for the files and a
+    list of names of the directories to descend into, both in the order
+    os.walk() would use.
+    """
+    files, dirs = [], []
+    if hasattr(os, "scandir"):
+        for entry in os.scandir(path):
+            try:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        dirs.append(entry.name)
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            files.append((entry.name, st.st_mtime, st.st_size))
+    else:
+        for name in os.listdir(path):
+            fullpath = os.path.join(path, name)
+            try:
+                if os.path.isdir(fullpath):
+                    if not os.path.islink(fullpath):
+                        dirs.append(name)
+                    continue
+                st = os.stat(fullpath)
+            except OSError:
+                continue
+            files.append((name, st.st_mtime, st.st_size))
+    return files, dirs
+
+
+def _load_index(filename):
+    """Loads the directory entries of a scan index file.
+
+    Returns an empty dict, if the file does not exist or cannot be read.
+    """
+    try:
+        with open(filename, "r") as fp:
+            data = json.load(fp)
+    except (IOError, OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != _INDEXVERSION:
+        return {}
+    return data.get("dirs", {})
+
+
+def _save_index(filename, dirs):
+    """Writes the directory entries to a scan index file."""
+    tmpname = "%s.%d.tmp" % (filename, os.getpid())
+    with open(tmpname, "w") as fp:
+        json.dump({"version": _INDEXVERSION, "dirs": dirs}, fp,
+                  separators=(",", ":"))
+    if hasattr(os, "replace"):
+        os.replace(tmpname, filename)
+    else:
+        if os.path.exists(filename):
+            os.remove(filename)
+        os.rename(tmpname, filename)
+
+
+# Size and layout of the local file header of a ZIP archive member.
+_ZIPHEADER = struct.Struct("<4s22xHH")
+_ZIPMAGIC = b"PK\x03\x04"
+
+
+def _zip_data_offset(fp, info):
+    """Gets the offset of the data of a ZIP archive member in the file."""
+    fp.seek(info.header_offset)
+    header = fp.read(_ZIPHEADER.size)
+    if len(header) != _ZIPHEADER.size:
+        raise zipfile.BadZipfile("truncated file header")
+    magic, namelen, extralen = _ZIPHEADER.unpack(header)
+    if magic != _ZIPMAGIC:
+        raise zipfile.BadZipfile("bad magic number for file header")
+    return info.header_offset + _ZIPHEADER.size + namelen + extralen
+
+
+class _ArchiveHandle(object):
+    """An open ZIP, TAR or pack archive with a lookup table of its
+    members."""
+    def __init__(self, filename, ftype):
+        self.lock = threading.Lock()
+        self.offsets = {}
+        self.users = 0
+        self.closed = False
+        if ftype == 'pack':
+            # Packs have a sorted index of their own.
+            self.archive = PackFile(filename)
+            self.members = None
+        elif ftype == 'zip':
+            self.archive = zipfile.ZipFile(filename, 'r')
+            self.members = dict((info.filename, info) for info in
+                                self.archive.infolist())
+        else:
+            mode = 'r'
+            if ftype in ('targz', 'tarbz2'):
+                mode = "r:%s" % ftype[3:]
+            elif ftype != 'tar':
+                raise ValueError("unsupported archive type")
+            self.archive = tarfile.open(filename, mode)
+            # Later members replace earlier ones of the same name, like
+            # on TarFile.getmember().
+            self.members = dict((info.name, info) for info in
+                                self.archive.getmembers())
+        self.ftype = ftype
+
+    def _get_member(self, pathname):
+        """Gets the ZipInfo or TarInfo of the passed archive member."""
+        info = self.members.get(pathname)
+        if info is None:
+            raise KeyError("'%s' not found in the archive" % pathname)
+        return info
+
+    def _data_offset(self, pathname, info):
+        """Gets the offset of the data of the passed ZIP archive member.
+
+        This must be called with the lock being held.
+        """
+        offset = self.offsets.get(pathname)
+        if offset is None:
+            offset = _zip_data_offset(self.archive.fp, info)
+            self.offsets[pathname] = offset
+        return offset
+
+    def data_range(self, pathname):
+        """Gets the (offset, size) of the data of the passed archive
+        member within the archive file.
+
+        Returns None, if the member is not stored uncompressed within a
+        ZIP archive or pack.
+        """
+        if self.ftype == 'pack':
+            return self.archive.data_range(pathname)
+        info = self._get_member(pathname)
+        if self.ftype != 'zip' or info.flag_bits & 0x1 or \
+                info.compress_type != zipfile.ZIP_STORED:
+            return None
+        with self.lock:
+            return self._data_offset(pathname, info), info.file_size
+
+    def read(self, pathname):
+        """Reads the data of the passed archive member."""
+        if self.ftype == 'pack':
+            return self.archive.read(pathname)
+        info = self._get_member(pathname)
+        if self.ftype != 'zip':
+            with self.lock:
+                return self.archive.extractfile(info).read()
+        compression = info.compress_type
+        if info.flag_bits & 0x1 or compression not in (zipfile.ZIP_STORED,
+                                                       zipfile.ZIP_DEFLATED):
+            with self.lock:
+                return self.archive.read(info)
+        with self.lock:
+            fp = self.archive.fp
+            fp.seek(self._data_offset(pathname, info))
+            data = fp.read(info.compress_size)
+        if compression == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -15)
+        if zlib.crc32(data) & 0xFFFFFFFF != info.CRC:
+            raise zipfile.BadZipfile("bad CRC-32 for file '%s'" % pathname)
+        return data
+
+
+class _ArchivePool(object):
+    """A bounded pool of open archives, which closes the least recently
+    used archives, if more than maxsize archives are open."""
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._handles = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _release(self, handle):
+        """Releases a handle acquired via _acquire()."""
+        with self._lock:
+            handle.users -= 1
+            if handle.closed and handle.users == 0:
+                handle.archive.close()
+
+    def _drop(self, handle):
+        """Marks a handle as closed and closes it, if it is not in use."""
+        handle.closed = True
+        if handle.users == 0:
+            handle.archive.close()
+
+    def _acquire(self, filename, ftype):
+        """Gets an open handle for the passed archive, which has to be
+        released via _release()."""
+        key = (filename, ftype)
+        with self._lock:
+            handle = self._handles.pop(key, None)
+            if handle is None:
+                handle = _ArchiveHandle(filename, ftype)
+                while self._handles and len(self._handles) >= self.maxsize:
+                    self._drop(self._handles.popitem(last=False)[1])
+            if self.maxsize > 0:
+                self._handles[key] = handle
+            else:
+                handle.closed = True
+            handle.users += 1
+        return handle
+
+    def read(self, filename, ftype, pathname):
+        """Reads a member of the passed archive."""
+        handle = self._acquire(filename, ftype)
+        try:
+            return handle.read(pathname)
+        finally:
+            self._release(handle)
+
+    def data_range(self, filename, ftype, pathname):
+        """Gets the location of a member of the passed archive, see
+        _ArchiveHandle.data_range()."""
+        handle = self._acquire(filename, ftype)
+        try:
+            return handle.data_range(pathname)
+        finally:
+            self._release(handle)
+
+    def discard(self, filename):
+        """Closes all handles of the passed archive."""
+        with self._lock:
+            for key in list(self._handles):
+                if key[0] == filename:
+                    self._drop(self._handles.pop(key))
+
+    def close(self):
+        """Closes all archives."""
+        with self._lock:
+            while self._handles:
+                self._drop(self._handles.popitem()[1])
+
+    def __len__(self):
+        return len(self._handles)
+
 
 def open_zipfile(archive, filename, directory=None):
     """Opens and reads a certain file from a ZIP archive.
@@ -127,16 +380,21 @@ class Resources(object):
     accessing them by using relative paths, scanning archives
     automatically and so on.
     """
-    def __init__(self, path=None, subdir=None, excludepattern=None):
+    def __init__(self, path=None, subdir=None, excludepattern=None,
+                 index=None, maxarchives=8):
         """Creates a new resource container instance.
 
         If path is provided, the resource container will scan the path
         and add all found files to itself by invoking
-        scan(path, subdir, excludepattern).
+        scan(path, subdir, excludepattern, index).
+
+        maxarchives denotes the amount of archives, which are kept open
+        for subsequent get() calls.
         """
         self.files = {}
+        self._archives = _ArchivePool(maxarchives)
         if path:
-            self.scan(path, subdir, excludepattern)
+            self.scan(path, subdir, excludepattern, index)
 
     def _scanzip(self, filename):
         """Scans the passed ZIP archive and indexes all the files
@@ -152,6 +410,20 @@ class Resources(object):
                 self.files[fname] = (archname, 'zip', path)
         zipf.close()
 
+    def _scanpack(self, filename):
+        """Scans the passed pack and indexes all the files contained by
+        it.
+        """
+        if not is_packfile(filename):
+            raise TypeError("file '%s' is not a valid pack" % filename)
+        archname = os.path.abspath(filename)
+        pack = PackFile(filename)
+        for path in pack.namelist():
+            entry = (archname, 'pack', path)
+            self.files[os.path.split(path)[1]] = entry
+            self.files[path] = entry
+        pack.close()
+
     def _scantar(self, filename, ftype=None):
         """Scans the passed TAR archive and indexes all the files
         contained by it.
@@ -182,7 +454,9 @@ class Resources(object):
         """
         if not os.path.exists(filename):
             raise ValueError("invalid file path")
-        if zipfile.is_zipfile(filename):
+        if is_packfile(filename):
+            self.add_archive(filename, 'pack')
+        elif zipfile.is_zipfile(filename):
             self.add_archive(filename)
         elif tarfile.is_tarfile(filename):
             self.add_archive(filename, 'tar')
@@ -211,8 +485,11 @@ class Resources(object):
         """
         if not os.path.exists(filename):
             raise ValueError("invalid file path")
+        self._archives.discard(os.path.abspath(filename))
         if typehint == 'zip':
             self._scanzip(filename)
+        elif typehint == 'pack':
+            self._scanpack(filename)
         elif typehint == 'tar':
             self._scantar(filename)
         elif typehint == 'tarbz2':
@@ -222,27 +499,102 @@ class Resources(object):
         else:
             raise ValueError("unsupported archive type")
 
+    def _read(self, filename):
+        """Reads the data of the passed file."""
+        archive, ftype, pathname = self.files[filename]
+        if archive:
+            return self._archives.read(archive, ftype, pathname)
+        with open(pathname, 'rb') as fp:
+            return fp.read()
+
+    def _map(self, filename, access):
+        """Maps the data of the passed file into memory.
+
+        Returns a (mapping, start, size) tuple with start being the
+        offset of the data within the mapping or None, if the file is
+        empty or not stored uncompressed.
+        """
+        archive, ftype, pathname = self.files[filename]
+        offset, size = 0, None
+        if archive:
+            if ftype not in ('zip', 'pack'):
+                return None
+            datarange = self._archives.data_range(archive, ftype, pathname)
+            if datarange is None:
+                return None
+            offset, size = datarange
+            pathname = archive
+        with open(pathname, 'rb') as fp:
+            if size is None:
+                size = os.fstat(fp.fileno()).st_size
+            if size == 0:
+                return None
+            # Mappings have to start at a multiple of the allocation
+            # granularity.
+            start = offset % mmap.ALLOCATIONGRANULARITY
+            mapped = mmap.mmap(fp.fileno(), start + size, access=access,
+                               offset=offset - start)
+        return mapped, start, size
+
     def get(self, filename):
         """Gets a specific file from the Resources.
 
+        Archives are kept open after reading a file, so that subsequent
+        calls do not need to open and scan them again. This is safe to
+        be used from multiple threads.
+
         Raises a KeyError, if filename could not be found.
         """
-        archive, ftype, pathname = self.files[filename]
-        if archive:
-            if ftype == 'zip':
-                return open_zipfile(archive, pathname)
-            elif ftype == 'tar':
-                return open_tarfile(archive, pathname)
-            elif ftype == 'tarbz2':
-                return open_tarfile(archive, pathname, ftype='bz2')
-            elif ftype == 'targz':
-                return open_tarfile(archive, pathname, ftype='gz')
-            else:
-                raise ValueError("unsupported archive type")
-        dmpdata = open(pathname, 'rb')
-        data = io.BytesIO(dmpdata.read())
-        dmpdata.close()
-        return data
+        return io.BytesIO(self._read(filename))
+
+    def get_buffer(self, filename):
+        """Gets the data of a specific file as read-only memoryview.
+
+        Plain files and uncompressed members of ZIP archives are mapped
+        into memory instead of being read, so that their data is not
+        copied. The mapping is released, once the memoryview is not used
+        anymore. On Python 2.x, the data is always read, since mappings
+        do not support memoryview objects there.
+
+        Raises a KeyError, if filename could not be found.
+        """
+        mapping = None
+        if not ISPYTHON2:
+            mapping = self._map(filename, mmap.ACCESS_READ)
+        if mapping is None:
+            return memoryview(self._read(filename))
+        mapped, start, size = mapping
+        return memoryview(mapped)[start:start + size]
+
+    def get_rwops(self, filename):
+        """Gets the data of a specific file as SDL_RWops.
+
+        Like get_buffer(), plain files and uncompressed members of ZIP
+        archives are mapped into memory instead of being read.
+
+        The data is only kept alive by the returned SDL_RWops object, so
+        exactly that object has to be kept around, while SDL is using it,
+        e.g. if it is passed to a function with freesrc being 0.
+
+        Raises a KeyError, if filename could not be found.
+        """
+        # Copy-on-write mappings are writable for ctypes, but never
+        # change the file.
+        mapping = self._map(filename, mmap.ACCESS_COPY)
+        if mapping is None:
+            data = self._read(filename)
+            if not data:
+                # SDL does not accept empty memory buffers.
+                return ctypes.pointer(rwops.rw_from_object(io.BytesIO()))
+            buf = (ctypes.c_ubyte * len(data)).from_buffer_copy(data)
+        else:
+            mapped, start, size = mapping
+            buf = (ctypes.c_ubyte * size).from_buffer(mapped, start)
+        rw = rwops.SDL_RWFromConstMem(buf, len(buf))
+        if not rw:
+            raise SDLError()
+        rw._buffer = buf
+        return rw
 
     def get_filelike(self, filename):
         """Like get(), but tries to return the original file handle, if
@@ -255,16 +607,7 @@ class Resources(object):
         """
         archive, ftype, pathname = self.files[filename]
         if archive:
-            if ftype == 'zip':
-                return open_zipfile(archive, pathname)
-            elif ftype == 'tar':
-                return open_tarfile(archive, pathname)
-            elif ftype == 'tarbz2':
-                return open_tarfile(archive, pathname, ftype='bz2')
-            elif ftype == 'targz':
-                return open_tarfile(archive, pathname, ftype='gz')
-            else:
-                raise ValueError("unsupported archive type")
+            return io.BytesIO(self._archives.read(archive, ftype, pathname))
         return open(pathname, 'rb')
 
     def get_path(self, filename):
@@ -280,7 +623,100 @@ class Resources(object):
             return '%s@%s' % (pathname, archive)
         return pathname
 
-    def scan(self, path, subdir=None, excludepattern=None):
+    def close(self):
+        """Closes the archives kept open by get() and get_filelike()."""
+        self._archives.close()
+
+    def _index_file(self, filename):
+        """Determines the archive type and members of the passed file.
+
+        Returns a (kind, members) tuple with kind being None for plain
+        files and 'pack', 'zip' or 'tar' for archives.
+        """
+        if is_packfile(filename):
+            pack = PackFile(filename)
+            members = pack.namelist()
+            pack.close()
+            return 'pack', members
+        if zipfile.is_zipfile(filename):
+            zipf = zipfile.ZipFile(filename, 'r')
+            members = zipf.namelist()
+            zipf.close()
+            return 'zip', members
+        if tarfile.is_tarfile(filename):
+            tar = tarfile.open(filename, 'r')
+            members = tar.getnames()
+            tar.close()
+            return 'tar', members
+        return None, None
+
+    def _index_dir(self, dirpath, entry):
+        """Gets the up-to-date index entry of a directory.
+
+        entry is the previous index entry of the directory or None. Only
+        files, which changed since then, are inspected again.
+        """
+        files = {}
+        if entry is not None:
+            for item in entry["files"]:
+                files[item[0]] = item
+        listing, dirs = _listdir(dirpath)
+        items = []
+        for name, mtime, size in listing:
+            item = files.get(name)
+            if item is None or item[1] != mtime or item[2] != size:
+                kind, members = self._index_file(os.path.join(dirpath, name))
+                item = [name, mtime, size, kind, members]
+            items.append(item)
+        return {"files": items, "dirs": dirs}
+
+    def _add_indexed(self, dirpath, items):
+        """Adds the indexed files of a directory to the container."""
+        files = self.files
+        for name, mtime, size, kind, members in items:
+            fullpath = os.path.join(dirpath, name)
+            if kind is None:
+                files[name] = (None, None, fullpath)
+            elif kind == 'zip':
+                for path in members:
+                    fname = os.path.split(path)[1]
+                    if fname:
+                        files[fname] = (fullpath, 'zip', path)
+            elif kind == 'pack':
+                for path in members:
+                    entry = (fullpath, kind, path)
+                    files[os.path.split(path)[1]] = entry
+                    files[path] = entry
+            else:
+                for path in members:
+                    files[os.path.split(path)[1]] = (fullpath, kind, path)
+
+    def _scan_indexed(self, abspath, match, index):
+        """Scans a directory tree using the scan index file."""
+        cached = _load_index(index)
+        visited = {}
+        stack = [abspath]
+        while stack:
+            dirpath = stack.pop()
+            try:
+                entry = self._index_dir(dirpath, cached.get(dirpath))
+            except OSError:
+                continue
+            visited[dirpath] = entry
+            if not (match and match(dirpath) is not None):
+                self._add_indexed(dirpath, entry["files"])
+            # Descend in the order of os.walk().
+            for name in reversed(entry["dirs"]):
+                stack.append(os.path.join(dirpath, name))
+        # Keep the entries of other trees sharing the index.
+        prefix = os.path.join(abspath, "")
+        entries = dict((key, value) for key, value in cached.items()
+                       if key != abspath and not key.startswith(prefix))
+        entries.update(visited)
+        if entries != cached:
+            _save_index(index, entries)
+
+    def scan(self, path, subdir=None, excludepattern=None, index=None):
         """Scans a path and adds all found files to the Resources
         container.
 
@@ -296,6 +732,13 @@ class Resources(object):
 
         excludepattern can be a regular expression to skip directories, which
         match the pattern.
+
+        index can be the path of a scan index file, which keeps the
+        directory listings and archive contents of the scanned tree. On
+        subsequent scans, only files, whose modification time or size
+        changed, will be inspected again. The index file will be created,
+        if it does not exist, and should be located outside of the
+        scanned tree.
         """
         match = None
         if excludepattern:
@@ -311,6 +754,9 @@ class Resources(object):
             abspath = os.path.join(abspath, subdir)
         if not os.path.exists(abspath):
             raise ValueError("invalid path '%s'" % path)
+        if index is not None:
+            self._scan_indexed(abspath, match, index)
+            return
         for (pdir, dirnames, filenames) in os.walk(abspath):
             if match and match(pdir) is not None:
                 continue
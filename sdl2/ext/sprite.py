@@ -1,6 +1,8 @@
 """Sprite, texture and pixel surface routines."""
 import abc
-from ctypes import byref, cast, POINTER, c_int, c_float
+import weakref
+from itertools import count
+from ctypes import byref, cast, addressof, POINTER, c_int, c_float
 from .common import SDLError
 from .compat import *
 from .color import convert_to_color
@@ -13,7 +15,8 @@ from ..stdinc import Uint8, Uint32
 
 __all__ = ["Sprite", "SoftwareSprite", "TextureSprite", "SpriteFactory",
            "SoftwareSpriteRenderSystem", "SpriteRenderSystem",
-           "TextureSpriteRenderSystem", "Renderer", "TEXTURE", "SOFTWARE"]
+           "TextureSpriteRenderSystem", "Renderer", "TextureRegistry",
+           "texture_sortkey", "TEXTURE", "SOFTWARE"]
 
 TEXTURE = 0
 SOFTWARE = 1
@@ -47,6 +50,7 @@ class Renderer(object):
             self.rendertarget = target
         else:
             raise TypeError("unsupported target type")
+        self.textures = TextureRegistry(self)
 
         if logical_size is not None:
             self.logical_size = logical_size
@@ -131,10 +135,18 @@ class Renderer(object):
         if ret == -1:
             raise SDLError()
 
-    def copy(self, src, srcrect=None, dstrect=None):
-        """Copies (blits) the passed source to the target of the Renderer."""
+    def copy(self, src, srcrect=None, dstrect=None, angle=0, center=None,
+             flip=render.SDL_FLIP_NONE):
+        """Copies (blits) the passed source to the target of the Renderer.
+
+        If angle is not 0 or flip is not SDL_FLIP_NONE, the source will
+        be rotated by angle degrees around center (or the center of
+        dstrect, if center is None) and flipped accordingly.
+        """
         SDL_Rect = rect.SDL_Rect
         if isinstance(src, TextureSprite):
+            if src._registry is not None:
+                src._registry.touch(src)
             texture = src.texture
         elif isinstance(src, render.SDL_Texture):
             texture = src
@@ -146,7 +158,14 @@ class Renderer(object):
         if dstrect is not None:
             x, y, w, h = dstrect
             dstrect = SDL_Rect(x, y, w, h)
-        ret = render.SDL_RenderCopy(self.renderer, texture, srcrect, dstrect)
+        if angle == 0 and flip == render.SDL_FLIP_NONE:
+            ret = render.SDL_RenderCopy(self.renderer, texture, srcrect,
+                                        dstrect)
+        else:
+            if center is not None:
+                center = rect.SDL_Point(center[0], center[1])
+            ret = render.SDL_RenderCopyEx(self.renderer, texture, srcrect,
+                                          dstrect, angle, center, flip)
         if ret == -1:
             raise SDLError()
 
@@ -379,6 +398,16 @@ class TextureSprite(Sprite):
         if ret == -1:
             raise SDLError()
         self._size = w.value, h.value
+        self.angle = 0.0
+        self.flip = render.SDL_FLIP_NONE
+        self.center = None
+        self.color_mod = (255, 255, 255)
+        self.alpha_mod = 255
+        # The modulation currently set on the texture.
+        self._texmod = ((255, 255, 255), 255)
+        # Set by the TextureRegistry the sprite is registered with.
+        self._registry = None
+        self._lastdraw = 0
 
     def __del__(self):
         """Releases the bound SDL_Texture."""
@@ -404,6 +433,205 @@ class TextureSprite(Sprite):
             (flags.value, access.value, (w.value, h.value))
 
 
+def _texture_bytesize(texture):
+    """Calculates the size in bytes of the pixel data of a SDL_Texture."""
+    fmt = Uint32()
+    access = c_int()
+    w = c_int()
+    h = c_int()
+    ret = render.SDL_QueryTexture(texture, byref(fmt), byref(access),
+                                  byref(w), byref(h))
+    if ret == -1:
+        raise SDLError()
+    fmt, w, h = fmt.value, w.value, h.value
+    if pixels.SDL_ISPIXELFORMAT_FOURCC(fmt) and \
+            pixels.SDL_BYTESPERPIXEL(fmt) == 1:
+        # Planar YUV: a full Y plane and two U/V planes at a quarter size.
+        return w * h + 2 * ((w + 1) // 2) * ((h + 1) // 2)
+    return pixels.SDL_BYTESPERPIXEL(fmt) * w * h
+
+
+class TextureRegistry(object):
+    """Keeps track of the memory used by the textures of a Renderer.
+
+    Every TextureSprite created by a SpriteFactory for a Renderer is
+    registered with the Renderer's TextureRegistry under a category
+    denoting its origin, such as "image", "color" or "text". The
+    TextureRegistry does not keep the TextureSprite objects alive.
+
+    If a budget is set, the textures of the least recently drawn
+    TextureSprite objects are destroyed, as long as the total size
+    exceeds the budget. Only textures, which can be recreated from
+    their source, are evicted. They are recreated, once the
+    TextureSprite is drawn again.
+    """
+    def __init__(self, renderer, budget=None):
+        """Creates a new TextureRegistry for the passed Renderer.
+
+        The Renderer is referenced weakly, since it keeps its registry
+        alive via its textures attribute.
+        """
+        if not isinstance(renderer, weakref.ProxyTypes):
+            renderer = weakref.proxy(renderer)
+        self.renderer = renderer
+        self._budget = budget
+        self._entries = {}
+        self._totals = {}
+        self._clock = count(1)
+
+    def __len__(self):
+        """The amount of registered TextureSprite objects."""
+        return len(self._entries)
+
+    def _release(self, key):
+        """Removes the entry for the passed key."""
+        entry = self._entries.pop(key, None)
+        if entry is not None and entry[4]:
+            self._totals[entry[1]] -= entry[2]
+
+    def add(self, sprite, category="default", source=None):
+        """Registers a TextureSprite.
+
+        source is an optional callable, which returns a new SDL_Surface
+        to recreate the texture from. The returned SDL_Surface will be
+        freed after the texture was created. If source is None, the
+        texture of the sprite will never be evicted.
+        """
+        if not isinstance(sprite, TextureSprite):
+            raise TypeError("sprite must be a TextureSprite")
+        if source is not None and not callable(source):
+            raise TypeError("source must be callable")
+        key = id(sprite)
+        self._release(key)
+        ref = weakref.ref(sprite, lambda r, key=key: self._release(key))
+        bytesize = _texture_bytesize(sprite.texture)
+        # [sprite reference, category, size, source, texture loaded]
+        self._entries[key] = [ref, category, bytesize, source, True]
+        self._totals[category] = self._totals.get(category, 0) + bytesize
+        sprite._registry = self
+        sprite._lastdraw = next(self._clock)
+        self._enforce_budget(sprite)
+
+    def remove(self, sprite):
+        """Unregisters a TextureSprite."""
+        self._release(id(sprite))
+        sprite._registry = None
+
+    def touch(self, sprite):
+        """Marks the TextureSprite as being drawn.
+
+        If the texture of the sprite was evicted, it will be recreated.
+        """
+        sprite._lastdraw = next(self._clock)
+        if sprite.texture is None:
+            self.reload(sprite)
+
+    def reload(self, sprite):
+        """Recreates the evicted texture of the passed TextureSprite."""
+        entry = self._entries[id(sprite)]
+        if entry[4]:
+            return
+        sf = entry[3]()
+        texture = render.SDL_CreateTextureFromSurface(self.renderer.renderer,
+                                                      sf)
+        surface.SDL_FreeSurface(sf)
+        if not texture:
+            raise SDLError()
+        sprite.texture = texture.contents
+        sprite._texmod = ((255, 255, 255), 255)
+        entry[4] = True
+        self._totals[entry[1]] += entry[2]
+        self._enforce_budget(sprite)
+
+    def evict(self, sprite):
+        """Destroys the texture of the passed TextureSprite.
+
+        The texture will be recreated from its source, once the sprite
+        is drawn again. Raises a ValueError, if the sprite has no source
+        to recreate the texture from.
+        """
+        entry = self._entries[id(sprite)]
+        if entry[3] is None:
+            raise ValueError("sprite cannot be recreated")
+        if not entry[4]:
+            return
+        render.SDL_DestroyTexture(sprite.texture)
+        sprite.texture = None
+        entry[4] = False
+        self._totals[entry[1]] -= entry[2]
+
+    def _enforce_budget(self, keep=None):
+        """Evicts the least recently drawn textures, until the total
+        size fits into the budget.
+        """
+        if self._budget is None or self.total <= self._budget:
+            return
+        candidates = []
+        for ref, category, bytesize, source, loaded in self._entries.values():
+            sprite = ref()
+            if sprite is None or sprite is keep or source is None or \
+                    not loaded:
+                continue
+            candidates.append((sprite._lastdraw, id(sprite), sprite))
+        candidates.sort()
+        total = self.total
+        for lastdraw, key, sprite in candidates:
+            if total <= self._budget:
+                break
+            self.evict(sprite)
+            total = self.total
+
+    @property
+    def budget(self):
+        """The maximum size in bytes of the registered textures or None
+        for no limit.
+        """
+        return self._budget
+
+    @budget.setter
+    def budget(self, value):
+        """The maximum size in bytes of the registered textures or None
+        for no limit.
+        """
+        self._budget = value
+        self._enforce_budget()
+
+    @property
+    def total(self):
+        """The total size in bytes of the currently loaded textures."""
+        return sum(self._totals.values())
+
+    @property
+    def totals(self):
+        """The size in bytes of the currently loaded textures per category
+        as dict.
+        """
+        return dict(self._totals)
+
+
+def _create_color_surface(color, size, bpp, masks):
+    """Creates a SDL_Surface filled with the passed Color."""
+    if masks:
+        rmask, gmask, bmask, amask = masks
+    else:
+        rmask = gmask = bmask = amask = 0
+    sf = surface.SDL_CreateRGBSurface(0, size[0], size[1], bpp, rmask,
+                                      gmask, bmask, amask)
+    if not sf:
+        raise SDLError()
+    sf = sf.contents
+    fmt = sf.format.contents
+    if fmt.Amask != 0:
+        # Target has an alpha mask
+        c = pixels.SDL_MapRGBA(fmt, color.r, color.g, color.b, color.a)
+    else:
+        c = pixels.SDL_MapRGB(fmt, color.r, color.g, color.b)
+    ret = surface.SDL_FillRect(sf, None, c)
+    if ret == -1:
+        raise SDLError()
+    return sf
+
+
 class SpriteFactory(object):
     """A factory class for creating Sprite components."""
     def __init__(self, sprite_type=TEXTURE, **kwargs):
@@ -446,9 +674,13 @@ class SpriteFactory(object):
         else:
             return SoftwareSpriteRenderSystem(*args, **kwargs)
 
-    def from_image(self, fname):
-        """Creates a Sprite from the passed image file."""
-        return self.from_surface(load_image(fname), True)
+    def from_image(self, fname, pixelformat=None, cache=None):
+        """Creates a Sprite from the passed image file.
+
+        pixelformat and cache are passed to load_image().
+        """
+        load = lambda: load_image(fname, pixelformat=pixelformat, cache=cache)
+        return self._from_surface(load(), True, "image", load)
 
     def from_surface(self, tsurface, free=False):
         """Creates a Sprite from the passed SDL_Surface.
@@ -456,6 +688,13 @@ class SpriteFactory(object):
         If free is set to True, the passed surface will be freed
         automatically.
         """
+        return self._from_surface(tsurface, free, "surface")
+
+    def _from_surface(self, tsurface, free, category, source=None):
+        """Creates a Sprite from the passed SDL_Surface and registers
+        TextureSprite objects with the category and source at the
+        Renderer's TextureRegistry.
+        """
         if self.sprite_type == TEXTURE:
             renderer = self.default_args["renderer"]
             texture = render.SDL_CreateTextureFromSurface(renderer.renderer,
@@ -465,6 +704,7 @@ class SpriteFactory(object):
             s = TextureSprite(texture.contents)
             if free:
                 surface.SDL_FreeSurface(tsurface)
+            renderer.textures.add(s, category, source)
         elif self.sprite_type == SOFTWARE:
             s = SoftwareSprite(tsurface, free)
         return s
@@ -490,25 +730,10 @@ class SpriteFactory(object):
         """Creates a sprite with a certain color.
         """
         color = convert_to_color(color)
-        if masks:
-            rmask, gmask, bmask, amask = masks
-        else:
-            rmask = gmask = bmask = amask = 0
-        sf = surface.SDL_CreateRGBSurface(0, size[0], size[1], bpp, rmask,
-                                          gmask, bmask, amask)
-        if not sf:
-            raise SDLError()
-        sf = sf.contents
-        fmt = sf.format.contents
-        if fmt.Amask != 0:
-            # Target has an alpha mask
-            c = pixels.SDL_MapRGBA(fmt, color.r, color.g, color.b, color.a)
-        else:
-            c = pixels.SDL_MapRGB(fmt, color.r, color.g, color.b)
-        ret = surface.SDL_FillRect(sf, None, c)
-        if ret == -1:
-            raise SDLError()
-        return self.from_surface(sf, True)
+        sf = _create_color_surface(color, size, bpp, masks)
+        return self._from_surface(sf, True, "color",
+                                  lambda: _create_color_surface(color, size,
+                                                                bpp, masks))
 
     def from_text(self, text, **kwargs):
         """Creates a Sprite from a string of text."""
@@ -516,7 +741,7 @@ class SpriteFactory(object):
         args.update(kwargs)
         fontmanager = args['fontmanager']
         surface = fontmanager.render(text, **args)
-        return self.from_surface(surface, free=True)
+        return self._from_surface(surface, True, "text")
 
     def create_sprite(self, **kwargs):
         """Creates an empty Sprite.
@@ -574,7 +799,10 @@ class SpriteFactory(object):
                                            size[0], size[1])
         if not texture:
             raise SDLError()
-        return TextureSprite(texture.contents)
+        sprite = TextureSprite(texture.contents)
+        if isinstance(renderer, Renderer):
+            renderer.textures.add(sprite, "texture")
+        return sprite
 
 
 class SpriteRenderSystem(System):
@@ -679,11 +907,48 @@ class SoftwareSpriteRenderSystem(SpriteRenderSystem):
         video.SDL_UpdateWindowSurface(self.window)
 
 
+def _set_texture_mod(sprite):
+    """Applies the color and alpha modulation of the passed TextureSprite
+    to its texture.
+    """
+    texmod = sprite._texmod
+    color_mod = sprite.color_mod
+    if color_mod != texmod[0]:
+        r, g, b = color_mod
+        if render.SDL_SetTextureColorMod(sprite.texture, r, g, b) == -1:
+            raise SDLError()
+    if sprite.alpha_mod != texmod[1]:
+        if render.SDL_SetTextureAlphaMod(sprite.texture,
+                                         sprite.alpha_mod) == -1:
+            raise SDLError()
+    sprite._texmod = (color_mod, sprite.alpha_mod)
+
+
+def texture_sortkey(sprite):
+    """Sort key for TextureSprite objects, which share textures.
+
+    TextureSprite objects are sorted by their depth. Sprites on the
+    same depth are grouped by their texture and modulation state, so
+    that the order of overlapping sprites on the same depth is not
+    preserved. Sprites with an evicted texture are grouped together.
+    """
+    texture = sprite.texture
+    if texture is None:
+        return (sprite.depth, 0, sprite.color_mod, sprite.alpha_mod)
+    return (sprite.depth, addressof(texture), sprite.color_mod,
+            sprite.alpha_mod)
+
+
 class TextureSpriteRenderSystem(SpriteRenderSystem):
     """A rendering system for TextureSprite components.
 
     The TextureSpriteRenderSystem class uses a SDL_Renderer as drawing
     device to display TextureSprite objects.
+
+    The angle, flip, center, color_mod and alpha_mod attributes of the
+    TextureSprite objects are taken into account. The color and alpha
+    modulation of a texture is only changed, if it differs from the
+    state the texture was drawn with the last time.
     """
     def __init__(self, target):
         """Creates a new TextureSpriteRenderSystem.
@@ -719,23 +984,38 @@ class TextureSpriteRenderSystem(SpriteRenderSystem):
         denote the absolute position of the TextureSprite, if set.
         """
         r = rect.SDL_Rect(0, 0, 0, 0)
+        rcopy = render.SDL_RenderCopy
+        rcopyex = render.SDL_RenderCopyEx
+        SDL_Point = rect.SDL_Point
+        FLIP_NONE = render.SDL_FLIP_NONE
+        renderer = self.sdlrenderer
         if isiterable(sprites):
-            rcopy = render.SDL_RenderCopy
-            renderer = self.sdlrenderer
             x = x or 0
             y = y or 0
-            for sp in sprites:
-                r.x = x + sp.x
-                r.y = y + sp.y
-                r.w, r.h = sp.size
-                if rcopy(renderer, sp.texture, None, r) == -1:
-                    raise SDLError()
         else:
-            r.x = sprites.x
-            r.y = sprites.y
-            r.w, r.h = sprites.size
-            if x is not None and y is not None:
-                r.x = x
-                r.y = y
-            render.SDL_RenderCopy(self.sdlrenderer, sprites.texture, None, r)
-        render.SDL_RenderPresent(self.sdlrenderer)
+            if x is None or y is None:
+                x = y = 0
+            else:
+                x -= sprites.x
+                y -= sprites.y
+            sprites = (sprites,)
+        for sp in sprites:
+            if sp._registry is not None:
+                sp._registry.touch(sp)
+            r.x = x + sp.x
+            r.y = y + sp.y
+            r.w, r.h = sp.size
+            if sp._texmod[1] != sp.alpha_mod or \
+                    sp._texmod[0] != sp.color_mod:
+                _set_texture_mod(sp)
+            if sp.angle == 0 and sp.flip == FLIP_NONE:
+                ret = rcopy(renderer, sp.texture, None, r)
+            else:
+                center = sp.center
+                if center is not None:
+                    center = SDL_Point(center[0], center[1])
+                ret = rcopyex(renderer, sp.texture, None, r, sp.angle,
+                              center, sp.flip)
+            if ret == -1:
+                raise SDLError()
+        render.SDL_RenderPresent(renderer)
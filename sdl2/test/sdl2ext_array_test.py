@@ -3,7 +3,15 @@ import array
 import ctypes
 import struct
 import unittest
+import weakref
 from ..ext import array as sdlextarray
+from .. import rect
+
+try:
+    import numpy
+    _HASNUMPY = True
+except:
+    _HASNUMPY = False
 
 singlebyteseq = [x for x in range(0x100)]
 doublebyteseq = [x for x in range(0x10000)]
@@ -153,6 +161,70 @@ class SDL2ExtArrayTest(unittest.TestCase):
             for index, x in enumerate(bytebuf):
                 self.assertEqual(x, seq[index])
 
+    @unittest.skipIf(sys.version_info[0] < 3,
+                     "Python 2.x memoryviews do not provide the buffer layout")
+    def test_to_ctypes_shared(self):
+        buf = array.array("I", quadbyteseq)
+        valset, size = sdlextarray.to_ctypes(buf, ctypes.c_uint)
+        self.assertEqual(size, len(buf))
+        self.assertEqual(list(valset), quadbyteseq)
+        valset[0] = 0x12345678
+        self.assertEqual(buf[0], 0x12345678)
+
+        buf = bytearray(singlebyteseq)
+        valset, size = sdlextarray.to_ctypes(buf, ctypes.c_ubyte)
+        valset[1] = 0xAB
+        self.assertEqual(buf[1], 0xAB)
+
+        # Read-only buffers are copied.
+        buf = bytes(bytearray(singlebyteseq))
+        valset, size = sdlextarray.to_ctypes(buf, ctypes.c_ubyte)
+        self.assertEqual(list(valset), singlebyteseq)
+
+        # Mismatching item types are converted.
+        buf = array.array("H", doublebyteseq[:10])
+        valset, size = sdlextarray.to_ctypes(buf, ctypes.c_uint)
+        self.assertEqual(list(valset), doublebyteseq[:10])
+        valset[0] = 5
+        self.assertEqual(buf[0], 0)
+
+        rects = (rect.SDL_Rect * 2)(rect.SDL_Rect(1, 2, 3, 4))
+        valset, size = sdlextarray.to_ctypes(rects, rect.SDL_Rect)
+        self.assertEqual(size, 2)
+        valset[1].w = 9
+        self.assertEqual(rects[1].w, 9)
+
+        view = sdlextarray.CTypesView(quadbytebuf, UINT_SIZE)
+        valset, size = sdlextarray.to_ctypes(view, ctypes.c_uint,
+                                             len(quadbyteseq))
+        self.assertEqual(list(valset), quadbyteseq)
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_to_ctypes_numpy(self):
+        points = numpy.arange(20, dtype=numpy.int32).reshape(10, 2)
+        valset, size = sdlextarray.to_ctypes(points, rect.SDL_Point)
+        self.assertEqual(size, 10)
+        self.assertEqual((valset[3].x, valset[3].y), (6, 7))
+        valset[0].y = 99
+        self.assertEqual(points[0, 1], 99)
+        rects = numpy.ones((5, 4), dtype=numpy.int32)
+        valset, size = sdlextarray.to_ctypes(rects, rect.SDL_Rect)
+        self.assertEqual(size, 5)
+        self.assertEqual(valset[4].h, 1)
+        # Non-contiguous arrays are copied.
+        values = numpy.arange(10, dtype=numpy.uint32)[::2]
+        valset, size = sdlextarray.to_ctypes(values, ctypes.c_uint)
+        self.assertEqual(list(valset), [0, 2, 4, 6, 8])
+        valset[0] = 1
+        self.assertEqual(values[0], 0)
+
+        view = sdlextarray.CTypesView(rects, 4)
+        self.assertTrue(view.is_shared)
+        self.assertEqual(view.bytesize, 80)
+        view = sdlextarray.CTypesView(values, 4)
+        self.assertFalse(view.is_shared)
+        self.assertEqual(list(view.to_uint32()), [0, 2, 4, 6, 8])
+
     def test_CTypesView__singlebytes(self):
         buf1 = sdlextarray.CTypesView(singlebyteseq, docopy=True)
         buf2 = sdlextarray.CTypesView(singlebytebuf, docopy=False)
@@ -310,6 +382,57 @@ class SDL2ExtArrayTest(unittest.TestCase):
             self.assertEqual(val, source[index + 7])
         # TODO: more tests
 
+    def test_MemoryView_slicing(self):
+        source = bytearray(range(24))
+        view = sdlextarray.MemoryView(source, 1, (4, 6))
+        self.assertEqual(view[1][2], source[8:9])
+        self.assertEqual(view[1, 2], source[8:9])
+        self.assertEqual(view[-1, -1], source[23:24])
+        self.assertRaises(IndexError, view.__getitem__, 4)
+        self.assertRaises(IndexError, view.__getitem__, (0, -7))
+        self.assertRaises(IndexError, view.__getitem__, (0, 0, 0))
+
+        part = view[1:3, 2:5]
+        self.assertIsInstance(part, sdlextarray.MemoryView)
+        self.assertEqual(part.strides, (2, 3))
+        self.assertEqual([list(bytearray().join(row)) for row in part],
+                         [[8, 9, 10], [14, 15, 16]])
+        column = view[:, 1]
+        self.assertEqual(column.strides, (4,))
+        self.assertEqual(bytearray().join(column), bytearray([1, 7, 13, 19]))
+        self.assertEqual(bytearray().join(view[0, ::-2]),
+                         bytearray([5, 3, 1]))
+        self.assertEqual(len(view[5:]), 0)
+
+        # Views access the source directly.
+        part[0, 0] = b"\xFF"
+        self.assertEqual(source[8], 0xFF)
+
+    def test_MemoryView_assign(self):
+        source = bytearray(24)
+        view = sdlextarray.MemoryView(source, 2, (3, 4))
+        view[1] = bytearray(range(8))
+        self.assertEqual(source[8:16], bytearray(range(8)))
+        view[0, 1:3] = [b"ab", b"cd"]
+        self.assertEqual(source[2:6], bytearray(b"abcd"))
+        view[:, 3] = b"xxyyzz"
+        self.assertEqual(source[6:8], bytearray(b"xx"))
+        self.assertEqual(source[14:16], bytearray(b"yy"))
+        self.assertEqual(source[22:24], bytearray(b"zz"))
+        view[1:] = bytearray(16)
+        self.assertEqual(source[8:], bytearray(16))
+        self.assertRaises(ValueError, view.__setitem__, 0, b"abc")
+        self.assertRaises(ValueError, view.__setitem__, 0, [b"ab"])
+
+    def test_MemoryView_cleanup(self):
+        # Views must not be part of reference cycles, so that they are
+        # released at once.
+        view = sdlextarray.MemoryView(bytearray(24), 2, (3, 4))
+        part = view[1:, 1:3]
+        refs = weakref.ref(view), weakref.ref(part)
+        del view, part
+        self.assertEqual([ref() for ref in refs], [None, None])
+
     def test_MemoryView_ndim_strides(self):
         source = "Example buffer"
         view = sdlextarray.MemoryView(source, 1, (len(source),))
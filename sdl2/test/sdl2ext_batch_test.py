@@ -0,0 +1,98 @@
+import sys
+import unittest
+from ..ext.resources import Resources
+from .. import ext as sdl2ext
+
+RESOURCES = Resources(__file__, "resources")
+
+
+def draw_fill(context, scene):
+    context.renderer.fill((0, 0, context.size[0], context.size[1]), scene)
+
+
+def draw_image(context, scene):
+    sprite = context.get_sprite(RESOURCES.get_path("font.bmp"))
+    context.renderer.copy(sprite, dstrect=(scene, 0) + sprite.size)
+
+
+class SDL2ExtBatchTest(unittest.TestCase):
+    __tags__ = ["sdl", "sdl2ext"]
+
+    def setUp(self):
+        sdl2ext.init()
+
+    def tearDown(self):
+        sdl2ext.quit()
+
+    def test_RenderContext(self):
+        context = sdl2ext.RenderContext((10, 20))
+        self.assertEqual(context.size, (10, 20))
+        self.assertIsInstance(context.target, sdl2ext.SoftwareSprite)
+        self.assertEqual(context.target.size, (10, 20))
+        self.assertIsInstance(context.renderer, sdl2ext.Renderer)
+        self.assertEqual(context.factory.sprite_type, sdl2ext.TEXTURE)
+
+        fname = RESOURCES.get_path("font.bmp")
+        sprite = context.get_sprite(fname)
+        self.assertIsInstance(sprite, sdl2ext.TextureSprite)
+        self.assertIs(context.get_sprite(fname), sprite)
+
+        context.clear(0xFF00FF00)
+        view = sdl2ext.PixelView(context.target)
+        self.assertEqual(view[3][3], 0xFF00FF00)
+        del view
+
+    def test_BatchRenderer(self):
+        self.assertRaises(TypeError, sdl2ext.BatchRenderer, (10, 10), None)
+
+        colors = [0xFF000000 | (x * 0x010203) for x in range(16)]
+        batch = sdl2ext.BatchRenderer((8, 6), draw_fill, processes=2)
+        self.assertEqual(batch.size, (8, 6))
+        results = list(batch.render(colors))
+        self.assertEqual(len(results), len(colors))
+        for color, sprite in zip(colors, results):
+            self.assertIsInstance(sprite, sdl2ext.SoftwareSprite)
+            self.assertEqual(sprite.size, (8, 6))
+            view = sdl2ext.PixelView(sprite)
+            self.assertEqual(view[0][0], color)
+            self.assertEqual(view[5][7], color)
+            del view
+
+        # The pool is reused for subsequent batches.
+        results = list(batch.render(colors[:3]))
+        self.assertEqual(len(results), 3)
+
+        # Abandoning a batch does not affect the next one.
+        render = batch.render(colors)
+        next(render)
+        render.close()
+        results = list(batch.render(colors[8:]))
+        for color, sprite in zip(colors[8:], results):
+            self.assertEqual(sdl2ext.PixelView(sprite)[2][2], color)
+        batch.close()
+
+    def test_BatchRenderer_sprites(self):
+        # Each scene draws the image at another offset, so that results
+        # of the wrong slot are detected.
+        expected = []
+        context = sdl2ext.RenderContext((32, 32))
+        for scene in range(8):
+            context.clear()
+            draw_image(context, scene)
+            view = sdl2ext.PixelView(context.target)
+            expected.append([list(row) for row in view])
+            del view
+        self.assertNotEqual(expected[0], expected[1])
+
+        batch = sdl2ext.BatchRenderer((32, 32), draw_image, processes=2)
+        results = list(batch.render(range(8)))
+        self.assertEqual(len(results), 8)
+        for pixels, sprite in zip(expected, results):
+            view = sdl2ext.PixelView(sprite)
+            self.assertEqual([list(row) for row in view], pixels)
+            del view
+        batch.close()
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
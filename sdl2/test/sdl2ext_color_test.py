@@ -2,9 +2,15 @@ import sys
 import unittest
 import copy
 from ..ext import color
-from ..ext.color import Color
+from ..ext.color import Color, ColorArray
 from ..ext.compat import *
 
+try:
+    import numpy
+    _HASNUMPY = True
+except:
+    _HASNUMPY = False
+
 combs = [0, 1, 2, 4, 8, 16, 32, 62, 63, 64, 126, 127, 128, 255]
 all_combos = [(r, g, b, a) for r in combs
                            for g in combs
@@ -72,6 +78,17 @@ class SDL2ExtColorTest(unittest.TestCase):
         self.assertRaises(ValueError, Color, 10, 105, 257, 44)
         self.assertRaises(ValueError, Color, 10, 105, 44, 257)
 
+    def test_Color_slots(self):
+        c = Color(10, 20, 30, 40)
+        self.assertRaises(AttributeError, setattr, c, "name", "red")
+
+        class NamedColor(Color):
+            pass
+        c = NamedColor(10, 20, 30, 40)
+        c.name = "red"
+        self.assertEqual(c.name, "red")
+        self.assertEqual(c, Color(10, 20, 30, 40))
+
     def test_Color__copy__(self):
         copy_copy = copy.copy
         assertEqual = self.assertEqual
@@ -675,6 +692,95 @@ class SDL2ExtColorTest(unittest.TestCase):
             assertEqual(color.ARGB(val), c, "Failed for '%s'" % val)
             assertNotEqual(color.RGBA(val), c, "Failed for '0x%.8x'" % val)
 
+    def test_Color_from_argb_rgba(self):
+        c = Color.from_argb(0x11223344)
+        self.assertEqual((c.r, c.g, c.b, c.a), (0x22, 0x33, 0x44, 0x11))
+        c = Color.from_rgba(0x11223344)
+        self.assertEqual((c.r, c.g, c.b, c.a), (0x11, 0x22, 0x33, 0x44))
+        self.assertRaises(AttributeError, setattr, c, "x", 1)
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_ColorArray(self):
+        colors = ColorArray([Color(1, 2, 3, 4), (5, 6, 7), 0xFF0A0B0C])
+        self.assertEqual(len(colors), 3)
+        self.assertEqual(colors.data.shape, (3, 4))
+        self.assertEqual(colors[0], Color(1, 2, 3, 4))
+        self.assertEqual(colors[1], Color(5, 6, 7, 0))
+        self.assertEqual(colors[-1], Color(10, 11, 12, 255))
+        self.assertEqual(list(colors)[2], Color(10, 11, 12, 255))
+        self.assertEqual(list(colors.r), [1, 5, 10])
+        self.assertEqual(ColorArray(2).data.tolist(), [[255] * 4] * 2)
+        self.assertEqual(ColorArray(numpy.zeros((2, 3))).data.tolist(),
+                         [[0, 0, 0, 255]] * 2)
+        self.assertRaises(ValueError, ColorArray, numpy.zeros((2, 5)))
+        self.assertRaises(ValueError, ColorArray, numpy.full((2, 4), 256))
+
+        part = colors[1:]
+        self.assertIsInstance(part, ColorArray)
+        part[0] = Color(9, 9, 9, 9)
+        self.assertEqual(colors[1], Color(9, 9, 9, 9))
+        colors.a = 128
+        self.assertEqual(list(colors.a), [128, 128, 128])
+        self.assertRaises(ValueError, setattr, colors, "g", 300)
+        self.assertRaises(TypeError, setattr, colors, "g", 1.5)
+
+        values = [0x11223344, 0xFFFFFFFF, 0]
+        self.assertEqual(ColorArray.from_argb(values),
+                         ColorArray([color.ARGB(v) for v in values]))
+        self.assertEqual(ColorArray.from_rgba(values),
+                         ColorArray([color.RGBA(v) for v in values]))
+        self.assertEqual(list(ColorArray.from_argb(values).to_argb()),
+                         values)
+        self.assertEqual(list(ColorArray.from_rgba(values).to_rgba()),
+                         values)
+        self.assertEqual(numpy.asarray(colors).shape, (3, 4))
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_ColorArray_arithmetic(self):
+        cvals = [Color(*x) for x in all_combos[::37]]
+        colors = ColorArray(cvals)
+        for other in (Color(3, 7, 0, 200), Color(255, 1, 2, 128)):
+            for op in ("__add__", "__sub__", "__mul__", "__truediv__"):
+                result = getattr(colors, op)(other)
+                self.assertIsInstance(result, ColorArray)
+                self.assertEqual(list(result),
+                                 [getattr(c, op)(other) for c in cvals])
+        self.assertEqual(list(~colors), [~c for c in cvals])
+        self.assertEqual(list(colors + colors), [c + c for c in cvals])
+        other = Color(3, 7, 1, 200)
+        self.assertEqual(list(colors % other), [c % other for c in cvals])
+        self.assertRaises(ZeroDivisionError, colors.__mod__, Color(0, 1, 1))
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_ColorArray_conversions(self):
+        cvals = [Color(*x) for x in all_combos[::37]]
+        colors = ColorArray(cvals)
+        for attr in ("hsva", "hsla", "i1i2i3", "cmy"):
+            values = getattr(colors, attr)
+            self.assertEqual(values.shape,
+                             (len(cvals), len(getattr(cvals[0], attr))))
+            for c, value in zip(cvals, values):
+                for v1, v2 in zip(getattr(c, attr), value):
+                    self.assertAlmostEqual(v1, v2)
+
+        self.assertEqual(colors.normalize().shape, (len(cvals), 4))
+        converted = ColorArray(len(cvals))
+        for attr in ("hsla", "i1i2i3", "cmy"):
+            setattr(converted, attr, getattr(colors, attr))
+            for c, cconv in zip(cvals, converted):
+                c = copy.copy(c)
+                setattr(c, attr, tuple(float(v) for v in getattr(c, attr)))
+                self.assertEqual(c[:3], cconv[:3])
+        converted = ColorArray(2)
+        converted.hsva = [(0, 0, 100, 100), (120, 100, 100, 50)]
+        self.assertEqual(list(converted), [Color(255, 255, 255, 255),
+                                           Color(0, 255, 0, 127)])
+        self.assertRaises(ValueError, setattr, converted, "hsva",
+                          [(0, 0, 101, 100)])
+        self.assertRaises(ValueError, setattr, converted, "cmy",
+                          [(0, 2, 0)])
+        self.assertRaises(TypeError, setattr, converted, "cmy", [(0, 0)])
+
     def test_string_to_color(self):
         assertEqual = self.assertEqual
         assertRaises = self.assertRaises
@@ -744,6 +850,33 @@ class SDL2ExtColorTest(unittest.TestCase):
         self.assertRaises(TypeError, color.string_to_color, 0xff000000)
         self.assertRaises(TypeError, color.string_to_color, Color())
 
+    def test_string_to_color_names(self):
+        self.assertEqual(color.string_to_color("red"), Color(255, 0, 0))
+        self.assertEqual(color.string_to_color("CornflowerBlue"),
+                         Color(100, 149, 237))
+        self.assertEqual(color.string_to_color("transparent"),
+                         Color(0, 0, 0, 0))
+        self.assertEqual(color.string_to_color("#e8d"),
+                         Color(0xEE, 0x88, 0xDD))
+        self.assertEqual(color.string_to_color("0xe8d4"),
+                         Color(0xEE, 0x88, 0xDD, 0x44))
+        self.assertEqual(color.convert_to_color("navy"), Color(0, 0, 128))
+        for value in ("unknown", "#12", "#12g", "# 123", "0x-123", "#"):
+            self.assertRaises(ValueError, color.string_to_color, value)
+
+    def test_convert_to_color_cache(self):
+        for value in ("#ff8800", 0xFFFF8800, (255, 136, 0, 255)):
+            c1 = color.convert_to_color(value)
+            c2 = color.convert_to_color(value)
+            self.assertEqual(c1, Color(255, 136, 0, 255))
+            self.assertEqual(c1, c2)
+            # Modifying a converted Color must not affect the cache.
+            c1.r = 0
+            self.assertEqual(color.convert_to_color(value).r, 255)
+        self.assertEqual(color.convert_to_color([10, 20, 30, 40]),
+                         Color(10, 20, 30, 40))
+        self.assertRaises(TypeError, color.convert_to_color, ([1], 2, 3))
+
     def test_convert_to_color(self):
         self.assertEqual(color.COLOR, color.convert_to_color)
         cvals = list(color_combos())
@@ -1,7 +1,10 @@
 import sys
 import unittest
+from ctypes import string_at
+from ..ext import draw
 from ..ext.color import Color, COLOR
 from .. import ext as sdl2ext
+from .. import pixels
 
 
 class SDL2ExtDrawTest(unittest.TestCase):
@@ -43,6 +46,226 @@ class SDL2ExtDrawTest(unittest.TestCase):
                     else:
                         self.assertEqual(col, 0, "color mismatch at (x, y)")
 
+    def _get_pixel(self, sprite, x, y):
+        sf = sprite.surface
+        bpp = sf.format.contents.BytesPerPixel
+        data = string_at(sf.pixels + y * sf.pitch + x * bpp, bpp)
+        return sum(ord(data[i:i + 1]) << (8 * i) for i in range(bpp))
+
+    def test_line(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(10, 10), bpp=32)
+        self.assertRaises(ValueError, sdl2ext.line, sprite, 0, (1, 2, 3))
+        self.assertRaises(ValueError, sdl2ext.line, sprite, 0, (1, 2, 3, 4),
+                          0)
+        for bpp in (16, 32):
+            sprite = factory.create_sprite(size=(10, 10), bpp=bpp)
+            sdl2ext.fill(sprite, 0)
+            colorval = sdl2ext.prepare_color(0xFFFFFFFF, sprite)
+            sdl2ext.line(sprite, 0xFFFFFFFF, (-10, -10, 20, 20, 0, 9, 5, 9,
+                                              9, 7, 9, 0))
+            for y in range(10):
+                for x in range(10):
+                    drawn = x == y or (y == 9 and x < 5) or \
+                        (x == 9 and y < 7)
+                    self.assertEqual(self._get_pixel(sprite, x, y) != 0,
+                                     drawn, "mismatch at (%d, %d)" % (x, y))
+            self.assertEqual(self._get_pixel(sprite, 4, 4), colorval)
+
+    @unittest.skipIf(not draw._HASNUMPY, "numpy module is not supported")
+    def test_line_numpy(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        for bpp in (16, 24, 32):
+            sprite = factory.create_sprite(size=(20, 20), bpp=bpp)
+            sdl2ext.fill(sprite, 0)
+            colorval = sdl2ext.prepare_color(0xFFFFFFFF, sprite)
+            sdl2ext.line(sprite, 0xFFFFFFFF, (0, 0, 19, 19))
+            for i in range(20):
+                self.assertEqual(self._get_pixel(sprite, i, i), colorval)
+                self.assertEqual(self._get_pixel(sprite, (i + 2) % 20, i), 0)
+
+            sdl2ext.fill(sprite, 0)
+            sdl2ext.line(sprite, 0xFFFFFFFF, (2, 10, 17, 10, 0, 0, 19, 19),
+                         width=3)
+            for x in range(2, 17):
+                for y in (9, 10, 11):
+                    self.assertEqual(self._get_pixel(sprite, x, y), colorval)
+                self.assertEqual(self._get_pixel(sprite, x, 8) != 0,
+                                 x - 2 <= 8 <= x + 1)
+            for i in range(2, 18):
+                # The thickness of a 45 degree line of width 3 is 4 pixels
+                # along the minor axis.
+                for off in (-2, -1, 0, 1):
+                    self.assertEqual(self._get_pixel(sprite, i, i + off),
+                                     colorval)
+            self.assertEqual(self._get_pixel(sprite, 15, 2), 0)
+
+        # A 2:1 slope line steps evenly, regardless of its direction.
+        sprite = factory.create_sprite(size=(20, 10), bpp=32)
+        for line in ((1, 1, 17, 9), (17, 9, 1, 1)):
+            sdl2ext.fill(sprite, 0)
+            sdl2ext.line(sprite, 0xFFFFFFFF, line)
+            runs = [sum(1 for x in range(20)
+                        if self._get_pixel(sprite, x, y) != 0)
+                    for y in range(1, 10)]
+            self.assertEqual(runs, [1, 2, 2, 2, 2, 2, 2, 2, 2])
+
+        # Many lines at once, including invisible ones.
+        sprite = factory.create_sprite(size=(50, 50), bpp=32)
+        sdl2ext.fill(sprite, 0)
+        lines = []
+        for y in range(-10, 60):
+            lines.extend((-5, y, 70, y + 1))
+        sdl2ext.line(sprite, 0xFFFFFFFF, lines)
+        sdl2ext.line(sprite, 0xFFFFFFFF, (-10, -10, -20, -30, 60, 60, 70, 40),
+                     width=5)
+        for y in range(50):
+            for x in range(50):
+                self.assertNotEqual(self._get_pixel(sprite, x, y), 0)
+
+    @unittest.skipIf(not draw._HASNUMPY, "numpy module is not supported")
+    def test_circle(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(20, 20), bpp=32)
+        self.assertRaises(ValueError, sdl2ext.circle, sprite, 0, (1, 2))
+        self.assertRaises(ValueError, sdl2ext.circle, sprite, 0, (1, 2, 0))
+        self.assertRaises(ValueError, sdl2ext.circle, sprite, 0, (1, 2, 3),
+                          0)
+        for bpp in (16, 24, 32):
+            sprite = factory.create_sprite(size=(20, 20), bpp=bpp)
+            colorval = sdl2ext.prepare_color(0xFFFFFFFF, sprite)
+            sdl2ext.fill(sprite, 0)
+            sdl2ext.circle(sprite, 0xFFFFFFFF, (10, 10, 5))
+            for x, y in ((5, 10), (15, 10), (10, 5), (10, 15)):
+                self.assertEqual(self._get_pixel(sprite, x, y), colorval)
+            for x, y in ((10, 10), (7, 10), (4, 10), (16, 10), (6, 6)):
+                self.assertEqual(self._get_pixel(sprite, x, y), 0)
+
+            sdl2ext.fill(sprite, 0)
+            sdl2ext.circle(sprite, 0xFFFFFFFF, (5, 5, 3, 14, 14, 4),
+                           filled=True)
+            for y in range(20):
+                for x in range(20):
+                    drawn = (x - 5) ** 2 + (y - 5) ** 2 <= 9 or \
+                        (x - 14) ** 2 + (y - 14) ** 2 <= 16
+                    self.assertEqual(self._get_pixel(sprite, x, y) != 0,
+                                     drawn, "mismatch at (%d, %d)" % (x, y))
+
+        # Circles partially or entirely outside of the target
+        sprite = factory.create_sprite(size=(20, 20), bpp=32)
+        sdl2ext.fill(sprite, 0)
+        sdl2ext.circle(sprite, 0xFFFFFFFF, (0, 0, 30, -50, -50, 10),
+                       filled=True)
+        for y in range(20):
+            for x in range(20):
+                self.assertNotEqual(self._get_pixel(sprite, x, y), 0)
+
+    @unittest.skipIf(not draw._HASNUMPY, "numpy module is not supported")
+    def test_circle_antialias(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(30, 30), bpp=32)
+        sdl2ext.fill(sprite, 0)
+        sdl2ext.circle(sprite, 0xFFFFFFFF, (15, 15, 10.3), filled=True,
+                       antialias=True)
+        self.assertEqual(self._get_pixel(sprite, 15, 15), 0xFFFFFF)
+        self.assertEqual(self._get_pixel(sprite, 15, 2), 0)
+        # The edge pixels are partially covered.
+        edge = self._get_pixel(sprite, 25, 15) & 0xFF
+        self.assertTrue(0 < edge < 0xFF)
+
+        # The alpha value of the color is blended with the target.
+        sdl2ext.fill(sprite, 0)
+        sdl2ext.circle(sprite, Color(255, 0, 0, 128), (15, 15, 5),
+                       filled=True, blend=True)
+        pixel = self._get_pixel(sprite, 15, 15)
+        self.assertEqual(pixel & 0x00FFFF, 0)
+        self.assertTrue(0x7E <= (pixel >> 16) & 0xFF <= 0x81)
+        sdl2ext.circle(sprite, Color(255, 0, 0, 128), (15, 15, 5),
+                       filled=True, blend=True)
+        self.assertTrue((self._get_pixel(sprite, 15, 15) >> 16) & 0xFF > 0xBD)
+
+    @unittest.skipIf(not draw._HASNUMPY, "numpy module is not supported")
+    def test_ellipse(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(30, 20), bpp=32)
+        self.assertRaises(ValueError, sdl2ext.ellipse, sprite, 0, (1, 2, 3))
+        sdl2ext.fill(sprite, 0)
+        sdl2ext.ellipse(sprite, 0xFFFFFFFF, (15, 10, 12, 6))
+        for x, y in ((3, 10), (27, 10), (15, 4), (15, 16)):
+            self.assertNotEqual(self._get_pixel(sprite, x, y), 0)
+        for x, y in ((15, 10), (5, 10), (15, 6), (2, 10), (15, 17)):
+            self.assertEqual(self._get_pixel(sprite, x, y), 0)
+
+        sdl2ext.fill(sprite, 0)
+        sdl2ext.ellipse(sprite, 0xFFFFFFFF, (15, 10, 12, 6), filled=True)
+        for y in range(20):
+            for x in range(30):
+                drawn = ((x - 15) / 12.) ** 2 + ((y - 10) / 6.) ** 2 <= 1
+                self.assertEqual(self._get_pixel(sprite, x, y) != 0, drawn,
+                                 "mismatch at (%d, %d)" % (x, y))
+
+    @unittest.skipIf(not draw._HASNUMPY, "numpy module is not supported")
+    def test_arc(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(20, 20), bpp=32)
+        self.assertRaises(ValueError, sdl2ext.arc, sprite, 0, (1, 2, 3, 4))
+        sdl2ext.fill(sprite, 0)
+        # The lower right quarter of the circle
+        sdl2ext.arc(sprite, 0xFFFFFFFF, (10, 10, 6, 6, 0, 90), filled=True)
+        for y in range(20):
+            for x in range(20):
+                drawn = x >= 10 and y >= 10 and \
+                    (x - 10) ** 2 + (y - 10) ** 2 <= 36
+                self.assertEqual(self._get_pixel(sprite, x, y) != 0, drawn,
+                                 "mismatch at (%d, %d)" % (x, y))
+
+        # The upper half of the circle, wrapping around 0 degrees
+        sdl2ext.fill(sprite, 0)
+        sdl2ext.arc(sprite, 0xFFFFFFFF, (10, 10, 6, 6, 180, 0))
+        self.assertNotEqual(self._get_pixel(sprite, 10, 4), 0)
+        self.assertNotEqual(self._get_pixel(sprite, 4, 10), 0)
+        self.assertEqual(self._get_pixel(sprite, 10, 16), 0)
+        self.assertEqual(self._get_pixel(sprite, 10, 10), 0)
+
+    @unittest.skipIf(not draw._HASNUMPY, "numpy module is not supported")
+    def test_polygon(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(20, 20), bpp=32)
+        self.assertRaises(ValueError, sdl2ext.polygon, sprite, 0, (1, 2, 3))
+        self.assertRaises(ValueError, sdl2ext.polygon, sprite, 0, (1, 2))
+        for bpp in (16, 24, 32):
+            sprite = factory.create_sprite(size=(20, 20), bpp=bpp)
+            sdl2ext.fill(sprite, 0)
+            # A concave, L-shaped polygon
+            sdl2ext.polygon(sprite, 0xFFFFFFFF, (2, 2, 18, 2, 18, 16, 12, 16,
+                                                 12, 8, 2, 8), filled=True)
+            for y in range(20):
+                for x in range(20):
+                    drawn = 2 <= x < 18 and (2 <= y < 8 or
+                                             (x >= 12 and 2 <= y < 16))
+                    self.assertEqual(self._get_pixel(sprite, x, y) != 0,
+                                     drawn, "mismatch at (%d, %d)" % (x, y))
+
+        sdl2ext.fill(sprite, 0)
+        sdl2ext.polygon(sprite, 0xFFFFFFFF, [(1, 1, 8, 1, 8, 8),
+                                             (10, 10, 18, 10, 18, 18, 10, 18)])
+        for i in range(1, 9):
+            self.assertNotEqual(self._get_pixel(sprite, i, 1), 0)
+            self.assertNotEqual(self._get_pixel(sprite, 8, i), 0)
+            self.assertNotEqual(self._get_pixel(sprite, i, i), 0)
+        self.assertEqual(self._get_pixel(sprite, 6, 3), 0)
+        self.assertNotEqual(self._get_pixel(sprite, 10, 14), 0)
+        self.assertEqual(self._get_pixel(sprite, 14, 14), 0)
+
+        sdl2ext.fill(sprite, 0)
+        sdl2ext.polygon(sprite, 0xFFFFFFFF, (2, 2, 17, 5, 6, 17),
+                        filled=True, antialias=True)
+        self.assertEqual(self._get_pixel(sprite, 8, 8) & 0xFFFFFF, 0xFFFFFF)
+        self.assertEqual(self._get_pixel(sprite, 18, 18), 0)
+        partial = [self._get_pixel(sprite, x, y) & 0xFF
+                   for x in range(20) for y in range(20)]
+        self.assertTrue(any(0 < value < 0xFF for value in partial))
+
     @unittest.skipIf(sys.platform=="cli",
                      "IronPython does not convert int values correctly")
     def test_prepare_color(self):
@@ -78,6 +301,92 @@ class SDL2ExtDrawTest(unittest.TestCase):
             cc = COLOR(color)
             self.assertEqual(c, int(cc))
 
+    def test_prepare_color_cache(self):
+        pformat = pixels.SDL_AllocFormat(pixels.SDL_PIXELFORMAT_INDEX8)
+        palette = pixels.SDL_AllocPalette(256)
+        pixels.SDL_SetPixelFormatPalette(pformat, palette)
+        colors = (pixels.SDL_Color * 2)(pixels.SDL_Color(0, 0, 0),
+                                        pixels.SDL_Color(255, 0, 0))
+        pixels.SDL_SetPaletteColors(palette, colors, 0, 2)
+        self.assertEqual(sdl2ext.prepare_color(0xFFFF0000,
+                                               pformat.contents), 1)
+        self.assertEqual(sdl2ext.prepare_color(Color(255, 0, 0),
+                                               pformat.contents), 1)
+        # Changing the palette must not return outdated values.
+        colors = (pixels.SDL_Color * 2)(pixels.SDL_Color(255, 0, 0),
+                                        pixels.SDL_Color(0, 0, 0))
+        pixels.SDL_SetPaletteColors(palette, colors, 0, 2)
+        self.assertEqual(sdl2ext.prepare_color(0xFFFF0000,
+                                               pformat.contents), 0)
+        self.assertEqual(sdl2ext.prepare_color(Color(255, 0, 0),
+                                               pformat.contents), 0)
+        # A new palette may reuse the memory of the old one.
+        pixels.SDL_FreePalette(palette)
+        palette = pixels.SDL_AllocPalette(256)
+        colors = (pixels.SDL_Color * 3)(pixels.SDL_Color(0, 0, 0),
+                                        pixels.SDL_Color(0, 0, 0),
+                                        pixels.SDL_Color(255, 0, 0))
+        pixels.SDL_SetPaletteColors(palette, colors, 0, 3)
+        pixels.SDL_SetPixelFormatPalette(pformat, palette)
+        self.assertEqual(sdl2ext.prepare_color(0xFFFF0000,
+                                               pformat.contents), 2)
+        pixels.SDL_FreeFormat(pformat)
+        pixels.SDL_FreePalette(palette)
+
+        # Invalid tuples raise the errors of their conversion.
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(1, 1), bpp=32)
+        try:
+            sdl2ext.convert_to_color((255, [1], 0))
+        except TypeError as exc:
+            expected = str(exc)
+        with self.assertRaises(TypeError) as ctx:
+            sdl2ext.prepare_color((255, [1], 0), sprite)
+        self.assertEqual(str(ctx.exception), expected)
+
+        for x in range(draw._FORMATCACHE_SIZE + 1):
+            pformat = pixels.SDL_PixelFormat(BitsPerPixel=32, Rmask=x + 1)
+            sdl2ext.prepare_color(0xFFFFFFFF, pformat)
+            self.assertLessEqual(len(draw._colorcache),
+                                 draw._FORMATCACHE_SIZE)
+
+    @unittest.skipIf(not draw._HASNUMPY, "numpy module is not supported")
+    def test_map_colors(self):
+        colors = [(0, 0, 0, 0), (255, 255, 255, 255), (8, 55, 110, 220),
+                  (255, 0, 0, 128), (1, 2, 3, 4)]
+        for fmt in (pixels.SDL_PIXELFORMAT_INDEX8,
+                    pixels.SDL_PIXELFORMAT_RGB332,
+                    pixels.SDL_PIXELFORMAT_ARGB4444,
+                    pixels.SDL_PIXELFORMAT_RGB565,
+                    pixels.SDL_PIXELFORMAT_RGB24,
+                    pixels.SDL_PIXELFORMAT_RGB888,
+                    pixels.SDL_PIXELFORMAT_RGBA8888,
+                    pixels.SDL_PIXELFORMAT_ARGB2101010):
+            pformat = pixels.SDL_AllocFormat(fmt)
+            if fmt == pixels.SDL_PIXELFORMAT_INDEX8:
+                palette = pixels.SDL_AllocPalette(256)
+                entries = (pixels.SDL_Color * 3)(
+                    pixels.SDL_Color(0, 0, 0), pixels.SDL_Color(10, 50, 100),
+                    pixels.SDL_Color(250, 250, 250))
+                pixels.SDL_SetPaletteColors(palette, entries, 0, 3)
+                pixels.SDL_SetPixelFormatPalette(pformat, palette)
+                pixels.SDL_FreePalette(palette)
+            values = sdl2ext.map_colors(pformat.contents, colors)
+            self.assertEqual(values.shape, (len(colors),))
+            for color, value in zip(colors, values):
+                self.assertEqual(value, pixels.SDL_MapRGBA(pformat, *color))
+            pixels.SDL_FreeFormat(pformat)
+
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(10, 10), bpp=32)
+        values = sdl2ext.map_colors(sprite, [colors, colors])
+        self.assertEqual(values.shape, (2, len(colors)))
+        self.assertEqual(values[1][2], sdl2ext.prepare_color(colors[2],
+                                                             sprite))
+        self.assertRaises(ValueError, sdl2ext.map_colors, sprite,
+                          [(1, 2, 3)])
+        self.assertRaises(TypeError, sdl2ext.map_colors, None, colors)
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -1,8 +1,10 @@
 # coding=utf-8
+import os
 import sys
 import unittest
 from .. import ext as sdl2ext
 from ..ext.compat import byteify
+from ctypes import addressof, byref, c_int
 from .. import surface, sdlttf
 
 RESOURCES = sdl2ext.Resources(__file__, "resources")
@@ -38,13 +40,56 @@ class SDL2ExtFontTest(unittest.TestCase):
         font = sdl2ext.BitmapFont(sprite, (32, 32), FONTMAP)
         self.assertIsInstance(font, sdl2ext.BitmapFont)
 
-    @unittest.skip("not implemented")
     def test_BitmapFont_render(self):
-        pass
+        sf = surface.SDL_LoadBMP(byteify(RESOURCES.get_path("font.bmp"),
+                                         "utf-8"))
+        font = sdl2ext.BitmapFont(sf.contents, (32, 32), FONTMAP)
+        sprite = font.render("text")
+        self.assertIsInstance(sprite, sdl2ext.SoftwareSprite)
+        self.assertEqual(sprite.size, (128, 32))
+        sprite = font.render("text%sabc" % os.linesep)
+        self.assertEqual(sprite.size, (128, 64))
 
-    @unittest.skip("not implemented")
     def test_BitmapFont_render_on(self):
-        pass
+        sf = surface.SDL_LoadBMP(byteify(RESOURCES.get_path("font.bmp"),
+                                         "utf-8"))
+        font = sdl2ext.BitmapFont(sf.contents, (32, 32), FONTMAP)
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        target = factory.create_sprite(size=(200, 100), bpp=32)
+        area = font.render_on(target, "abc", offset=(10, 5))
+        self.assertEqual(area, (10, 5, 10 + 96 + 32, 5 + 32 + 32))
+        area = font.render_on(target, "abc%sa" % os.linesep)
+        self.assertEqual(area, (0, 0, 64, 96))
+        self.assertRaises(TypeError, font.render_on, None, "abc")
+
+    def test_BitmapFont_draw(self):
+        sf = surface.SDL_LoadBMP(byteify(RESOURCES.get_path("font.bmp"),
+                                         "utf-8"))
+        font = sdl2ext.BitmapFont(sf.contents, (32, 32), FONTMAP)
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        target = factory.create_sprite(size=(200, 100), bpp=32)
+        expected = font.render("ab%s1" % os.linesep, bpp=32)
+        renderer = sdl2ext.Renderer(target)
+        self.assertRaises(TypeError, font.draw, None, "ab")
+
+        area = font.draw(renderer, "ab%s1" % os.linesep, (10, 20))
+        self.assertEqual(area, (10, 20, 64, 64))
+        texture = font.get_texture(renderer)
+        self.assertIsInstance(texture, sdl2ext.TextureSprite)
+        self.assertIs(font.get_texture(renderer), texture)
+        areas = font.draw_texts(renderer, [("1", (150, 0)),
+                                           ("abc", (100, 68))])
+        self.assertEqual(areas, [(150, 0, 32, 32), (100, 68, 96, 32)])
+        renderer.present()
+
+        # The texture-based drawing matches the software rendering.
+        view = sdl2ext.PixelView(target)
+        source = sdl2ext.PixelView(expected)
+        for y in range(0, 64, 3):
+            for x in range(0, 64, 3):
+                self.assertEqual(view[20 + y][10 + x] & 0xFFFFFF,
+                                 source[y][x] & 0xFFFFFF)
+        del view, source
 
     def test_BitmapFont_contains(self):
         sf = surface.SDL_LoadBMP(byteify(RESOURCES.get_path("font.bmp"),
@@ -141,6 +186,317 @@ text long enough to have it wrapped at 100 px width.""", size=20, width=100)
         self.assertTrue(text_surf.w == 100)
         self.assertRaises(KeyError, fm.render, "text", alias="inexistent")
 
+    def test_FontManager_preload(self):
+        registry = sdl2ext.FontRegistry()
+        fm = sdl2ext.FontManager(RESOURCES.get_path("tuffy.ttf"),
+                                 registry=registry)
+        self.assertIs(fm.registry, registry)
+        fm.preload([10, 12, 16])
+        self.assertEqual(sorted(fm.fonts["tuffy"]), [10, 12, 16])
+        self.assertEqual(len(registry), 3)
+        self.assertRaises(KeyError, fm.preload, [10], "inexistent")
+
+        # FontManager objects share the fonts of their registry.
+        fm2 = sdl2ext.FontManager(RESOURCES.get_path("tuffy.ttf"), size=12,
+                                  registry=registry)
+        self.assertEqual(addressof(fm.fonts["tuffy"][12].contents),
+                         addressof(fm2.fonts["tuffy"][12].contents))
+        self.assertEqual(registry.references(RESOURCES.get_path("tuffy.ttf"),
+                                             12), 2)
+        fm.close()
+        self.assertEqual(len(registry), 1)
+        self.assertTrue(fm2.render("text").w > 1)
+        fm2.close()
+        self.assertEqual(len(registry), 0)
+        self.assertIsInstance(sdl2ext.font_registry(), sdl2ext.FontRegistry)
+        self.assertIs(sdl2ext.font_registry(), sdl2ext.font_registry())
+
+    def test_FontRegistry(self):
+        registry = sdl2ext.FontRegistry()
+        fname = RESOURCES.get_path("tuffy.ttf")
+        font = registry.open(fname, 16)
+        self.assertIsInstance(font.contents, sdlttf.TTF_Font)
+        self.assertEqual(sdlttf.TTF_FontHeight(font),
+                         sdlttf.TTF_FontHeight(sdlttf.TTF_OpenFont(
+                             byteify(fname, "utf-8"), 16)))
+        self.assertEqual(addressof(registry.open(fname, 16).contents),
+                         addressof(font.contents))
+        self.assertEqual(registry.references(fname, 16), 2)
+        registry.close(font)
+        registry.close(font)
+        self.assertEqual(registry.references(fname, 16), 0)
+        self.assertEqual(len(registry), 0)
+
+        fonts = registry.preload(fname, [10, 20])
+        self.assertEqual(len(fonts), 2)
+        self.assertEqual(registry.references(fname, 20), 1)
+        font = registry.open(fname, 20)
+        registry.close(font)
+        self.assertEqual(len(registry), 2)
+        registry.unload(fname)
+        self.assertEqual(len(registry), 0)
+        self.assertRaises(IOError, registry.open, "inexistent.ttf", 10)
+
+        # Fonts and mapped files are dropped on shutting down SDL_ttf.
+        registry.open(fname, 12)
+        self.assertEqual(len(registry._files), 1)
+        sdlttf.TTF_Quit()
+        font = registry.open(fname, 14)
+        self.assertEqual(len(registry), 1)
+        self.assertEqual(len(registry._files), 1)
+        # A mapping still referenced by ctypes objects is left to the GC.
+        mapped, buf = registry._files[os.path.abspath(fname)]
+        registry.close(font)
+        self.assertEqual(len(registry._files), 0)
+        del mapped, buf
+
+    def test_FontManager_render_cache(self):
+        cache = sdl2ext.TextCache()
+        fm = sdl2ext.FontManager(RESOURCES.get_path("tuffy.ttf"),
+                                 cache=cache)
+        self.assertIs(fm.cache, cache)
+        sf1 = fm.render("text")
+        sf2 = fm.render("text")
+        self.assertIsInstance(sf2, surface.SDL_Surface)
+        self.assertEqual((sf1.w, sf1.h), (sf2.w, sf2.h))
+        # Callers own the returned surfaces.
+        surface.SDL_FreeSurface(sf1)
+        surface.SDL_FreeSurface(sf2)
+        self.assertEqual(len(cache), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+        self.assertEqual(cache.hit_rate, 0.5)
+
+        fm.render("text", color=(255, 0, 0, 255))
+        fm.render("text", size=20)
+        self.assertEqual(len(cache), 3)
+        self.assertTrue(cache.total > 0)
+
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        target = factory.create_sprite(size=(10, 10))
+        renderer = sdl2ext.Renderer(target)
+        sprite = fm.render_texture(renderer, "text")
+        self.assertIsInstance(sprite, sdl2ext.TextureSprite)
+        self.assertIs(fm.render_texture(renderer, "text"), sprite)
+        self.assertEqual(len(cache), 4)
+        self.assertRaises(TypeError, fm.render_texture, None, "text")
+
+        cache.reset_stats()
+        self.assertEqual(fm.prewarm(["Start", "Options", "text"]), 2)
+        self.assertEqual(fm.prewarm(["Start", "Quit"], renderer), 2)
+        self.assertEqual((cache.hits, cache.misses), (0, 0))
+        fm.render("Options")
+        self.assertEqual(cache.hits, 1)
+        self.assertEqual(len(cache), 8)
+
+        # Least recently used entries are dropped to stay within budget.
+        cache.budget = cache.total // 2
+        fm.render("Quit")
+        self.assertTrue(cache.total <= cache.budget)
+        self.assertTrue(cache.evictions > 0)
+        cache.clear()
+        self.assertEqual((len(cache), cache.total), (0, 0))
+
+        # Entries exceeding the budget are not kept.
+        cache.budget = 0
+        sf = fm.render("text")
+        self.assertTrue(sf.w > 1)
+        surface.SDL_FreeSurface(sf)
+        self.assertEqual(len(cache), 0)
+
+        fm.cache = None
+        self.assertRaises(ValueError, fm.prewarm, ["text"])
+        self.assertRaises(ValueError, sdl2ext.TextCache, -1)
+        self.assertRaises(TypeError, cache.put, "key", None)
+
+    def test_FontManager_render_cache_style(self):
+        cache = sdl2ext.TextCache()
+        fm = sdl2ext.FontManager(RESOURCES.get_path("tuffy.ttf"),
+                                 cache=cache)
+        font = fm.fonts[fm.default_font][fm.size]
+        plain = fm.render("text")
+        sdlttf.TTF_SetFontStyle(font, sdlttf.TTF_STYLE_BOLD)
+        bold = fm.render("text")
+        self.assertEqual(len(cache), 2)
+        self.assertNotEqual(plain.w, bold.w)
+        sdlttf.TTF_SetFontStyle(font, sdlttf.TTF_STYLE_NORMAL)
+        again = fm.render("text")
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(again.w, plain.w)
+        for sf in (plain, bold, again):
+            surface.SDL_FreeSurface(sf)
+        fm.close()
+
+    def test_FontManager_draw(self):
+        fm = sdl2ext.FontManager(RESOURCES.get_path("tuffy.ttf"))
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        target = factory.create_sprite(size=(100, 40), bpp=32)
+        renderer = sdl2ext.Renderer(target)
+        renderer.clear(0xFF000000)
+        area = fm.draw(renderer, "1234", 10, 5, color=(255, 0, 0, 255))
+        self.assertEqual(area[:2], (10, 5))
+        self.assertTrue(area[2] > 1)
+        renderer.present()
+        view = sdl2ext.PixelView(target)
+        drawn = [view[y][x] & 0xFFFFFF for y in range(40) for x in range(100)]
+        del view
+        self.assertIn(0xFF0000, drawn)
+        self.assertTrue(all(pixel & 0x00FFFF == 0 for pixel in drawn))
+
+        atlas = fm.get_atlas(renderer)
+        self.assertIsInstance(atlas, sdl2ext.GlyphAtlas)
+        self.assertIs(fm.get_atlas(renderer, "tuffy", 16), atlas)
+        self.assertIsNot(fm.get_atlas(renderer, size=20), atlas)
+        self.assertRaises(KeyError, fm.get_atlas, renderer, "inexistent")
+        fm.close()
+        self.assertEqual(renderer.textures.totals.get("glyphs"), 0)
+
+    def test_GlyphAtlas(self):
+        fm = sdl2ext.FontManager(RESOURCES.get_path("tuffy.ttf"))
+        font = fm.fonts["tuffy"][16]
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        target = factory.create_sprite(size=(100, 40), bpp=32)
+        renderer = sdl2ext.Renderer(target)
+        self.assertRaises(TypeError, sdl2ext.GlyphAtlas, target, font)
+
+        atlas = sdl2ext.GlyphAtlas(renderer, font, pagesize=(64, 32))
+        self.assertEqual(len(atlas), 0)
+        self.assertEqual(atlas.height, sdlttf.TTF_FontHeight(font))
+        width, height = atlas.measure("text")
+        self.assertTrue(width > 1)
+        self.assertEqual(height, atlas.height)
+        # Each glyph is rasterized only once.
+        self.assertEqual(len(atlas), 3)
+        for ch in "tex":
+            self.assertIn(ch, atlas)
+        atlas.draw("next text", 0, 0)
+        self.assertEqual(len(atlas), 5)
+        self.assertEqual(len(atlas.pages), 1)
+
+        lineskip = sdlttf.TTF_FontLineSkip(font)
+        self.assertEqual(atlas.measure(u"text\ntext"),
+                         (width, lineskip + height))
+        self.assertEqual(atlas.measure(b"text"), (width, height))
+
+        # Glyphs not fitting on a page are put onto new pages.
+        area = atlas.draw("ABCDEFGHIJKLMNOPQRSTUVWXYZ", 5, 5, (0, 0, 255, 255))
+        self.assertEqual(area[:2], (5, 5))
+        self.assertTrue(len(atlas.pages) > 1)
+        renderer.present()
+        view = sdl2ext.PixelView(target)
+        self.assertTrue(any(value & 0xFF for row in view[5:25]
+                            for value in row[5:100]))
+        del view
+
+        atlas.clear()
+        self.assertEqual(len(atlas), 0)
+        self.assertEqual(atlas.pages, [])
+        self.assertEqual(len(renderer.textures), 0)
+        self.assertRaises(ValueError,
+                          sdl2ext.GlyphAtlas(renderer, font, (4, 4)).draw,
+                          "A")
+
+    def test_TextLayout(self):
+        fm = sdl2ext.FontManager(RESOURCES.get_path("tuffy.ttf"))
+        font = fm.fonts["tuffy"][16]
+        lineskip = sdlttf.TTF_FontLineSkip(font)
+        self.assertRaises(ValueError, sdl2ext.TextLayout, font, align="top")
+        self.assertRaises(ValueError, sdl2ext.TextLayout, font, width=0)
+
+        layout = fm.layout("one two\nthree")
+        self.assertIsInstance(layout, sdl2ext.TextLayout)
+        self.assertEqual(layout.paragraphs, ("one two", "three"))
+        self.assertEqual(len(layout), 2)
+        lines = list(layout.lines())
+        self.assertEqual([runs for _, runs, _ in lines],
+                         [[(0, "one two")], [(0, "three")]])
+        self.assertEqual([y for y, _, _ in lines], [0, lineskip])
+        w, h = c_int(), c_int()
+        sdlttf.TTF_SizeUTF8(font, b"one two", byref(w), byref(h))
+        self.assertEqual(lines[0][2], w.value)
+        self.assertEqual(layout.size[1], lineskip + layout.height)
+
+        text = "The quick brown fox jumps over the lazy dog"
+        layout = sdl2ext.TextLayout(font, text, width=100)
+        self.assertTrue(len(layout) > 1)
+        words = []
+        for y, runs, width in layout.lines():
+            self.assertTrue(width <= 100)
+            self.assertEqual(runs[0][0], 0)
+            words.extend(runs[0][1].split(" "))
+        self.assertEqual(words, text.split(" "))
+        self.assertEqual(layout.size, (100, layout.size[1]))
+
+        layout.align = "right"
+        for y, runs, width in layout.lines():
+            self.assertEqual(runs[0][0], 100 - width)
+        layout.align = "justify"
+        lines = list(layout.lines())
+        for y, runs, width in lines[:-1]:
+            self.assertTrue(len(runs) > 1)
+            self.assertEqual(width, 100)
+        self.assertEqual(len(lines[-1][1]), 1)
+
+        # Words exceeding the width are broken.
+        layout = sdl2ext.TextLayout(font, "W" * 20, width=50)
+        parts = [runs[0][1] for _, runs, _ in layout.lines()]
+        self.assertTrue(len(parts) > 1)
+        self.assertEqual("".join(parts), "W" * 20)
+
+        # Widths measured before a style change are not reused.
+        normal = sdl2ext.TextLayout(font, "one two")
+        sdlttf.TTF_SetFontStyle(font, sdlttf.TTF_STYLE_BOLD)
+        sdlttf.TTF_SetFontOutline(font, 1)
+        bold = sdl2ext.TextLayout(font, "one two")
+        sdlttf.TTF_SizeUTF8(font, b"one two", byref(w), byref(h))
+        self.assertEqual(bold.size[0], w.value)
+        self.assertNotEqual(bold.size[0], normal.size[0])
+        sdlttf.TTF_SetFontOutline(font, 0)
+        sdlttf.TTF_SetFontStyle(font, sdlttf.TTF_STYLE_NORMAL)
+        self.assertEqual(sdl2ext.TextLayout(font, "one two").size[0],
+                         normal.size[0])
+
+    def test_TextLayout_edit(self):
+        fm = sdl2ext.FontManager(RESOURCES.get_path("tuffy.ttf"))
+        layout = fm.layout("\n".join("line %d" % i for i in range(1000)),
+                           width=200)
+        lineskip = layout.lineskip
+        self.assertEqual(len(layout), 1000)
+        self.assertEqual(layout.text.split("\n")[999], "line 999")
+
+        layout.set_paragraph(10, "a long line, " * 10)
+        count = len(layout)
+        self.assertTrue(count > 1000)
+        y, runs, _ = next(layout.lines(11 + count - 1000))
+        self.assertEqual(runs[0][1], "line 11")
+        self.assertEqual(y, (11 + count - 1000) * lineskip)
+
+        layout.remove_paragraph(10)
+        layout.insert_paragraph(0, "first")
+        layout.append_paragraph("last")
+        layout.remove_paragraph(-1)
+        layout.append_paragraph("last")
+        self.assertEqual(len(layout), 1001)
+        lines = list(layout.lines(0, 2))
+        self.assertEqual([runs[0][1] for _, runs, _ in lines],
+                         ["first", "line 0"])
+        self.assertEqual(next(layout.lines(1000))[1][0][1], "last")
+        self.assertEqual(list(layout.lines(1001)), [])
+        self.assertRaises(ValueError, layout.set_paragraph, 0, "a\nb")
+
+        lines = list(layout.visible_lines(500 * lineskip, 3 * lineskip))
+        self.assertEqual([runs[0][1] for _, runs, _ in lines],
+                         ["line 500", "line 501", "line 502"])
+
+        layout.text = "first\nsecond"
+        self.assertEqual(len(layout), 2)
+
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        target = factory.create_sprite(size=(100, 40))
+        renderer = sdl2ext.Renderer(target)
+        atlas = fm.get_atlas(renderer)
+        self.assertEqual(layout.draw(atlas), 2)
+        self.assertEqual(layout.draw(atlas, top=lineskip, height=lineskip), 1)
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -1,7 +1,10 @@
+import os
 import sys
+import shutil
+import tempfile
 import unittest
 from .. import ext as sdl2ext
-from .. import surface
+from .. import surface, pixels
 
 RESOURCES = sdl2ext.Resources(__file__, "resources")
 
@@ -66,6 +69,79 @@ class SDL2ExtImageTest(unittest.TestCase):
             sf = sdl2ext.load_image(filename, enforce="SDL")
             self.assertIsInstance(sf, surface.SDL_Surface)
 
+    def test_load_image_pixelformat(self):
+        filename = RESOURCES.get_path("surfacetest.png")
+        sf = sdl2ext.load_image(filename)
+        self.assertNotEqual(sf.format.contents.format,
+                            pixels.SDL_PIXELFORMAT_RGB565)
+        surface.SDL_FreeSurface(sf)
+        for fmt in (pixels.SDL_PIXELFORMAT_ARGB8888,
+                    pixels.SDL_PIXELFORMAT_RGB565):
+            sf = sdl2ext.load_image(filename, pixelformat=fmt)
+            self.assertEqual(sf.format.contents.format, fmt)
+            self.assertEqual((sf.w, sf.h), (32, 32))
+            surface.SDL_FreeSurface(sf)
+        self.assertRaises(sdl2ext.SDLError, sdl2ext.load_image, filename,
+                          pixelformat=0xFFFFFFFF)
+
+    def test_ImageCache(self):
+        self.assertRaises(ValueError, sdl2ext.ImageCache, -1)
+        cache = sdl2ext.ImageCache()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.hit_rate, 0.0)
+
+        tmpdir = tempfile.mkdtemp()
+        try:
+            filename = os.path.join(tmpdir, "image.png")
+            shutil.copy(RESOURCES.get_path("surfacetest.png"), filename)
+            fmt = pixels.SDL_PIXELFORMAT_ARGB8888
+            sf1 = sdl2ext.load_image(filename, pixelformat=fmt, cache=cache)
+            sf2 = sdl2ext.load_image(filename, pixelformat=fmt, cache=cache)
+            self.assertEqual((cache.hits, cache.misses), (1, 1))
+            self.assertEqual(len(cache), 1)
+            self.assertEqual(cache.total, 32 * 4 * 32)
+            # Each call returns its own copy in the requested format.
+            self.assertNotEqual(sf1.pixels, sf2.pixels)
+            self.assertEqual(sf2.format.contents.format, fmt)
+            view1 = sdl2ext.PixelView(sf1)
+            view2 = sdl2ext.PixelView(sf2)
+            self.assertEqual(view1[5][7], view2[5][7])
+            del view1, view2
+            surface.SDL_FreeSurface(sf1)
+            surface.SDL_FreeSurface(sf2)
+
+            # Other formats and changed files are cached separately.
+            surface.SDL_FreeSurface(sdl2ext.load_image(filename, cache=cache))
+            self.assertEqual(len(cache), 2)
+            shutil.copy(RESOURCES.get_path("surfacetest.gif"), filename)
+            os.utime(filename, (0, 0))
+            surface.SDL_FreeSurface(sdl2ext.load_image(filename, cache=cache))
+            self.assertEqual(cache.misses, 3)
+            self.assertEqual(cache.hit_rate, 0.25)
+
+            factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+            sprite = factory.from_image(filename, pixelformat=fmt,
+                                        cache=cache)
+            self.assertEqual(sprite.surface.format.contents.format, fmt)
+            self.assertEqual(len(cache), 4)
+
+            cache.reset_stats()
+            self.assertEqual((cache.hits, cache.misses, cache.evictions),
+                             (0, 0, 0))
+            cache.budget = 4096
+            surface.SDL_FreeSurface(sdl2ext.load_image(
+                filename, pixelformat=pixels.SDL_PIXELFORMAT_RGB565,
+                cache=cache))
+            self.assertLessEqual(cache.total, 4096)
+            self.assertLess(len(cache), 4)
+            self.assertEqual(cache.evictions, 5 - len(cache))
+            cache.clear()
+            self.assertEqual(len(cache), 0)
+            self.assertEqual(cache.total, 0)
+            self.assertRaises(TypeError, cache.put, "key", None)
+        finally:
+            shutil.rmtree(tmpdir)
+
 
 if __name__ == '__main__':
     sys.exit(unittest.main())
@@ -0,0 +1,151 @@
+import io
+import os
+import sys
+import mmap
+import shutil
+import tempfile
+import unittest
+from ..ext import pack, resources
+from ..ext.mkpack import main
+
+
+class SDL2ExtPackTest(unittest.TestCase):
+    __tags__ = ["sdl2ext"]
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.root = os.path.join(self.tmpdir, "assets")
+        os.makedirs(os.path.join(self.root, "maps", "old"))
+        self.contents = {
+            "readme.txt": b"text " * 1000,
+            "noise.bin": os.urandom(5000),
+            "empty.dat": b"",
+            "maps/level1.txt": b"level " * 500,
+            "maps/old/level1.txt": b"level " * 500,
+            "maps/copy.bin": None,
+            }
+        self.contents["maps/copy.bin"] = self.contents["noise.bin"]
+        for name, data in self.contents.items():
+            with open(os.path.join(self.root, name), "wb") as fp:
+                fp.write(data)
+        self.packfile = os.path.join(self.tmpdir, "assets.pack")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_create_pack(self):
+        self.assertEqual(pack.create_pack(self.packfile, self.root), 6)
+        self.assertTrue(pack.is_packfile(self.packfile))
+        self.assertFalse(pack.is_packfile(os.path.join(self.root,
+                                                       "readme.txt")))
+        self.assertFalse(pack.is_packfile("invalid"))
+
+        packf = pack.PackFile(self.packfile)
+        self.assertEqual(len(packf), 6)
+        self.assertEqual(sorted(packf.namelist()), sorted(self.contents))
+        for name, data in self.contents.items():
+            self.assertIn(name, packf)
+            self.assertEqual(packf.read(name), data)
+        self.assertNotIn("level1.txt", packf)
+        self.assertRaises(KeyError, packf.read, "level1.txt")
+        self.assertRaises(KeyError, packf.getinfo, "invalid")
+        # A matching hash alone does not find a member.
+        name = packf._names[0]
+        packf._names[0] = "other"
+        self.assertNotIn(name, packf)
+        packf._names[0] = name
+        self.assertIn(name, packf)
+
+        # Text is compressed, noise is stored page-aligned and only once.
+        offset, stored, size, codec = packf.getinfo("readme.txt")
+        self.assertEqual(codec, pack.PACK_ZLIB)
+        self.assertLess(stored, size)
+        self.assertIsNone(packf.data_range("readme.txt"))
+        offset, size = packf.data_range("noise.bin")
+        self.assertEqual(offset % 4096, 0)
+        self.assertEqual(size, 5000)
+        self.assertEqual(packf.data_range("maps/copy.bin"), (offset, size))
+        self.assertEqual(packf.getinfo("maps/level1.txt"),
+                         packf.getinfo("maps/old/level1.txt"))
+        packf.close()
+
+        pack.create_pack(self.packfile, self.root, codec="none", align=1)
+        packf = pack.PackFile(self.packfile)
+        self.assertEqual(packf.getinfo("readme.txt")[3], pack.PACK_STORED)
+        self.assertEqual(packf.read("maps/old/level1.txt"), b"level " * 500)
+        packf.close()
+
+        self.assertRaises(ValueError, pack.create_pack, self.packfile,
+                          self.root, codec="invalid")
+        self.assertRaises(ValueError, pack.create_pack, self.packfile,
+                          "invalid")
+        self.assertRaises(TypeError, pack.PackFile,
+                          os.path.join(self.root, "readme.txt"))
+
+    @unittest.skipIf(not pack._HASLZ4, "lz4 module is not supported")
+    def test_create_pack_lz4(self):
+        pack.create_pack(self.packfile, self.root, codec="lz4")
+        packf = pack.PackFile(self.packfile)
+        self.assertEqual(packf.getinfo("readme.txt")[3], pack.PACK_LZ4)
+        for name, data in self.contents.items():
+            self.assertEqual(packf.read(name), data)
+        packf.close()
+
+    def test_mkpack(self):
+        self.assertEqual(main(["-q", "-c", "none", self.packfile,
+                               self.root]), 0)
+        packf = pack.PackFile(self.packfile)
+        self.assertEqual(len(packf), 6)
+        packf.close()
+        stderr = sys.stderr
+        sys.stderr = io.BytesIO() if sys.version_info[0] < 3 else \
+            io.StringIO()
+        try:
+            self.assertRaises(SystemExit, main, ["-q", self.packfile])
+            self.assertIn("PACKFILE and DIRECTORY are required",
+                          sys.stderr.getvalue())
+        finally:
+            sys.stderr = stderr
+
+    def test_Resources_pack(self):
+        pack.create_pack(self.packfile, self.root)
+        res = resources.Resources()
+        res.add(self.packfile)
+        self.assertEqual(res.get("readme.txt").read(),
+                         self.contents["readme.txt"])
+        self.assertEqual(res.get("copy.bin").read(),
+                         self.contents["noise.bin"])
+        self.assertEqual(res.get("maps/old/level1.txt").read(),
+                         self.contents["maps/old/level1.txt"])
+        self.assertEqual(res.files["maps/level1.txt"][2], "maps/level1.txt")
+        self.assertEqual(res.files["maps/old/level1.txt"][2],
+                         "maps/old/level1.txt")
+        self.assertTrue(res.get_path("level1.txt").endswith(
+            "@" + os.path.abspath(self.packfile)))
+
+        buf = res.get_buffer("noise.bin")
+        if sys.version_info[0] >= 3:
+            self.assertIsInstance(buf.obj, mmap.mmap)
+        self.assertEqual(buf.tobytes(), self.contents["noise.bin"])
+        self.assertEqual(res.get_buffer("readme.txt").tobytes(),
+                         self.contents["readme.txt"])
+        self.assertEqual(res.get_buffer("empty.dat").tobytes(), b"")
+        res.close()
+
+        res = resources.Resources()
+        res.add_archive(self.packfile, typehint="pack")
+        self.assertEqual(res.get("level1.txt").read(), b"level " * 500)
+        self.assertRaises(TypeError, res.add_archive,
+                          os.path.join(self.root, "readme.txt"), "pack")
+
+        index = os.path.join(self.tmpdir, "index.json")
+        os.remove(os.path.join(self.root, "readme.txt"))
+        shutil.move(self.packfile, self.root)
+        res = resources.Resources(self.root, index=index)
+        self.assertEqual(res.files, resources.Resources(self.root).files)
+        self.assertEqual(res.get("readme.txt").read(),
+                         self.contents["readme.txt"])
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
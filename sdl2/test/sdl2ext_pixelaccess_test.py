@@ -1,6 +1,7 @@
 import sys
 import unittest
 from .. import ext as sdl2ext
+from .. import surface
 
 try:
     import numpy
@@ -35,7 +36,129 @@ class SDL2ExtPixelAccessTest(unittest.TestCase):
                 for col in row:
                     self.assertEqual(col, 0x0)
 
-    @unittest.skip("not implemented")
+    def test_PixelView_bpp(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        for bpp in (8, 16, 24, 32):
+            sprite = factory.create_sprite(size=(6, 4), bpp=bpp)
+            view = sdl2ext.PixelView(sprite)
+            self.assertEqual(len(view), 4)
+            self.assertEqual(len(view[0]), 6)
+            rcolor = sdl2ext.prepare_color(0xFF102030, sprite)
+            view[2][3] = 0xFF102030
+            self.assertEqual(view[2][3], rcolor)
+            self.assertEqual(view[2, 3], rcolor)
+            self.assertEqual(view[-2][-3], rcolor)
+            self.assertEqual(view[2][2], 0)
+            self.assertEqual(view[2][4], 0)
+            self.assertEqual(view[1][3], 0)
+            view[3, 0] = 0xFF102030
+            self.assertEqual(list(view[3]), [rcolor, 0, 0, 0, 0, 0])
+            self.assertRaises(IndexError, view[0].__getitem__, 6)
+            self.assertRaises(IndexError, view.__getitem__, 4)
+            self.assertRaises(ValueError, view.__setitem__, 0, (0, 0))
+            del view
+
+    def test_PixelView_slicing(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        for bpp in (24, 32):
+            sprite = factory.create_sprite(size=(10, 8), bpp=bpp)
+            rcolor = sdl2ext.prepare_color(0xFFAABBCC, sprite)
+            view = sdl2ext.PixelView(sprite)
+            rows = view[2:5]
+            self.assertEqual(len(rows), 3)
+            self.assertEqual(rows.strides, (3, 10))
+            area = view[2:5, 3:7]
+            self.assertEqual(len(area), 3)
+            self.assertEqual(len(area[0]), 4)
+            area[1][0] = 0xFFAABBCC
+            self.assertEqual(view[3][3], rcolor)
+            self.assertEqual(rows[1][3], rcolor)
+            self.assertEqual(area[1:, 1:][0][-1], 0)
+
+            area[2] = (0xFFAABBCC,) * 4
+            self.assertEqual(list(view[4]),
+                             [0, 0, 0] + [rcolor] * 4 + [0, 0, 0])
+            view[0:2, 8:10] = ((0xFFAABBCC, 0xFFAABBCC), (0, 0xFFAABBCC))
+            self.assertEqual(list(view[0][7:]), [0, rcolor, rcolor])
+            self.assertEqual(list(view[1][7:]), [0, 0, rcolor])
+            view[5][1:3] = (0xFFAABBCC, 0xFFAABBCC)
+            self.assertEqual(list(view[5][:4]), [0, rcolor, rcolor, 0])
+            view[6, 2:4] = (0xFFAABBCC, 0xFFAABBCC)
+            self.assertEqual(list(view[6][:5]), [0, 0, rcolor, rcolor, 0])
+            view[5:8, 9] = (0xFFAABBCC, 0, 0xFFAABBCC)
+            self.assertEqual([view[y][9] for y in range(5, 8)],
+                             [rcolor, 0, rcolor])
+            self.assertRaises(ValueError, view.__setitem__,
+                              (6, slice(0, 2)), (0,))
+            self.assertRaises(ValueError, view.__setitem__,
+                              (slice(0, 2), 0), (0,))
+            self.assertRaises(ValueError, view.__setitem__,
+                              (slice(0, 2), slice(0, 2)), ((0, 0),))
+            del area, rows, view
+
+    def test_surface_pixels(self):
+        self.assertRaises(TypeError, sdl2ext.surface_pixels, None)
+        # RLE-encoded surfaces must be locked to access their pixels.
+        sf = surface.SDL_CreateRGBSurface(0, 4, 4, 32, 0xFF0000, 0xFF00,
+                                          0xFF, 0).contents
+        dst = surface.SDL_CreateRGBSurface(0, 4, 4, 32, 0xFF0000, 0xFF00,
+                                           0xFF, 0)
+        surface.SDL_SetSurfaceRLE(sf, 1)
+        surface.SDL_SetColorKey(sf, 1, 0)
+        surface.SDL_BlitSurface(sf, None, dst, None)
+        surface.SDL_FreeSurface(dst)
+        self.assertTrue(surface.SDL_MUSTLOCK(sf))
+
+        pixels = sdl2ext.surface_pixels(sf)
+        self.assertIsInstance(pixels, sdl2ext.SurfacePixels)
+        self.assertFalse(pixels.locked)
+        self.assertRaises(ValueError, pixels.view)
+        self.assertRaises(ValueError, pixels.unlock)
+        with pixels as outer:
+            self.assertIs(outer, pixels)
+            self.assertTrue(pixels.locked)
+            self.assertEqual(sf.locked, 1)
+            with sdl2ext.surface_pixels(sf) as inner:
+                # The surface is only locked once.
+                self.assertEqual(sf.locked, 1)
+                view = inner.view()
+                view[1][2] = 0xFFAABBCC
+            self.assertEqual(sf.locked, 1)
+            self.assertEqual(outer.view()[1][2], 0xAABBCC)
+        self.assertFalse(pixels.locked)
+        self.assertEqual(sf.locked, 0)
+
+        # The pixels of RLE-encoded surfaces are freed on unlocking them.
+        self.assertRaises(ValueError, view[1].__setitem__, 2, 0)
+        self.assertRaises(ValueError, view[1].__getitem__, 2)
+        self.assertRaises(ValueError, view.__setitem__, 0, (0,) * 4)
+        self.assertRaises(ValueError, list, view[0])
+        del view
+        surface.SDL_FreeSurface(sf)
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_surface_pixels_numpy(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(5, 10), bpp=32)
+        with sdl2ext.surface_pixels(sprite) as pixels:
+            array2d = pixels.pixels2d()
+            array3d = pixels.pixels3d()
+            self.assertEqual(array2d.shape, (5, 10))
+            self.assertEqual(array3d.shape, (5, 10, 4))
+            array2d[1:3] = 0xAABBCC
+            self.assertEqual(pixels.view()[4][2], 0xAABBCC)
+            self.assertEqual(array3d[2, 4, 0], 0xCC)
+            array2d += 1
+            self.assertIsInstance(array2d, sdl2ext.pixelaccess.SurfaceArray)
+            self.assertEqual(array3d[2, 4, 0], 0xCD)
+            copy = array2d * 2
+            self.assertNotIsInstance(copy, sdl2ext.pixelaccess.SurfaceArray)
+        self.assertRaises(ValueError, array2d.__setitem__, (0, 0), 1)
+        self.assertRaises(ValueError, array3d.__getitem__, (1, 0, 0))
+        self.assertRaises(ValueError, numpy.add, array2d, 1)
+        self.assertRaises(ValueError, repr, array3d)
+        self.assertEqual(copy[1, 4], 0xAABBCD * 2)
+
     @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
     def test_pixels2d(self):
         factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
@@ -44,6 +167,115 @@ class SDL2ExtPixelAccessTest(unittest.TestCase):
                                               0x0000FF00, 0x000000FF))
         sdl2ext.fill(sprite, 0x01, (2, 2, 2, 2))
         nparray = sdl2ext.pixels2d(sprite)
+        self.assertEqual(nparray.shape, (5, 10))
+        self.assertEqual(nparray.dtype, numpy.uint32)
+        rcolor = sdl2ext.prepare_color(0x01, sprite)
+        self.assertTrue(numpy.all(nparray[2:4, 2:4] == rcolor))
+        self.assertEqual(numpy.count_nonzero(nparray), 4)
+        nparray[0, 9] = 0xAABBCCDD
+        self.assertEqual(sdl2ext.PixelView(sprite)[9][0], 0xAABBCCDD)
+        del nparray
+
+        for bpp, dtype in ((8, numpy.uint8), (16, numpy.uint16)):
+            sprite = factory.create_sprite(size=(5, 10), bpp=bpp)
+            nparray = sdl2ext.pixels2d(sprite)
+            self.assertEqual(nparray.shape, (5, 10))
+            self.assertEqual(nparray.dtype, dtype)
+            del nparray
+        sprite = factory.create_sprite(size=(5, 10), bpp=24)
+        self.assertRaises(ValueError, sdl2ext.pixels2d, sprite)
+        self.assertRaises(TypeError, sdl2ext.pixels2d, None)
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_pixels3d_24bpp(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(5, 10), bpp=24)
+        sdl2ext.fill(sprite, 0x112233, (1, 2, 3, 4))
+        nparray = sdl2ext.pixels3d(sprite)
+        self.assertEqual(nparray.shape, (5, 10, 3))
+        rgba = sdl2ext.pixels_rgba(sprite)
+        self.assertEqual(rgba.shape, (10, 5, 4))
+        self.assertEqual(list(rgba[2, 1]), [0x11, 0x22, 0x33, 0xFF])
+        self.assertEqual(list(rgba[0, 0]), [0, 0, 0, 0xFF])
+        self.assertEqual(sorted(nparray[1, 2]), [0x11, 0x22, 0x33])
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_pixels_rgba(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        # Byte order dependent masks, for which the array views the pixels.
+        sprite = factory.create_sprite(size=(5, 10), bpp=32)
+        fmt = sprite.surface.format.contents
+        offsets = sdl2ext.pixelaccess._channel_offsets(fmt)
+        sdl2ext.fill(sprite, 0x102030, (1, 1, 2, 2))
+        rgba = sdl2ext.pixels_rgba(sprite)
+        self.assertEqual(rgba.shape, (10, 5, 4))
+        self.assertEqual(list(rgba[1, 1]), [0x10, 0x20, 0x30, 0xFF])
+        self.assertEqual(list(rgba[0, 0]), [0, 0, 0, 0xFF])
+        rgba[5, 4] = (0x40, 0x50, 0x60, 0xFF)
+        del rgba
+        self.assertEqual(sdl2ext.PixelView(sprite)[5][4], 0x405060)
+        self.assertEqual(offsets[3], None)
+
+        # RGBA8888 is stored as ABGR on little and RGBA on big endian.
+        sprite = factory.create_sprite(size=(5, 10), bpp=32,
+                                       masks=(0xFF000000, 0x00FF0000,
+                                              0x0000FF00, 0x000000FF))
+        rgba = sdl2ext.pixels_rgba(sprite)
+        self.assertIsNone(rgba._writeback)
+        rgba[2, 3] = (1, 2, 3, 4)
+        self.assertEqual(sdl2ext.PixelView(sprite)[2][3], 0x01020304)
+        del rgba
+
+        # RGB565 needs a converted copy, which is written back.
+        sprite = factory.create_sprite(size=(5, 10), bpp=16,
+                                       masks=(0xF800, 0x07E0, 0x001F, 0))
+        sdl2ext.fill(sprite, 0xFFFFFF, (0, 0, 1, 1))
+        rgba = sdl2ext.pixels_rgba(sprite)
+        self.assertEqual(list(rgba[0, 0]), [0xFF, 0xFF, 0xFF, 0xFF])
+        self.assertEqual(list(rgba[0, 1]), [0, 0, 0, 0xFF])
+        rgba[3, 2] = (0xFF, 0, 0xFF, 0xFF)
+        del rgba
+        self.assertEqual(sdl2ext.PixelView(sprite)[3][2], 0xF81F)
+
+        with sdl2ext.surface_pixels(sprite) as pixels:
+            rgba = pixels.pixels_rgba()
+            rgba[4, 4] = (0, 0xFF, 0, 0xFF)
+            self.assertEqual(pixels.view()[4][4], 0)
+        self.assertEqual(sdl2ext.PixelView(sprite)[4][4], 0x07E0)
+
+        rgba = sdl2ext.pixels_rgba(sprite, copy=True)
+        self.assertNotIsInstance(rgba, sdl2ext.pixelaccess.SurfaceArray)
+        self.assertEqual(list(rgba[4, 4]), [0, 0xFF, 0, 0xFF])
+        rgba[4, 4] = (0xFF, 0xFF, 0xFF, 0xFF)
+        del rgba
+        self.assertEqual(sdl2ext.PixelView(sprite)[4][4], 0x07E0)
+
+    @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+    def test_pixels_channels(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(5, 10), bpp=32,
+                                       masks=(0xFF000000, 0x00FF0000,
+                                              0x0000FF00, 0x000000FF))
+        sdl2ext.fill(sprite, (0x11, 0x22, 0x33, 0x44), (1, 2, 3, 4))
+        red, green, blue, alpha = sdl2ext.pixels_channels(sprite)
+        self.assertEqual(red.shape, (10, 5))
+        self.assertEqual(red[2, 1], 0x11)
+        self.assertEqual(green[2, 1], 0x22)
+        self.assertEqual(blue[2, 1], 0x33)
+        self.assertEqual(alpha[2, 1], 0x44)
+        self.assertEqual(red[0, 0], 0)
+        green[0, 0] = 0xFF
+        self.assertEqual(sdl2ext.PixelView(sprite)[0][0], 0x00FF0000)
+        del red, green, blue, alpha
+
+        sprite = factory.create_sprite(size=(5, 10), bpp=32)
+        channels = sdl2ext.pixels_channels(sprite)
+        self.assertIsNone(channels[3])
+        del channels
+        sprite = factory.create_sprite(size=(5, 10), bpp=16)
+        self.assertRaises(ValueError, sdl2ext.pixels_channels, sprite)
+        with sdl2ext.surface_pixels(sprite) as pixels:
+            self.assertRaises(ValueError, pixels.pixels_channels)
 
     @unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
     def test_pixels3d(self):
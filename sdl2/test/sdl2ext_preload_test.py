@@ -0,0 +1,119 @@
+import os
+import sys
+import unittest
+from ..ext.resources import Resources
+from ..ext import preload
+from .. import ext as sdl2ext
+
+RESOURCES = Resources(__file__, "resources")
+
+
+class SDL2ExtPreloadTest(unittest.TestCase):
+    __tags__ = ["sdl", "sdl2ext"]
+
+    def setUp(self):
+        sdl2ext.init()
+
+    def tearDown(self):
+        sdl2ext.quit()
+
+    def test_Preloader(self):
+        manifest = ["surfacetest.bmp", "surfacetest.png", "surfacetest.jpg",
+                    "rwopstest.txt", ("font.bmp", "image"),
+                    ("tuffy.copy.ttf", "image")]
+        preloader = sdl2ext.Preloader(RESOURCES, manifest, threads=2,
+                                      batchsize=2)
+        self.assertEqual(preloader.total, 6)
+        self.assertEqual(preloader.progress, 0.0)
+        self.assertFalse(preloader.done)
+        loaded = []
+        preloader.loaded += lambda sender, name, obj: loaded.append(name)
+        while not preloader.done:
+            self.assertLessEqual(preloader.update(), 2)
+        self.assertEqual(preloader.progress, 1.0)
+        self.assertEqual(preloader.count, 6)
+
+        results = preloader.results
+        self.assertEqual(sorted(loaded), sorted(results))
+        for name in ("surfacetest.bmp", "surfacetest.png", "surfacetest.jpg"):
+            self.assertIsInstance(results[name], sdl2ext.SoftwareSprite)
+            self.assertEqual(results[name].size, (32, 32))
+        self.assertIsInstance(results["font.bmp"], sdl2ext.SoftwareSprite)
+        self.assertIsInstance(results["rwopstest.txt"], memoryview)
+        self.assertEqual(results["rwopstest.txt"].tobytes(),
+                         RESOURCES.get("rwopstest.txt").read())
+        # Decoding tuffy.copy.ttf as image fails.
+        self.assertEqual(list(preloader.errors), ["tuffy.copy.ttf"])
+        self.assertIsInstance(preloader.errors["tuffy.copy.ttf"],
+                              sdl2ext.SDLError)
+
+        self.assertRaises(KeyError, sdl2ext.Preloader, RESOURCES, ["invalid"])
+        self.assertRaises(ValueError, sdl2ext.Preloader, RESOURCES,
+                          [("rwopstest.txt", "invalid")])
+        self.assertRaises(ValueError, sdl2ext.Preloader, RESOURCES,
+                          ["tuffy.ttf"])
+        self.assertRaises(ValueError, sdl2ext.Preloader, RESOURCES,
+                          ["rwopstest.txt", ("rwopstest.txt", "data")])
+
+        preloader = sdl2ext.Preloader(RESOURCES, [])
+        self.assertTrue(preloader.done)
+        preloader.wait()
+        self.assertEqual(preloader.progress, 1.0)
+
+    def test_Preloader_factory_error(self):
+        class FailingFactory(object):
+            def from_surface(self, tsurface, free=False):
+                raise ValueError("cannot create the sprite")
+
+        freed = []
+        free = preload._free
+        preload._free = lambda kind, data: freed.append(kind) or \
+            free(kind, data)
+        try:
+            preloader = sdl2ext.Preloader(RESOURCES, ["surfacetest.bmp"],
+                                          factory=FailingFactory())
+            preloader.wait()
+        finally:
+            preload._free = free
+        self.assertEqual(preloader.results, {})
+        self.assertIsInstance(preloader.errors["surfacetest.bmp"],
+                              ValueError)
+        self.assertEqual(freed, ["image"])
+
+    def test_Preloader_textures(self):
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        target = factory.create_sprite(size=(10, 10), bpp=32)
+        renderer = sdl2ext.Renderer(target)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        fontmanager = sdl2ext.FontManager(RESOURCES.get_path("tuffy.ttf"))
+        manifest = ["surfacetest.png", "surfacetest.gif", "tuffy.copy.ttf"]
+        preloader = sdl2ext.Preloader(RESOURCES, manifest, factory=factory,
+                                      fontmanager=fontmanager)
+        preloader.wait()
+        self.assertTrue(preloader.done)
+        self.assertEqual(preloader.errors, {})
+        for name in ("surfacetest.png", "surfacetest.gif"):
+            self.assertIsInstance(preloader.results[name],
+                                  sdl2ext.TextureSprite)
+        self.assertIn("tuffy.copy", fontmanager.fonts)
+        fontmanager.close()
+
+    def test_Preloader_cancel(self):
+        manifest = ["surfacetest.bmp", "surfacetest.png", "surfacetest.tga",
+                    "surfacetest.jpg", "surfacetest.gif", "surfacetest.pcx",
+                    "surfacetest.pnm", "surfacetest.ppm", "surfacetest.pgm",
+                    "surfacetest.pbm", "surfacetest.tif", "surfacetest.xpm",
+                    "surfacetest.lbm", "surfacetest.cur", "surfacetest.ico",
+                    ("font.bmp", "image")]
+        preloader = sdl2ext.Preloader(RESOURCES, manifest, threads=2)
+        preloader.update(1)
+        preloader.cancel()
+        self.assertTrue(preloader.cancelled)
+        self.assertTrue(preloader.done)
+        self.assertLess(preloader.count, len(manifest))
+        self.assertEqual(preloader.update(), 0)
+        preloader.wait()
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
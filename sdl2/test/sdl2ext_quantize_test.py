@@ -0,0 +1,124 @@
+import sys
+import unittest
+from .. import ext as sdl2ext
+from ..ext import colorpalettes
+from .. import surface
+
+try:
+    import numpy
+    _HASNUMPY = True
+except:
+    _HASNUMPY = False
+
+
+@unittest.skipIf(not _HASNUMPY, "numpy module is not supported")
+class SDL2ExtQuantizeTest(unittest.TestCase):
+    __tags__ = ["sdl", "sdl2ext"]
+
+    def setUp(self):
+        sdl2ext.init()
+
+    def tearDown(self):
+        sdl2ext.quit()
+
+    def test_PaletteQuantizer(self):
+        quantizer = sdl2ext.PaletteQuantizer(colorpalettes.CGAPALETTE)
+        self.assertEqual(len(quantizer.palette), 16)
+        self.assertRaises(ValueError, sdl2ext.PaletteQuantizer, [])
+
+        # Palette colors are mapped to their own index.
+        indices = quantizer.quantize(quantizer.palette.data)
+        self.assertEqual(list(indices), list(range(16)))
+
+        # Other colors are mapped to the nearest palette color.
+        rng = numpy.random.RandomState(42)
+        rgb = rng.randint(0, 256, (50, 40, 3))
+        indices = quantizer.quantize(rgb)
+        self.assertEqual(indices.shape, (50, 40))
+        self.assertEqual(indices.dtype, numpy.uint8)
+        palette = quantizer.palette.data[:, :3].astype(int)
+        dist = ((rgb[:, :, numpy.newaxis] - palette) ** 2).sum(axis=3)
+        best = dist.min(axis=2)
+        found = numpy.take_along_axis(dist, indices[..., numpy.newaxis]
+                                      .astype(int), axis=2)[..., 0]
+        # The lookup table is accurate up to twice the distance to the
+        # centers of its cells.
+        self.assertTrue(numpy.all(numpy.sqrt(found) - numpy.sqrt(best) <=
+                                  2 * numpy.sqrt(3 * 4 ** 2)))
+        self.assertGreater(numpy.mean(found == best), 0.9)
+
+        self.assertRaises(ValueError, quantizer.quantize, rgb[:, :, :2])
+        self.assertRaises(ValueError, quantizer.quantize, rgb, "unknown")
+
+    def test_PaletteQuantizer_dither(self):
+        quantizer = sdl2ext.PaletteQuantizer(colorpalettes.MONOPALETTE)
+        gray = numpy.full((16, 16, 3), 128)
+        self.assertTrue(numpy.all(quantizer.quantize(gray) == 1))
+        for dither in ("ordered", "floyd-steinberg"):
+            indices = quantizer.quantize(gray, dither)
+            self.assertEqual(indices.shape, (16, 16))
+            # A mid gray is dithered to about half black and half white.
+            self.assertAlmostEqual(numpy.mean(indices), 0.5, delta=0.05)
+            black = numpy.zeros((4, 4, 3))
+            self.assertTrue(numpy.all(quantizer.quantize(black, dither) == 0))
+        self.assertRaises(ValueError, quantizer.quantize, gray[0], "ordered")
+
+        # Error diffusion matches a serial pass using the exact nearest
+        # palette colors.
+        quantizer = sdl2ext.PaletteQuantizer(colorpalettes.CGAPALETTE)
+        palette = quantizer.palette.data[:, :3].astype(int)
+        rgb = numpy.random.RandomState(42).randint(0, 256, (12, 10, 3))
+        expected = numpy.zeros((12, 10), dtype=int)
+        errors = numpy.zeros((13, 12, 3))
+        for y in range(12):
+            for x in range(10):
+                value = numpy.clip(numpy.rint(rgb[y, x] + errors[y, x + 1]),
+                                   0, 255).astype(int)
+                index = ((value - palette) ** 2).sum(axis=1).argmin()
+                expected[y, x] = index
+                diff = value - palette[index]
+                errors[y, x + 2] += diff * 7 / 16.0
+                errors[y + 1, x] += diff * 3 / 16.0
+                errors[y + 1, x + 1] += diff * 5 / 16.0
+                errors[y + 1, x + 2] += diff * 1 / 16.0
+        indices = quantizer.quantize(rgb, "floyd-steinberg")
+        self.assertEqual(indices.tolist(), expected.tolist())
+
+    def test_PaletteQuantizer_to_surface(self):
+        quantizer = sdl2ext.PaletteQuantizer(colorpalettes.CGAPALETTE)
+        factory = sdl2ext.SpriteFactory(sdl2ext.SOFTWARE)
+        sprite = factory.create_sprite(size=(8, 4), bpp=32)
+        sdl2ext.fill(sprite, 0xFFAA0000, (0, 0, 4, 4))
+        sdl2ext.fill(sprite, 0xFF5555FF, (4, 0, 4, 2))
+        indices = quantizer.quantize(sprite)
+        self.assertEqual(indices.shape, (4, 8))
+        self.assertEqual(list(indices[0]), [4] * 4 + [9] * 4)
+        self.assertEqual(list(indices[3]), [4] * 4 + [0] * 4)
+
+        sf = quantizer.to_surface(sprite, "floyd-steinberg")
+        fmt = sf.format.contents
+        self.assertEqual(fmt.BitsPerPixel, 8)
+        self.assertEqual((sf.w, sf.h), (8, 4))
+        color = fmt.palette.contents.colors[9]
+        self.assertEqual((color.r, color.g, color.b), (0x55, 0x55, 0xFF))
+        view = sdl2ext.PixelView(sf)
+        self.assertEqual(list(view[0]), [4] * 4 + [9] * 4)
+        del view
+        surface.SDL_FreeSurface(sf)
+
+        target = factory.create_sprite(size=(8, 4), bpp=8)
+        self.assertIs(quantizer.to_surface(sprite, target=target),
+                      target.surface)
+        self.assertEqual(sdl2ext.PixelView(target)[1][5], 9)
+        wrongsize = factory.create_sprite(size=(4, 4), bpp=8)
+        self.assertRaises(ValueError, quantizer.to_surface, sprite,
+                          target=wrongsize)
+        self.assertRaises(ValueError, quantizer.to_surface, sprite,
+                          target=sprite)
+        quantizer = sdl2ext.PaletteQuantizer([(x, x, x) for x in range(256)] +
+                                             [(1, 2, 3)])
+        self.assertRaises(ValueError, quantizer.to_surface, sprite)
+
+
+if __name__ == '__main__':
+    sys.exit(unittest.main())
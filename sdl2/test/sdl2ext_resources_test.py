@@ -1,12 +1,19 @@
 import os
 import sys
+import json
+import mmap
+import shutil
+import tempfile
+import threading
 import unittest
+import zipfile
 import urllib
 if sys.version_info[0] < 3:
     import urllib2
 else:
     import urllib.request as urllib2
 from ..ext import resources
+from .. import rwops, surface
 
 
 class SDL2ExtResourcesTest(unittest.TestCase):
@@ -226,6 +233,126 @@ class SDL2ExtResourcesTest(unittest.TestCase):
         self.assertRaises(KeyError, res.get_path, "invalid")
         self.assertRaises(KeyError, res.get_path, 1234)
 
+    @unittest.skipIf(sys.platform=="cli", "IronPython's tarfile module is broken")
+    def test_Resources_get_archives(self):
+        fpath = os.path.join(os.path.dirname(__file__), "resources")
+        zfile = os.path.join(fpath, "resources.zip")
+        tfile = os.path.join(fpath, "resources.tar.gz")
+        tmpdir = tempfile.mkdtemp()
+        try:
+            sfile = os.path.join(tmpdir, "stored.zip")
+            zipf = zipfile.ZipFile(sfile, "w")
+            zipf.writestr("stored.txt", b"stored data")
+            info = zipfile.ZipInfo("deflated.txt")
+            info.compress_type = zipfile.ZIP_DEFLATED
+            zipf.writestr(info, b"deflated data" * 100)
+            zipf.close()
+
+            res = resources.Resources(maxarchives=2)
+            res.add_archive(zfile)
+            res.add_archive(tfile, typehint="targz")
+            res.add_archive(sfile)
+            self.assertEqual(res.get("stored.txt").read(), b"stored data")
+            self.assertEqual(res.get("deflated.txt").read(),
+                             b"deflated data" * 100)
+            expected = resources.open_tarfile(tfile, "resources/rwopstest.txt",
+                                              ftype="gz").read()
+            self.assertEqual(res.get("rwopstest.txt").read(), expected)
+            self.assertEqual(res.get_filelike("rwopstest.txt").read(),
+                             expected)
+            self.assertEqual(len(res._archives), 2)
+
+            # Re-adding an archive reads its new contents.
+            zipf = zipfile.ZipFile(sfile, "w")
+            zipf.writestr("stored.txt", b"changed")
+            zipf.close()
+            res.add_archive(sfile)
+            self.assertEqual(res.get("stored.txt").read(), b"changed")
+
+            results = []
+            def load():
+                for x in range(20):
+                    for fname in ("rwopstest.txt", "surfacetest.bmp",
+                                  "stored.txt"):
+                        results.append(res.get(fname).read())
+            threads = [threading.Thread(target=load) for x in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            self.assertEqual(len(results), 240)
+            self.assertEqual(results.count(expected), 80)
+            self.assertEqual(results.count(b"changed"), 80)
+
+            res.close()
+            self.assertEqual(len(res._archives), 0)
+            self.assertEqual(res.get("stored.txt").read(), b"changed")
+            res.close()
+
+            res = resources.Resources(maxarchives=0)
+            res.add_archive(zfile)
+            self.assertEqual(res.get("rwopstest.txt").read(), expected)
+            self.assertEqual(len(res._archives), 0)
+        finally:
+            shutil.rmtree(tmpdir)
+
+    @unittest.skipIf(sys.platform=="cli", "IronPython's tarfile module is broken")
+    def test_Resources_get_buffer(self):
+        fpath = os.path.join(os.path.dirname(__file__), "resources")
+        zfile = os.path.join(fpath, "resources.zip")
+        bfile = os.path.join(fpath, "surfacetest.bmp")
+        with open(bfile, "rb") as fp:
+            bmpdata = fp.read()
+        tmpdir = tempfile.mkdtemp()
+        try:
+            sfile = os.path.join(tmpdir, "stored.zip")
+            zipf = zipfile.ZipFile(sfile, "w")
+            # Move the data across the allocation granularity of mmap.
+            zipf.writestr("padding.txt", b"x" * 70000)
+            zipf.writestr("stored.bmp", bmpdata)
+            zipf.close()
+            efile = os.path.join(tmpdir, "empty.txt")
+            open(efile, "w").close()
+
+            res = resources.Resources()
+            res.add_archive(zfile)
+            res.add_archive(sfile)
+            res.add(bfile)
+            res.add(efile)
+            for fname in ("surfacetest.bmp", "stored.bmp", "rwopstest.txt",
+                          "empty.txt"):
+                buf = res.get_buffer(fname)
+                self.assertIsInstance(buf, memoryview)
+                self.assertTrue(buf.readonly)
+                self.assertEqual(buf.tobytes(), res.get(fname).read())
+            self.assertEqual(res.get_buffer("stored.bmp").tobytes(), bmpdata)
+            if sys.version_info[0] >= 3:
+                # Plain files and stored members are not copied.
+                self.assertIsInstance(res.get_buffer("stored.bmp").obj,
+                                      mmap.mmap)
+                self.assertIsInstance(res.get_buffer("surfacetest.bmp").obj,
+                                      mmap.mmap)
+            self.assertRaises(KeyError, res.get_buffer, "invalid")
+
+            for fname in ("surfacetest.bmp", "stored.bmp"):
+                rw = res.get_rwops(fname)
+                self.assertEqual(rw.contents.size(rw), len(bmpdata))
+                sf = surface.SDL_LoadBMP_RW(rw, 1)
+                self.assertTrue(sf)
+                self.assertEqual((sf.contents.w, sf.contents.h), (32, 32))
+                surface.SDL_FreeSurface(sf)
+            rw = res.get_rwops("rwopstest.txt")
+            self.assertEqual(rw.contents.size(rw),
+                             len(res.get("rwopstest.txt").read()))
+            rwops.SDL_RWclose(rw.contents)
+            rw = res.get_rwops("empty.txt")
+            self.assertEqual(rw.contents.size(rw), 0)
+            self.assertFalse(surface.SDL_LoadBMP_RW(rw, 1))
+            self.assertRaises(KeyError, res.get_rwops, "invalid")
+            res.close()
+        finally:
+            shutil.rmtree(tmpdir)
+
     @unittest.skipIf(sys.platform=="cli", "IronPython's tarfile module is broken")
     def test_Resources_scan(self):
         fpath = os.path.join(os.path.dirname(__file__))
@@ -243,5 +370,63 @@ class SDL2ExtResourcesTest(unittest.TestCase):
         self.assertIsNotNone(res.get("rwopstest.txt"))
         self.assertIsNotNone(res.get("surfacetest.bmp"))
 
+    @unittest.skipIf(sys.platform=="cli", "IronPython's tarfile module is broken")
+    def test_Resources_scan_index(self):
+        fpath = os.path.join(os.path.dirname(__file__), "resources")
+        tmpdir = tempfile.mkdtemp()
+        try:
+            root = os.path.join(tmpdir, "tree")
+            os.makedirs(os.path.join(root, "sub", "skip"))
+            with open(os.path.join(root, "a.txt"), "w") as fp:
+                fp.write("a")
+            with open(os.path.join(root, "sub", "b.txt"), "w") as fp:
+                fp.write("b")
+            with open(os.path.join(root, "sub", "skip", "c.txt"), "w") as fp:
+                fp.write("c")
+            index = os.path.join(tmpdir, "index.json")
+
+            res = resources.Resources(root, index=index)
+            self.assertTrue(os.path.exists(index))
+            plain = resources.Resources(root)
+            self.assertEqual(res.files, plain.files)
+            self.assertEqual(res.get("b.txt").read(), b"b")
+
+            # An unchanged tree does not rewrite the index.
+            mtime = int(os.stat(index).st_mtime) - 10
+            os.utime(index, (mtime, mtime))
+            res = resources.Resources(root, index=index)
+            self.assertEqual(res.files, plain.files)
+            self.assertEqual(int(os.stat(index).st_mtime), mtime)
+
+            # Changed and new files, including archives, are picked up.
+            with open(os.path.join(root, "a.txt"), "w") as fp:
+                fp.write("changed")
+            shutil.copy(os.path.join(fpath, "resources.zip"),
+                        os.path.join(root, "sub"))
+            shutil.rmtree(os.path.join(root, "sub", "skip"))
+            res = resources.Resources(root, index=index)
+            self.assertEqual(res.files, resources.Resources(root).files)
+            self.assertEqual(res.get("a.txt").read(), b"changed")
+            self.assertIsNotNone(res.get("surfacetest.bmp"))
+            self.assertRaises(KeyError, res.get, "c.txt")
+            with open(index) as fp:
+                dirs = json.load(fp)["dirs"]
+            self.assertEqual(len(dirs), 2)
+
+            res = resources.Resources()
+            res.scan(root, excludepattern=".*sub$", index=index)
+            self.assertIsNotNone(res.get("a.txt"))
+            self.assertRaises(KeyError, res.get, "b.txt")
+
+            # Broken index files are ignored and replaced.
+            with open(index, "w") as fp:
+                fp.write("invalid")
+            res = resources.Resources(root, index=index)
+            self.assertIsNotNone(res.get("b.txt"))
+            with open(index) as fp:
+                self.assertEqual(json.load(fp)["version"], 2)
+        finally:
+            shutil.rmtree(tmpdir)
+
 if __name__ == '__main__':
     sys.exit(unittest.main())
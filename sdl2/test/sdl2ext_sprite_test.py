@@ -1,5 +1,6 @@
 import sys
 import unittest
+import weakref
 from ctypes import ArgumentError, POINTER, byref
 from ..ext.resources import Resources
 from .. import ext as sdl2ext
@@ -8,7 +9,8 @@ from sdl2.video import SDL_Window, SDL_WINDOW_HIDDEN, SDL_DestroyWindow
 from sdl2.render import SDL_Renderer, SDL_CreateWindowAndRenderer, \
     SDL_DestroyRenderer, SDL_CreateTexture, SDL_Texture, \
     SDL_TEXTUREACCESS_STATIC, SDL_TEXTUREACCESS_STREAMING, \
-    SDL_TEXTUREACCESS_TARGET
+    SDL_TEXTUREACCESS_TARGET, SDL_FLIP_NONE, SDL_GetTextureColorMod
+from sdl2.stdinc import Uint8
 
 _ISPYPY = hasattr(sys, "pypy_version_info")
 
@@ -358,9 +360,60 @@ class SDL2ExtSpriteTest(unittest.TestCase):
     def test_TextureSpriteRenderSystem(self):
         pass
 
-    @unittest.skip("not implemented")
+    @unittest.skipIf(_ISPYPY, "PyPy's ctypes can't do byref(value, offset)")
     def test_TextureSpriteRenderSystem_render(self):
-        pass
+        surface = SDL_CreateRGBSurface(0, 64, 64, 32, 0, 0, 0, 0).contents
+        sdl2ext.fill(surface, 0x0)
+        renderer = sdl2ext.Renderer(surface)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        rendersystem = factory.create_sprite_render_system()
+        sp = factory.from_color(0xFFFFFF, (20, 4))
+        self.assertEqual(sp.angle, 0)
+        self.assertEqual(sp.flip, SDL_FLIP_NONE)
+        self.assertEqual(sp.center, None)
+        self.assertEqual(sp.color_mod, (255, 255, 255))
+        self.assertEqual(sp.alpha_mod, 255)
+
+        sp.position = 20, 20
+        sp.color_mod = (255, 0, 0)
+        rendersystem.render([sp])
+        view = sdl2ext.PixelView(surface)
+        self.check_pixels(view, 64, 64, sp, 0xFF0000, (0x0,))
+        del view
+
+        r, g, b = Uint8(), Uint8(), Uint8()
+        SDL_GetTextureColorMod(sp.texture, byref(r), byref(g), byref(b))
+        self.assertEqual((r.value, g.value, b.value), (255, 0, 0))
+
+        sdl2ext.fill(surface, 0x0)
+        sp.color_mod = (0, 255, 0)
+        sp.angle = 90
+        rendersystem.render(sp)
+        view = sdl2ext.PixelView(surface)
+        # Rotated around the center at (30, 22)
+        self.assertEqual(view[14][30] & 0xFFFFFF, 0x00FF00)
+        self.assertEqual(view[29][30] & 0xFFFFFF, 0x00FF00)
+        self.assertEqual(view[22][22] & 0xFFFFFF, 0x0)
+        self.assertEqual(view[22][37] & 0xFFFFFF, 0x0)
+        del view
+
+    def test_texture_sortkey(self):
+        surface = SDL_CreateRGBSurface(0, 10, 10, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(surface)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        rendersystem = factory.create_sprite_render_system()
+        sprites = [factory.from_color(0xFFFFFF, (2, 2)) for x in range(4)]
+        sprites[3].depth = -1
+        # The default keeps the order of sprites on the same depth.
+        ordered = sorted(sprites, key=rendersystem.sortfunc)
+        self.assertEqual(ordered, [sprites[3]] + sprites[:3])
+
+        sprites[0].color_mod = (255, 0, 0)
+        ordered = sorted(sprites, key=sdl2ext.texture_sortkey)
+        self.assertEqual(ordered[0], sprites[3])
+        self.assertEqual(set(ordered[1:]), set(sprites[:3]))
+        rendersystem.sortfunc = sdl2ext.texture_sortkey
+        rendersystem.render(ordered)
 
     @unittest.skip("not implemented")
     def test_TextureSpriteRenderSystem_process(self):
@@ -617,6 +670,85 @@ class SDL2ExtSpriteTest(unittest.TestCase):
         self.check_pixels(view, 128, 128, sp, 0xFF0000, (0x0,))
         del view
 
+    def test_TextureRegistry(self):
+        surface = SDL_CreateRGBSurface(0, 64, 64, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(surface)
+        registry = renderer.textures
+        self.assertIsInstance(registry, sdl2ext.TextureRegistry)
+        self.assertEqual(registry.total, 0)
+        self.assertEqual(registry.budget, None)
+
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        sp1 = factory.from_color(0xFF0000, (10, 10))
+        sp2 = factory.from_color(0x00FF00, (10, 10))
+        sp3 = factory.create_texture_sprite(renderer, (4, 4))
+        self.assertEqual(len(registry), 3)
+        self.assertEqual(registry.totals, {"color": 800, "texture": 64})
+        self.assertEqual(registry.total, 864)
+
+        registry.add(sp3, "custom")
+        self.assertEqual(registry.totals,
+                         {"color": 800, "texture": 0, "custom": 64})
+        self.assertRaises(TypeError, registry.add, None)
+        self.assertRaises(TypeError, registry.add, sp3, "custom", 1234)
+        self.assertRaises(ValueError, registry.evict, sp3)
+
+        # sp1 was drawn least recently and will be evicted
+        renderer.copy(sp2)
+        registry.budget = 500
+        self.assertIsNone(sp1.texture)
+        self.assertIsNotNone(sp2.texture)
+        self.assertEqual(registry.totals["color"], 400)
+
+        # Drawing sp1 recreates its texture and evicts sp2
+        rendersystem = factory.create_sprite_render_system()
+        sp1.position = 10, 10
+        rendersystem.render([sp1])
+        self.assertIsNotNone(sp1.texture)
+        self.assertIsNone(sp2.texture)
+        self.assertEqual(registry.totals["color"], 400)
+        view = sdl2ext.PixelView(surface)
+        self.assertEqual(view[15][15] & 0xFFFFFF, 0xFF0000)
+        del view
+
+        del sp2
+        self.assertEqual(len(registry), 2)
+        self.assertEqual(registry.totals["color"], 400)
+        del sp1
+        self.assertEqual(registry.totals["color"], 0)
+        registry.remove(sp3)
+        self.assertEqual(len(registry), 0)
+        self.assertEqual(registry.total, 0)
+
+    def test_TextureRegistry_evicted(self):
+        surface = SDL_CreateRGBSurface(0, 32, 32, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(surface)
+        factory = sdl2ext.SpriteFactory(sdl2ext.TEXTURE, renderer=renderer)
+        rendersystem = factory.create_sprite_render_system()
+        rendersystem.sortfunc = sdl2ext.texture_sortkey
+        sp1 = factory.from_color(0xFF0000, (4, 4))
+        sp2 = factory.from_color(0x00FF00, (4, 4))
+        sp2.position = 10, 10
+        renderer.textures.evict(sp1)
+        self.assertIsNone(sp1.texture)
+
+        rendersystem.process(None, [sp2, sp1])
+        self.assertIsNotNone(sp1.texture)
+        view = sdl2ext.PixelView(surface)
+        self.assertEqual(view[1][1] & 0xFFFFFF, 0xFF0000)
+        self.assertEqual(view[11][11] & 0xFFFFFF, 0x00FF00)
+        del view
+
+    def test_TextureRegistry_renderer(self):
+        surface = SDL_CreateRGBSurface(0, 8, 8, 32, 0, 0, 0, 0).contents
+        renderer = sdl2ext.Renderer(surface)
+        registry = renderer.textures
+        self.assertEqual(registry.renderer.renderer, renderer.renderer)
+        # The registry does not keep the Renderer alive.
+        ref = weakref.ref(renderer)
+        del renderer
+        self.assertIsNone(ref())
+
     @unittest.skipIf(_ISPYPY, "PyPy's ctypes can't do byref(value, offset)")
     def test_Renderer_draw_line(self):
         surface = SDL_CreateRGBSurface(0, 128, 128, 32, 0, 0, 0, 0).contents